@@ -0,0 +1,58 @@
+# configurations/agregats.py
+"""
+Comptages indépendants regroupés : plusieurs count() exécutés ensemble
+plutôt que l'un après l'autre, depuis une vue synchrone (WSGI).
+
+- sur PostgreSQL : une requête par comptage, lancées en parallèle dans des
+  fils dédiés (AGREGATS_FILS au plus), chacun sur sa propre connexion ; la
+  latence est celle du comptage le plus lent ;
+- sinon (SQLite, qui n'exécute qu'une requête à la fois par connexion) : un
+  seul SELECT regroupant tous les comptages en sous-requêtes scalaires, un
+  seul aller-retour.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Func, IntegerField
+
+
+def _sous_requete(queryset):
+    # COUNT sans GROUP BY : une ligne, même si aucune ne correspond
+    comptage = Func(F('pk'), function='COUNT', output_field=IntegerField())
+    return queryset.order_by().annotate(_n=comptage).values('_n').query.sql_with_params()
+
+
+def _compter_ensemble(requetes, alias):
+    noms = list(requetes)
+    morceaux, parametres = [], []
+    for nom in noms:
+        sql, params = _sous_requete(requetes[nom])
+        morceaux.append(f'({sql})')
+        parametres.extend(params)
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(morceaux), parametres)
+        ligne = cursor.fetchone()
+    return dict(zip(noms, ligne))
+
+
+def _compter_isole(queryset):
+    """Comptage dans un fil dédié, avec sa propre connexion"""
+    try:
+        return queryset.count()
+    finally:
+        # Fil terminé avec le comptage : connexion fermée (ou rendue au pool)
+        connections.close_all()
+
+
+def compter(requetes):
+    """{nom: queryset} -> {nom: nombre de lignes}"""
+    if not requetes:
+        return {}
+    noms = list(requetes)
+    alias = requetes[noms[0]].db
+    fils = min(len(noms), getattr(settings, 'AGREGATS_FILS', 2))
+    if connections[alias].vendor != 'postgresql' or fils < 2:
+        return _compter_ensemble(requetes, alias)
+    with ThreadPoolExecutor(max_workers=fils) as executeur:
+        return dict(zip(noms, executeur.map(_compter_isole, (requetes[nom] for nom in noms))))
@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Le flux Server-Sent Events du tableau de bord (/dashboard/evenements/) garde
+une connexion ouverte par navigateur : il doit être servi par un serveur
+ASGI (uvicorn configurations.asgi:application, par exemple derrière le même
+mandataire que gunicorn). Sous WSGI, il se replie sur des réponses courtes
+suivies d'une reconnexion du navigateur.
 """
 
 import os
@@ -0,0 +1,18 @@
+# configurations/bases.py
+"""
+Connexions aux bases autour d'un fork (gunicorn avec preload_app,
+run_worker, backfill, impression) : un processus enfant ne doit hériter ni
+d'une connexion ouverte du parent, ni de son pool de connexions PostgreSQL,
+dont les fils d'arrière-plan ne survivent pas au fork.
+"""
+from django.db import connections
+
+
+def fermer_avant_fork():
+    """Ferme les connexions et les pools ouverts par ce processus"""
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        # PostgreSQL avec OPTIONS['pool'] ; rouvert à la demande dans chaque enfant
+        close_pool = getattr(connection, 'close_pool', None)
+        if close_pool is not None:
+            close_pool()
@@ -0,0 +1,374 @@
+# configurations/caching.py
+"""
+Cache des vues partagé entre utilisateurs ayant les mêmes droits.
+
+Chaque modèle possède un numéro de version stocké dans le cache, incrémenté
+après chaque écriture validée (voir suivi_conducteurs/signals.py). Une entrée
+mémorise les versions des modèles dont elle dépend : si l'une a changé, ou
+si l'entrée arrive en fin de vie, elle est recalculée par un seul processus
+(verrou dans le cache) pendant que les autres servent la valeur périmée
+(voir obtenir).
+
+La clé d'une vue contient une empreinte de l'ensemble des permissions
+effectives de l'utilisateur et la chaîne de requête normalisée : tous les
+utilisateurs d'un même profil partagent la même entrée.
+
+Pour les TemplateResponse, c'est le contexte qui est mis en cache et non le
+HTML : le gabarit est rendu à chaque requête, ce qui conserve les éléments
+propres à l'utilisateur (barre de navigation, messages, jeton CSRF).
+
+Les mêmes versions servent à calculer des ETag (décorateur conditionnel) :
+une ressource inchangée est servie en 304 sans exécuter la vue. Une réponse
+construite à partir d'une valeur périmée (versions antérieures) est envoyée
+sans ETag : le client ne l'associe pas aux versions courantes.
+
+Les entrées non gabarit (JSON) conservent leurs variantes compressées.
+"""
+import hashlib
+import time
+from contextvars import ContextVar
+from datetime import date
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import compression
+
+# Réponse conditionnelle en cours : {'perimee': bool}, mis à jour par obtenir
+_service = ContextVar('service_conditionnel', default=None)
+
+# Modèles écrits à chaque requête ou sans incidence sur les vues en cache
+MODELES_NON_VERSIONNES = {'sessions.session', 'admin.logentry', 'taches.tache', 'taches.planification'}
+
+
+def _label(modele):
+    if isinstance(modele, str):
+        return modele.lower()
+    return modele._meta.label_lower
+
+
+# Horodatage de la dernière invalidation : lectures maintenues sur la base
+# principale tant que la réplique peut ne pas l'avoir reçue (voir routage.py)
+CLE_DERNIERE_ECRITURE = 'derniere_ecriture'
+
+
+def _cle_version(label):
+    return f'version:{label}'
+
+
+def versions(*modeles):
+    """Versions courantes des modèles, dans l'ordre donné"""
+    cles = [_cle_version(_label(modele)) for modele in modeles]
+    trouvees = cache.get_many(cles)
+    manquantes = [cle for cle in cles if cle not in trouvees]
+    if manquantes:
+        # Une version perdue (éviction) repart d'un horodatage : elle ne peut
+        # pas retomber sur une valeur déjà utilisée par d'anciennes entrées
+        initiale = time.time_ns() // 1000
+        for cle in manquantes:
+            cache.add(cle, initiale, None)
+        trouvees.update(cache.get_many(manquantes))
+    return [trouvees[cle] for cle in cles]
+
+
+def incrementer_versions(*modeles):
+    """Invalide toutes les entrées qui dépendent de ces modèles"""
+    for modele in modeles:
+        cle = _cle_version(_label(modele))
+        try:
+            cache.incr(cle)
+        except ValueError:
+            cache.add(cle, time.time_ns() // 1000, None)
+    cache.set(CLE_DERNIERE_ECRITURE, time.time(), None)
+
+
+def derniere_ecriture():
+    """Horodatage (time.time) de la dernière invalidation, ou None"""
+    return cache.get(CLE_DERNIERE_ECRITURE)
+
+
+def modele_modifie(modele):
+    """À appeler depuis les signaux : incrémente la version une fois la transaction validée"""
+    label = _label(modele)
+    if label in MODELES_NON_VERSIONNES:
+        return
+    transaction.on_commit(lambda: incrementer_versions(label))
+
+
+# Version globale des droits : groupes, permissions et informations affichées
+# dans la barre de navigation (nom, couleur des groupes)
+VERSION_DROITS = 'droits'
+
+
+def droits_modifies():
+    """Invalide les fragments qui dépendent des groupes et permissions des utilisateurs"""
+    transaction.on_commit(lambda: incrementer_versions(VERSION_DROITS))
+
+
+def version_droits():
+    return versions(VERSION_DROITS)[0]
+
+
+def empreinte_permissions(user):
+    """Empreinte de l'ensemble des permissions effectives de l'utilisateur"""
+    if not user.is_authenticated:
+        return 'anonyme'
+    if user.is_superuser:
+        return 'superuser'
+    permissions = '|'.join(sorted(user.get_all_permissions()))
+    return hashlib.sha1(permissions.encode()).hexdigest()[:16]
+
+
+def querystring_normalise(request):
+    """Paramètres GET triés, sans les valeurs vides (?search= équivaut à l'absence de filtre)"""
+    parametres = sorted(
+        (cle, valeur)
+        for cle, valeurs in request.GET.lists()
+        for valeur in valeurs
+        if valeur != ''
+    )
+    return urlencode(parametres)
+
+
+def _signature(request, args, kwargs):
+    return (
+        querystring_normalise(request),
+        args,
+        sorted((kwargs or {}).items()),
+    )
+
+
+def cle_vue(nom, request, args=(), kwargs=None):
+    """Clé de cache d'une vue : nom, droits et paramètres (les versions sont dans l'entrée)"""
+    signature = repr(_signature(request, args, kwargs))
+    return 'vue:{}:{}:{}'.format(
+        nom,
+        empreinte_permissions(request.user),
+        hashlib.sha1(signature.encode()).hexdigest(),
+    )
+
+
+def etag_vue(nom, request, labels, args=(), kwargs=None, par_utilisateur=True):
+    """
+    ETag d'une vue, ou None si la réponse ne doit pas être conditionnelle
+    (messages en attente : un 304 les ferait disparaître jusqu'à la page suivante).
+    """
+    if len(messages.get_messages(request)):
+        return None
+    elements = [
+        nom,
+        empreinte_permissions(request.user),
+        # Plusieurs vues comptent « ce mois-ci » ou « les 12 derniers mois »
+        date.today().isoformat(),
+        _signature(request, args, kwargs),
+        versions(*labels),
+    ]
+    if par_utilisateur:
+        elements += [
+            request.user.pk,
+            version_droits(),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        ]
+    return hashlib.sha1(repr(elements).encode()).hexdigest()
+
+
+def _cle_verrou(cle):
+    return f'verrou:{cle}'
+
+
+def _calculer(cle, calculer, duree, versions_calcul):
+    """Calcule la valeur (verrou déjà pris), la met en cache et libère le verrou"""
+    try:
+        valeur = calculer()
+        if valeur is not None:
+            avance = getattr(settings, 'CACHE_RAFRAICHISSEMENT_AVANCE', 0.2)
+            entree = {
+                'valeur': valeur,
+                'versions': versions_calcul,
+                # Recalcul anticipé : avant l'expiration, pas après
+                'rafraichir_apres': time.time() + duree * (1 - avance),
+            }
+            # L'entrée survit à sa fin de vie pour pouvoir être servie périmée
+            cache.set(cle, entree, duree + getattr(settings, 'CACHE_PERIME_DUREE', 3600))
+        return valeur
+    finally:
+        cache.delete(_cle_verrou(cle))
+
+
+def _servir(entree, versions_courantes):
+    """Valeur d'une entrée existante ; signale à conditionnel si elle est périmée"""
+    service = _service.get()
+    if service is not None and entree['versions'] != versions_courantes:
+        service['perimee'] = True
+    return entree['valeur']
+
+
+def obtenir(cle, calculer, duree=None, modeles=()):
+    """
+    Lecture en cache protégée contre les calculs simultanés (single-flight)
+    avec service de la valeur périmée (stale-while-revalidate).
+
+    - entrée à jour (mêmes versions des `modeles`, pas en fin de vie) : servie ;
+    - entrée périmée ou proche de l'expiration : le premier processus qui
+      prend le verrou (cache.add) recalcule, les autres servent l'ancienne
+      valeur sans attendre ;
+    - pas d'entrée : un seul processus calcule, les autres attendent
+      brièvement son résultat puis calculent eux-mêmes en dernier recours.
+
+    `calculer` peut renvoyer None : rien n'est alors mis en cache.
+
+    Le verrou n'est strictement exclusif qu'avec un cache dont add est
+    atomique (Redis, Memcached) ; avec FileBasedCache, deux processus peuvent
+    exceptionnellement recalculer en même temps, sans autre conséquence.
+    """
+    duree = duree if duree is not None else getattr(settings, 'CACHE_VUES_DUREE', 300)
+    duree_verrou = getattr(settings, 'CACHE_VERROU_DUREE', 30)
+    versions_courantes = versions(*modeles)
+
+    entree = cache.get(cle)
+    if entree is not None:
+        if entree['versions'] == versions_courantes and time.time() < entree['rafraichir_apres']:
+            return entree['valeur']
+        if not cache.add(_cle_verrou(cle), 1, duree_verrou):
+            return _servir(entree, versions_courantes)
+        return _calculer(cle, calculer, duree, versions_courantes)
+
+    if cache.add(_cle_verrou(cle), 1, duree_verrou):
+        return _calculer(cle, calculer, duree, versions_courantes)
+
+    # Un autre processus calcule : attendre son résultat plutôt que recalculer
+    fin = time.monotonic() + getattr(settings, 'CACHE_ATTENTE_CALCUL', 2)
+    while time.monotonic() < fin:
+        time.sleep(0.05)
+        entree = cache.get(cle)
+        if entree is not None:
+            return _servir(entree, versions_courantes)
+    return calculer()
+
+
+def _entree(response):
+    """Contenu à mettre en cache pour une réponse, ou None si elle ne doit pas l'être"""
+    if response.status_code != 200 or response.streaming:
+        return None
+    if isinstance(response, TemplateResponse) and not response.is_rendered:
+        # Rendu à chaque requête (éléments propres à l'utilisateur) : la
+        # compression reste à la charge de CompressionMiddleware
+        return {
+            'template': response.template_name,
+            'context': response.context_data,
+        }
+    return {
+        'contenu': response.content,
+        'content_type': response['Content-Type'],
+        # Variantes gzip / brotli calculées une fois, à la mise en cache
+        'variantes': compression.variantes(response.content) if compression.est_compressible(response) else {},
+    }
+
+
+def _reponse(request, entree):
+    if 'template' in entree:
+        return TemplateResponse(request, entree['template'], entree['context'])
+
+    encodage = compression.encodage_accepte(request)
+    contenu = entree['variantes'].get(encodage)
+    if contenu is None:
+        return HttpResponse(entree['contenu'], content_type=entree['content_type'])
+
+    response = HttpResponse(contenu, content_type=entree['content_type'])
+    response['Content-Encoding'] = encodage
+    response.variante_precalculee = True
+    return response
+
+
+def cache_par_permissions(*modeles, timeout=None):
+    """
+    Met en cache une vue GET dont le résultat ne dépend que des paramètres de
+    la requête et des permissions de l'utilisateur (lecture via obtenir :
+    un seul recalcul à la fois, valeur périmée servie aux autres).
+
+    `modeles` liste les modèles (classes ou labels 'app.Modele') lus par la
+    vue. Le décorateur se place sous login_required / permission_required
+    pour que les contrôles d'accès restent faits à chaque requête.
+    """
+    labels = [_label(modele) for modele in modeles]
+
+    def decorator(vue):
+        nom = f'{vue.__module__}.{vue.__qualname__}'
+
+        @wraps(vue)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return vue(request, *args, **kwargs)
+
+            calculee = {}
+
+            def calculer():
+                calculee['response'] = vue(request, *args, **kwargs)
+                return _entree(calculee['response'])
+
+            entree = obtenir(cle_vue(nom, request, args, kwargs), calculer, timeout, labels)
+            if 'response' in calculee and (entree is None or 'template' in entree):
+                return calculee['response']
+            # Servir la variante précalculée plutôt que recompresser
+            return _reponse(request, entree)
+
+        return wrapper
+
+    return decorator
+
+
+def conditionnel(*modeles, par_utilisateur=True):
+    """
+    Réponses conditionnelles : ETag calculé à partir des versions des modèles
+    lus par la vue, 304 Not Modified si le client présente le même
+    (If-None-Match), sans exécuter la vue ni rendre le gabarit.
+
+    `par_utilisateur` : la réponse contient des éléments propres à
+    l'utilisateur (barre de navigation, groupes, jeton CSRF), son identifiant
+    et la version des droits entrent alors dans l'ETag.
+
+    Si la vue a servi une valeur périmée (obtenir, pendant le recalcul par
+    un autre processus), l'ETag est retiré : sinon le client conserverait
+    l'ancien contenu sous l'ETag des versions courantes, en 304 jusqu'à
+    l'écriture suivante.
+    """
+    labels = [_label(modele) for modele in modeles]
+
+    def decorator(vue):
+        nom = f'{vue.__module__}.{vue.__qualname__}'
+
+        def etag(request, *args, **kwargs):
+            return etag_vue(nom, request, labels, args, kwargs, par_utilisateur)
+
+        vue_conditionnelle = condition(etag_func=etag)(vue)
+
+        @wraps(vue)
+        def wrapper(request, *args, **kwargs):
+            service = {'perimee': False}
+            jeton = _service.set(service)
+            try:
+                response = vue_conditionnelle(request, *args, **kwargs)
+            finally:
+                _service.reset(jeton)
+            return _finaliser(response, service)
+
+        return wrapper
+
+    return decorator
+
+
+def _finaliser(response, service):
+    if service['perimee']:
+        del response['ETag']
+        del response['Last-Modified']
+    # Revalidation systématique, jamais de copie dans un cache partagé
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
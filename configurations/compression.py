@@ -0,0 +1,128 @@
+# configurations/compression.py
+"""
+Compression des réponses : gzip, et brotli si le module est installé.
+
+Utilisé par CompressionMiddleware (réponses dynamiques) et par le cache des
+vues, qui conserve les variantes compressées à côté du contenu : un succès de
+cache renvoie directement la variante sans recompresser.
+
+Attaque BREACH : une réponse dynamique qui contient un secret (jeton CSRF)
+et reflète une saisie de la requête laisse deviner le secret à la taille du
+corps compressé. Comme GZipMiddleware de Django, le gzip dynamique reçoit un
+en-tête de longueur aléatoire (COMPRESSION_OCTETS_ALEATOIRES) ; brotli n'a
+pas d'équivalent et n'est donc pas proposé pour une page qui porte le jeton
+CSRF.
+"""
+import gzip
+
+from django.conf import settings
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+# Types déjà compressés (images, PDF, archives) exclus : seuls les formats texte gagnent
+TYPES_COMPRESSIBLES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def encodages_disponibles():
+    """Encodages proposés, par ordre de préférence"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def porte_jeton_csrf(request, response):
+    """
+    Le jeton CSRF a été lu pendant la requête ({% csrf_token %}, get_token).
+
+    CsrfViewMiddleware, placé après CompressionMiddleware, remet
+    CSRF_COOKIE_NEEDS_UPDATE à False une fois le cookie posé : c'est donc le
+    cookie présent dans la réponse qui fait foi.
+    """
+    if settings.CSRF_COOKIE_NAME in response.cookies:
+        return True
+    return bool(request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+
+
+def encodage_accepte(request, secret=False):
+    """
+    Meilleur encodage accepté par le client (en-tête Accept-Encoding), ou
+    None. `secret` : réponse porteuse d'un secret, gzip seulement (remplissage
+    aléatoire possible).
+    """
+    acceptes = set()
+    for element in request.headers.get('Accept-Encoding', '').split(','):
+        nom, _, parametres = element.partition(';')
+        parametres = parametres.replace(' ', '')
+        qualite = 1.0
+        if parametres.startswith('q='):
+            try:
+                qualite = float(parametres[2:])
+            except ValueError:
+                pass
+        if qualite > 0:
+            acceptes.add(nom.strip().lower())
+    for encodage in encodages_disponibles():
+        if secret and encodage != 'gzip':
+            continue
+        if encodage in acceptes:
+            return encodage
+    return None
+
+
+def compresser(contenu, encodage, precalcul=False):
+    """
+    Compresse un contenu. `precalcul` : variante conservée en cache, calculée
+    une seule fois, on peut donc se permettre le niveau de compression maximal.
+    Sinon (réponse dynamique), gzip est complété d'un remplissage aléatoire
+    contre l'attaque BREACH.
+    """
+    if encodage == 'br':
+        return brotli.compress(contenu, quality=11 if precalcul else 5)
+    if precalcul:
+        return gzip.compress(contenu, compresslevel=9, mtime=0)
+    return compress_string(
+        contenu, max_random_bytes=getattr(settings, 'COMPRESSION_OCTETS_ALEATOIRES', 100)
+    )
+
+
+def est_compressible(response):
+    """Réponse non encore compressée, de type texte et assez volumineuse pour que ce soit utile"""
+    if response.streaming or response.has_header('Content-Encoding'):
+        return False
+    if len(response.content) < getattr(settings, 'COMPRESSION_TAILLE_MIN', 1024):
+        return False
+    return response.get('Content-Type', '').startswith(TYPES_COMPRESSIBLES)
+
+
+def variantes(contenu):
+    """Variantes précalculées d'un contenu, pour chaque encodage où la compression est utile"""
+    resultat = {}
+    for encodage in encodages_disponibles():
+        compresse = compresser(contenu, encodage, precalcul=True)
+        if len(compresse) < len(contenu):
+            resultat[encodage] = compresse
+    return resultat
+
+
+def affaiblir_etag(response):
+    """Le corps compressé n'est plus identique octet pour octet : ETag faible"""
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+def appliquer(response, contenu, encodage):
+    """Remplace le corps par sa version compressée et ajuste les en-têtes"""
+    response.content = contenu
+    response['Content-Length'] = str(len(contenu))
+    response['Content-Encoding'] = encodage
+    affaiblir_etag(response)
+    return response
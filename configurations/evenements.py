@@ -0,0 +1,68 @@
+# configurations/evenements.py
+"""
+Journal d'événements partagé entre processus, lu par le flux Server-Sent
+Events du tableau de bord (suivi_conducteurs/flux.py).
+
+Les écritures publient un événement une fois la transaction validée ; il est
+numéroté par un compteur du cache et conservé EVENEMENTS_DUREE secondes. Les
+connexions SSE relisent le journal à partir du dernier numéro transmis
+(Last-Event-ID), quel que soit le processus qui a publié.
+
+Avec FileBasedCache, l'incrément du compteur n'est pas atomique : deux
+publications simultanées peuvent exceptionnellement partager un numéro, la
+seconde remplaçant la première. Les compteurs étant renvoyés en entier à
+chaque changement, seul un événement de détail peut alors manquer.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+CLE_DERNIER = 'evenements:dernier'
+
+
+def _cle(numero):
+    return f'evenements:{numero}'
+
+
+def _publier(type_evenement, donnees):
+    try:
+        numero = cache.incr(CLE_DERNIER)
+    except ValueError:
+        cache.add(CLE_DERNIER, 0, None)
+        numero = cache.incr(CLE_DERNIER)
+    cache.set(
+        _cle(numero),
+        {'type': type_evenement, 'donnees': donnees},
+        getattr(settings, 'EVENEMENTS_DUREE', 300),
+    )
+
+
+def publier(type_evenement, donnees=None):
+    """
+    Publie un événement après validation de la transaction. `donnees` peut
+    être une fonction, appelée alors au moment de la publication (données
+    lues après l'écriture complète, notes comprises par exemple).
+    """
+    def envoyer():
+        _publier(type_evenement, donnees() if callable(donnees) else (donnees or {}))
+
+    transaction.on_commit(envoyer)
+
+
+def dernier_numero():
+    return cache.get(CLE_DERNIER, 0)
+
+
+def lire_depuis(numero):
+    """Événements publiés après `numero` : ([(numero, événement), ...], dernier numéro)"""
+    dernier = dernier_numero()
+    if dernier <= numero:
+        return [], dernier
+    # Connexion trop en retard : les événements plus anciens ont expiré
+    premier = max(numero + 1, dernier - getattr(settings, 'EVENEMENTS_MAX_LOT', 200) + 1)
+    trouves = cache.get_many([_cle(n) for n in range(premier, dernier + 1)])
+    return [
+        (n, trouves[_cle(n)])
+        for n in range(premier, dernier + 1)
+        if _cle(n) in trouves
+    ], dernier
@@ -0,0 +1,369 @@
+# configurations/middleware.py
+"""Middlewares du projet"""
+import hashlib
+import math
+import mimetypes
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrous de fichiers POSIX
+    fcntl = None
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import compression, routage
+from .storage import SUFFIXES
+
+
+class StatiqueMiddleware:
+    """
+    Sert les fichiers collectés (STATIC_ROOT) en production, sans passer par
+    les vues ni les autres middlewares.
+
+    - variante .br / .gz précompressée si le client l'accepte ;
+    - noms hachés (présents dans le manifeste) : cache d'un an « immutable »,
+      le navigateur ne redemande plus rien lors des visites suivantes ;
+    - autres fichiers : cache court avec revalidation (If-Modified-Since).
+
+    Inactif en DEBUG (runserver sert les fichiers statiques lui-même).
+    """
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT or not os.path.isdir(settings.STATIC_ROOT):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefixe = settings.STATIC_URL
+        self.racine = str(settings.STATIC_ROOT)
+        self.haches = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefixe):
+            return self.get_response(request)
+
+        nom = request.path[len(self.prefixe):]
+        try:
+            chemin = safe_join(self.racine, nom)
+        except SuspiciousFileOperation:
+            return self.get_response(request)
+        if not os.path.isfile(chemin):
+            return self.get_response(request)
+
+        modification = os.stat(chemin).st_mtime
+        if not was_modified_since(request.headers.get('If-Modified-Since'), modification):
+            return HttpResponseNotModified()
+
+        fichier, encodage = chemin, None
+        variantes = [e for e in compression.encodages_disponibles() if os.path.isfile(chemin + SUFFIXES[e])]
+        accepte = compression.encodage_accepte(request)
+        if accepte in variantes:
+            fichier, encodage = chemin + SUFFIXES[accepte], accepte
+
+        content_type, _ = mimetypes.guess_type(chemin)
+        response = FileResponse(open(fichier, 'rb'), content_type=content_type or 'application/octet-stream')
+        response['Last-Modified'] = http_date(modification)
+        if encodage:
+            response['Content-Encoding'] = encodage
+        if variantes:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        if nom in self.haches:
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={getattr(settings, "STATIC_DUREE_CACHE", 3600)}'
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compression gzip / brotli des réponses dynamiques.
+
+    Les petites réponses, les flux et les contenus déjà compressés sont
+    laissés tels quels ; les réponses servies depuis le cache des vues
+    arrivent déjà compressées (variantes précalculées) et ne sont pas
+    retraitées. Protection BREACH : voir compression.py.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        # Variante précalculée servie par le cache des vues
+        if getattr(response, 'variante_precalculee', False):
+            patch_vary_headers(response, ('Accept-Encoding',))
+            compression.affaiblir_etag(response)
+            return response
+
+        if not compression.est_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        secret = compression.porte_jeton_csrf(request, response)
+        encodage = compression.encodage_accepte(request, secret=secret)
+        if encodage is None:
+            return response
+
+        contenu = compression.compresser(response.content, encodage)
+        # Compression inefficace (contenu déjà dense) : corps d'origine
+        if len(contenu) >= len(response.content):
+            return response
+        return compression.appliquer(response, contenu, encodage)
+
+
+class RoutageMiddleware:
+    """
+    Lectures des vues de REPLIQUE_VUES sur la réplique (voir routage.py).
+
+    Un utilisateur qui vient d'écrire reçoit un cookie REPLIQUE_COOKIE valable
+    REPLIQUE_DELAI secondes, qui le maintient sur la base principale. La
+    décision est indiquée dans l'en-tête X-Database-Alias (alias et raison).
+    Inactif sans alias de réplique dans DATABASES.
+    """
+
+    def __init__(self, get_response):
+        if routage.alias_replique() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.vues = set(getattr(settings, 'REPLIQUE_VUES', ()))
+        self.cookie = getattr(settings, 'REPLIQUE_COOKIE', 'base_principale')
+
+    def __call__(self, request):
+        with routage.contexte(routage.Routage()) as decision:
+            response = self.get_response(request)
+
+        if decision.replique and response.streaming and not response.is_async:
+            # Contenu produit après la vue : lectures toujours sur la réplique
+            response.streaming_content = routage.iterer(decision, response.streaming_content)
+        if decision.ecriture:
+            response.set_cookie(
+                self.cookie, '1', max_age=routage.delai(), httponly=True, samesite='Lax',
+            )
+        response['X-Database-Alias'] = f'{decision.alias}; raison={decision.raison}'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match.view_name in self.vues:
+            routage.activer(routage.routage_courant(), epingle=self.cookie in request.COOKIES)
+        return None
+
+
+def _liberer(places):
+    for fichier in places:
+        fichier.close()  # libère le verrou
+
+
+class _FluxAvecPlaces:
+    """
+    Contenu d'une réponse en flux qui libère les places à sa fin, ou à sa
+    fermeture par le serveur (client déconnecté, contenu jamais lu)
+    """
+
+    def __init__(self, contenu, places):
+        self.contenu = contenu
+        self.places = places
+
+    def __iter__(self):
+        try:
+            yield from self.contenu
+        finally:
+            self.close()
+
+    def close(self):
+        _liberer(self.places)
+        self.places = ()
+
+
+class _FluxAsyncAvecPlaces(_FluxAvecPlaces):
+
+    async def __aiter__(self):
+        try:
+            async for morceau in self.contenu:
+                yield morceau
+        finally:
+            self.close()
+
+
+# Budget commun à toutes les vues limitées : la capacité moins la réserve
+BUDGET_COMMUN = 'commun'
+
+
+class LimiteurConcurrenceMiddleware:
+    """
+    Limite le nombre d'exécutions simultanées des vues lourdes (statistiques,
+    listes non paginées, recherche), tous processus confondus.
+
+    Chaque vue de CONCURRENCE_VUES appartient à un budget de
+    CONCURRENCE_BUDGETS ; une requête doit obtenir une place dans son budget
+    et une dans le budget commun, plafonné à CONCURRENCE_CAPACITE moins
+    CONCURRENCE_RESERVE : les vues lourdes ne peuvent jamais occuper tous les
+    fils d'exécution, la réserve reste disponible pour les vues non limitées,
+    dont celles de CONCURRENCE_VUES_RESERVEES (soumission d'évaluation,
+    connexion). Faute de place après CONCURRENCE_ATTENTE secondes, la requête
+    reçoit une 503 avec Retry-After.
+
+    Les places sont des fichiers verrouillés (flock) : un processus arrêté
+    brutalement libère les siennes, ce que ne garantit pas un compteur dans
+    le cache.
+
+    À placer en dernier dans MIDDLEWARE : les contrôles d'accès et CSRF sont
+    faits avant d'attendre une place, qui est conservée jusqu'au rendu
+    complet de la réponse ; pour une réponse en flux (impression), jusqu'à
+    la fin ou la fermeture de son contenu.
+    """
+
+    def __init__(self, get_response):
+        vues = getattr(settings, 'CONCURRENCE_VUES', {})
+        if fcntl is None or not vues:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        reservees = set(getattr(settings, 'CONCURRENCE_VUES_RESERVEES', ()))
+        self.vues = {nom: budget for nom, budget in vues.items() if nom not in reservees}
+        self.budgets = dict(getattr(settings, 'CONCURRENCE_BUDGETS', {}))
+        self.budgets[BUDGET_COMMUN] = max(
+            1, getattr(settings, 'CONCURRENCE_CAPACITE', 8) - getattr(settings, 'CONCURRENCE_RESERVE', 2)
+        )
+        self.dossier = str(settings.CONCURRENCE_DOSSIER)
+        os.makedirs(self.dossier, exist_ok=True)
+        self.attente = getattr(settings, 'CONCURRENCE_ATTENTE', 2)
+        self.retry_after = getattr(settings, 'CONCURRENCE_RETRY_AFTER', 5)
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _liberer(getattr(request, '_places_concurrence', ()))
+            raise
+        places = getattr(request, '_places_concurrence', ())
+        if places and response.streaming:
+            # Contenu produit après la vue : places libérées à la fin du flux
+            flux = _FluxAsyncAvecPlaces if response.is_async else _FluxAvecPlaces
+            response.streaming_content = flux(response.streaming_content, places)
+        else:
+            _liberer(places)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = self.vues.get(request.resolver_match.view_name)
+        if budget is None:
+            return None
+
+        fin = time.monotonic() + self.attente
+        while True:
+            places = self._acquerir(budget)
+            if places is not None:
+                request._places_concurrence = places
+                return None
+            if time.monotonic() >= fin:
+                break
+            time.sleep(0.05)
+
+        response = HttpResponse(
+            "Le serveur est momentanément surchargé, veuillez réessayer dans quelques instants.",
+            status=503,
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(self.retry_after)
+        return response
+
+    def _acquerir(self, budget):
+        """Une place dans le budget de la vue puis dans le budget commun, ou None"""
+        place = self._place(budget)
+        if place is None:
+            return None
+        commune = self._place(BUDGET_COMMUN)
+        if commune is None:
+            place.close()
+            return None
+        return [place, commune]
+
+    def _place(self, budget):
+        for numero in range(self.budgets.get(budget, 1)):
+            fichier = open(os.path.join(self.dossier, f'{budget}.{numero}.lock'), 'a')
+            try:
+                fcntl.flock(fichier, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                fichier.close()
+                continue
+            return fichier
+        return None
+
+
+def consommer_jeton(cle, capacite, par_minute):
+    """
+    Seau à jetons conservé dans le cache : `capacite` jetons au plus, `par_minute`
+    rechargés par minute. Renvoie 0 si un jeton a été consommé, sinon le délai
+    en secondes avant le prochain jeton.
+
+    Lecture puis écriture sans verrou : deux processus simultanés peuvent
+    consommer le même jeton, l'écart reste d'une requête.
+    """
+    maintenant = time.time()
+    debit = par_minute / 60
+    jetons, horodatage = cache.get(cle, (capacite, maintenant))
+    jetons = min(capacite, jetons + (maintenant - horodatage) * debit)
+    if jetons < 1:
+        return math.ceil((1 - jetons) / debit)
+    # Conservé le temps de se remplir entièrement : au-delà, un seau plein équivaut à son absence
+    cache.set(cle, (jetons - 1, maintenant), math.ceil(capacite / debit) + 1)
+    return 0
+
+
+class LimiteurDebitMiddleware:
+    """
+    Limite le débit des vues de DEBIT_VUES (nom d'URL -> (capacité, jetons par
+    minute)) par seau à jetons, un par adresse IP et un par session, dans le
+    cache partagé.
+
+    L'utilisateur est identifié par son cookie de session, sans lire la
+    session ni charger l'utilisateur : le 429 est renvoyé avant toute requête
+    en base.
+    """
+
+    def __init__(self, get_response):
+        self.vues = getattr(settings, 'DEBIT_VUES', {})
+        if not self.vues:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.en_tete_ip = getattr(settings, 'DEBIT_EN_TETE_IP', None)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def _adresse(self, request):
+        if self.en_tete_ip and request.META.get(self.en_tete_ip):
+            # Mandataire inverse : adresse du client, la première de la liste
+            return request.META[self.en_tete_ip].split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR', '')
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        nom = request.resolver_match.view_name
+        limite = self.vues.get(nom)
+        if limite is None:
+            return None
+
+        identifiants = [f'ip:{self._adresse(request)}']
+        session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if session:
+            identifiants.append('session:' + hashlib.sha1(session.encode()).hexdigest())
+
+        for identifiant in identifiants:
+            attente = consommer_jeton(f'debit:{nom}:{identifiant}', *limite)
+            if attente:
+                response = HttpResponse(
+                    "Trop de requêtes, veuillez patienter quelques instants.",
+                    status=429,
+                    content_type='text/plain; charset=utf-8',
+                )
+                response['Retry-After'] = str(attente)
+                return response
+        return None
@@ -0,0 +1,68 @@
+# configurations/prechauffage.py
+"""
+Préchauffage d'un processus serveur, appelé par gunicorn.conf.py : sans lui,
+la première requête de chaque worker importe les vues, compile les gabarits,
+lit le manifeste des fichiers statiques et ouvre la connexion à la base,
+et dure dix fois plus longtemps que les suivantes.
+
+- prechauffer_code : sans accès à la base, possible dans le processus maître
+  avant le fork (preload_app) ; la mémoire est alors partagée entre workers ;
+- prechauffer_donnees : dans chaque worker, après le fork (caches propres
+  au processus). Les connexions Django sont propres à chaque fil : celle
+  ouverte ici, dans le fil principal du worker, n'est jamais réutilisée par
+  les fils de requêtes (gthread). Elle est donc refermée en fin de
+  préchauffage ; avec le pool PostgreSQL, elle y retourne et le pool reste
+  ouvert : c'est lui qui est préchauffé, pas une connexion.
+"""
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+
+from . import caching
+
+logger = logging.getLogger(__name__)
+
+
+def prechauffer_code():
+    """Vues importées, gabarits compilés, manifeste statique chargé"""
+    debut = time.monotonic()
+    # Importe l'urlconf, donc les vues et leurs dépendances
+    get_resolver().url_patterns
+    # Chargeur de gabarits en cache : gabarits compilés une fois par processus
+    for nom in getattr(settings, 'PRECHAUFFAGE_GABARITS', []):
+        try:
+            get_template(nom)
+        except TemplateDoesNotExist:
+            logger.warning("Préchauffage : gabarit introuvable %s", nom)
+    if settings.STATIC_BUNDLES:
+        # Instancie le stockage, qui lit le manifeste des noms hachés
+        getattr(staticfiles_storage, 'hashed_files', None)
+    return time.monotonic() - debut
+
+
+def prechauffer_donnees():
+    """Pools de connexions ouverts, types de contenu, versions des modèles et données de référence"""
+    debut = time.monotonic()
+    try:
+        for alias in connections:
+            connections[alias].ensure_connection()
+        # Cache par processus des ContentType (permissions, administration)
+        ContentType.objects.get_for_models(*apps.get_models())
+        # Versions des modèles lues dans le cache partagé (créées si absentes)
+        caching.versions(*apps.get_models())
+        caching.version_droits()
+        for chemin in getattr(settings, 'PRECHAUFFAGE_REFERENCES', []):
+            import_string(chemin)()
+    finally:
+        # Connexion du fil principal rendue au pool (ou fermée sans pool)
+        connections.close_all()
+    return time.monotonic() - debut
@@ -0,0 +1,150 @@
+# configurations/routage.py
+"""
+Lectures des pages de consultation (statistiques, listes, impression) et des
+commandes de reporting envoyées sur la réplique en lecture seule de la base
+(alias REPLIQUE_ALIAS de DATABASES) ; les écritures restent toujours sur
+'default'. Sans cet alias, rien ne change.
+
+- RouteurReplique (DATABASE_ROUTERS) : lectures sur la réplique dans un
+  contexte qui l'autorise, sur 'default' sinon ; une écriture dans ce
+  contexte ramène les lectures suivantes sur 'default' ;
+- RoutageMiddleware (configurations/middleware.py) : autorise la réplique
+  pour les vues de REPLIQUE_VUES et indique la décision dans l'en-tête
+  X-Database-Alias ; après une écriture, un cookie maintient l'utilisateur
+  sur la base principale REPLIQUE_DELAI secondes : il relit ses propres
+  saisies ;
+- sur_replique : décorateur ou gestionnaire de contexte pour les commandes
+  et tâches de reporting.
+
+Dans tous les cas, les lectures restent sur la base principale pendant
+REPLIQUE_DELAI secondes après une invalidation du cache (écriture d'un
+modèle versionné, voir caching.py) : une entrée de cache ou un ETag calculé
+sur une réplique en retard serait sinon servi jusqu'à l'écriture suivante.
+REPLIQUE_DELAI doit donc dépasser le retard de réplication habituel.
+
+Les requêtes SQL brutes (connection.cursor(), index de recherche) ne
+passent pas par le routeur et restent sur 'default'.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from . import caching
+
+# Raisons de la décision, reprises dans l'en-tête X-Database-Alias
+REPLIQUE = 'replique'
+PRINCIPALE = 'principale'
+EPINGLAGE = 'epinglage'
+ECRITURE_RECENTE = 'ecriture-recente'
+
+
+class Routage:
+    """Décision de routage d'une requête ou d'une commande"""
+
+    def __init__(self):
+        self.replique = False
+        self.raison = PRINCIPALE
+        # Écriture faite dans ce contexte : lectures suivantes sur 'default'
+        self.ecriture = False
+
+    @property
+    def alias(self):
+        return alias_replique() if self.replique else DEFAULT_DB_ALIAS
+
+
+_routage = ContextVar('routage', default=None)
+
+
+def alias_replique():
+    """Alias de la réplique s'il est configuré, sinon None"""
+    alias = getattr(settings, 'REPLIQUE_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def delai():
+    return getattr(settings, 'REPLIQUE_DELAI', 5)
+
+
+def _exclu(model):
+    return model._meta.app_label in getattr(settings, 'REPLIQUE_APPLICATIONS_EXCLUES', ())
+
+
+def routage_courant():
+    """Routage du contexte courant, ou None hors requête et hors sur_replique"""
+    return _routage.get()
+
+
+def activer(routage, epingle=False):
+    """Autorise la réplique pour ce routage, sauf épinglage ou écriture récente"""
+    if alias_replique() is None:
+        return routage
+    if epingle:
+        routage.raison = EPINGLAGE
+    elif time.time() - (caching.derniere_ecriture() or 0) < delai():
+        routage.raison = ECRITURE_RECENTE
+    else:
+        routage.replique, routage.raison = True, REPLIQUE
+    return routage
+
+
+@contextmanager
+def contexte(routage):
+    """Exécute le bloc avec ce routage"""
+    jeton = _routage.set(routage)
+    try:
+        yield routage
+    finally:
+        _routage.reset(jeton)
+
+
+@contextmanager
+def sur_replique():
+    """
+    Lectures du bloc sur la réplique : `with sur_replique():` ou
+    `@sur_replique()` (commandes, tâches de reporting)
+    """
+    with contexte(activer(Routage())) as routage:
+        yield routage
+
+
+def iterer(routage, contenu):
+    """Contenu d'une réponse en flux, produit avec le routage de la requête"""
+    iterateur = iter(contenu)
+    while True:
+        jeton = _routage.set(routage)
+        try:
+            morceau = next(iterateur)
+        except StopIteration:
+            return
+        finally:
+            _routage.reset(jeton)
+        yield morceau
+
+
+class RouteurReplique:
+    """Routeur de base de données (DATABASE_ROUTERS)"""
+
+    def db_for_read(self, model, **hints):
+        routage = _routage.get()
+        if routage is None or not routage.replique or routage.ecriture or _exclu(model):
+            return None
+        return alias_replique()
+
+    def db_for_write(self, model, **hints):
+        routage = _routage.get()
+        if routage is not None and not _exclu(model):
+            routage.ecriture = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données sur les deux bases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Schéma reçu par réplication
+        if db == alias_replique():
+            return False
+        return None
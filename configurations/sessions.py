@@ -0,0 +1,86 @@
+# configurations/sessions.py
+"""
+Backend de sessions : cache devant la base (cached_db), avec expiration
+glissante écrite au plus une fois par SESSION_SEUIL_ECRITURE secondes.
+
+Avec SESSION_SAVE_EVERY_REQUEST, chaque requête repousse l'expiration et
+donc réécrivait la ligne de django_session, ce qui sur SQLite sérialise les
+pages avec les enregistrements d'évaluations. Ici, une session dont seules
+les données d'expiration changeraient n'est réécrite que si la nouvelle
+échéance dépasse de plus du seuil celle déjà enregistrée : l'inactivité
+tolérée reste comprise entre SESSION_COOKIE_AGE moins le seuil et
+SESSION_COOKIE_AGE. Toute modification des données est écrite aussitôt.
+
+Les sessions expirées sont supprimées par la commande purge_sessions.
+"""
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.utils import timezone
+
+
+class SessionStore(cached_db.SessionStore):
+    # Entrées au format {'donnees', 'expiration'}, distinctes de celles de cached_db
+    cache_key_prefix = 'configurations.sessions'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Échéance enregistrée en base, connue après chargement ou écriture
+        self._expiration_enregistree = None
+
+    def _mettre_en_cache(self, donnees, expiration):
+        self._cache.set(
+            self.cache_key,
+            {'donnees': donnees, 'expiration': expiration},
+            self.get_expiry_age(expiry=expiration),
+        )
+
+    def load(self):
+        try:
+            entree = self._cache.get(self.cache_key)
+        except Exception:
+            # Clé refusée par le cache : session réinitialisée, comme cached_db
+            entree = None
+
+        if entree is not None:
+            self._expiration_enregistree = entree['expiration']
+            return entree['donnees']
+
+        s = self._get_session_from_db()
+        if not s:
+            return {}
+        donnees = self.decode(s.session_data)
+        self._expiration_enregistree = s.expire_date
+        self._mettre_en_cache(donnees, s.expire_date)
+        return donnees
+
+    def save(self, must_create=False):
+        if (
+            not must_create
+            and not self.modified
+            and self.session_key
+            and self._expiration_enregistree is not None
+        ):
+            ecart = self.get_expiry_date() - self._expiration_enregistree
+            if ecart < timedelta(seconds=getattr(settings, 'SESSION_SEUIL_ECRITURE', 600)):
+                return
+
+        # Écriture en base, puis cache avec l'échéance qui vient d'être enregistrée
+        DBStore.save(self, must_create)
+        self._expiration_enregistree = self.get_expiry_date()
+        self._mettre_en_cache(self._session, self._expiration_enregistree)
+
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def asave(self, must_create=False):
+        await sync_to_async(self.save)(must_create)
+
+    @classmethod
+    def clear_expired(cls):
+        """Supprime les sessions expirées de la base ; renvoie leur nombre"""
+        supprimees, _ = cls.get_model_class().objects.filter(expire_date__lt=timezone.now()).delete()
+        return supprimees
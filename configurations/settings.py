@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+
+from decouple import config
 from django.contrib.messages import constants as messages
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -38,18 +40,29 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'suivi_conducteurs',
-    'gestion_groupes'
+    'gestion_groupes',
+    'taches',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Fichiers statiques collectés (production uniquement)
+    'configurations.middleware.StatiqueMiddleware',
+    # Avant tout middleware qui lit ou modifie le corps de la réponse
+    'configurations.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Lectures des vues de consultation sur la réplique (process_view)
+    'configurations.middleware.RoutageMiddleware',
     #'django.contrib.auth.middleware.LoginRequiredMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Avant toute requête en base : 429 immédiat (process_view)
+    'configurations.middleware.LimiteurDebitMiddleware',
+    # En dernier : après les contrôles d'accès et CSRF (process_view)
+    'configurations.middleware.LimiteurConcurrenceMiddleware',
 ]
 
 ROOT_URLCONF = 'configurations.urls'
@@ -81,12 +94,92 @@ WSGI_APPLICATION = 'configurations.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Moteur choisi par variable d'environnement (ou fichier .env à la racine,
+# lu par python-decouple) : BASE_DE_DONNEES=sqlite (défaut) ou postgresql.
+BASE_DE_DONNEES = config('BASE_DE_DONNEES', default='sqlite')
+
+if BASE_DE_DONNEES == 'postgresql':
+    # PostgreSQL (psycopg 3) : POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD,
+    # POSTGRES_HOST, POSTGRES_PORT, POSTGRES_SSLMODE
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('POSTGRES_DB', default='suivi_conducteurs'),
+            'USER': config('POSTGRES_USER', default='suivi_conducteurs'),
+            'PASSWORD': config('POSTGRES_PASSWORD', default=''),
+            'HOST': config('POSTGRES_HOST', default='localhost'),
+            'PORT': config('POSTGRES_PORT', default='5432'),
+            'OPTIONS': {
+                'sslmode': config('POSTGRES_SSLMODE', default='prefer'),
+                'application_name': 'suivi_conducteurs',
+            },
+            # Curseurs côté serveur pour .iterator() (index de recherche,
+            # backfill, migrations) : lignes lues par paquets de chunk_size.
+            # À désactiver derrière pgbouncer en mode transaction.
+            'DISABLE_SERVER_SIDE_CURSORS': config('POSTGRES_PGBOUNCER', default=False, cast=bool),
+        }
+    }
+    if config('POSTGRES_POOL', default=True, cast=bool):
+        # Pool de connexions natif (psycopg_pool), un par processus : taille
+        # maximale de l'ordre du nombre de fils d'un worker (GUNICORN_THREADS),
+        # plus les connexions des comptages parallèles (AGREGATS_FILS par
+        # requête). Incompatible avec CONN_MAX_AGE, qui reste à 0.
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('POSTGRES_POOL_MIN', default=2, cast=int),
+            'max_size': config('POSTGRES_POOL_MAX', default=12, cast=int),
+            # Attente d'une connexion libre avant erreur, en secondes
+            'timeout': config('POSTGRES_POOL_ATTENTE', default=10, cast=int),
+        }
+    else:
+        # Connexions persistantes par fil, vérifiées avant réutilisation
+        DATABASES['default']['CONN_MAX_AGE'] = config('POSTGRES_CONN_MAX_AGE', default=60, cast=int)
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
     }
-}
+
+# Mode production de SQLite (variable d'environnement SQLITE_PRODUCTION=1) :
+# - journal WAL : les lectures ne sont plus bloquées par une écriture ;
+#   synchronous=NORMAL, sans risque de corruption en WAL ;
+# - fichier projeté en mémoire (mmap) et cache de pages de 64 Mo par connexion ;
+# - attente du verrou d'écriture jusqu'à `timeout` secondes plutôt qu'une
+#   erreur « database is locked » immédiate ;
+# - transactions ouvertes par BEGIN IMMEDIATE : le verrou d'écriture est pris
+#   au début de la transaction, où l'attente s'applique, et non au milieu,
+#   où un conflit échoue sans attendre.
+# Maintenance : commande maintenance_base (tâche périodique maintenance_base).
+SQLITE_PRODUCTION = BASE_DE_DONNEES == 'sqlite' and config('SQLITE_PRODUCTION', default=False, cast=bool)
+if SQLITE_PRODUCTION:
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': 20,
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA mmap_size=268435456',
+            'PRAGMA cache_size=-65536',
+            'PRAGMA temp_store=MEMORY',
+            # Effectif à la création de la base, ou après maintenance_base --complet
+            'PRAGMA auto_vacuum=INCREMENTAL',
+        ]),
+    }
+
+# Réplique PostgreSQL en lecture seule (POSTGRES_REPLIQUE_HOST) : lectures des
+# vues de consultation et des commandes de reporting (configurations/routage.py)
+if BASE_DE_DONNEES == 'postgresql' and config('POSTGRES_REPLIQUE_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': config('POSTGRES_REPLIQUE_HOST'),
+        'PORT': config('POSTGRES_REPLIQUE_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # Tests : même base que default
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['configurations.routage.RouteurReplique']
 
 
 # Password validation
@@ -125,6 +218,45 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Bundles par page : fichiers groupés et minifiés par build_assets dans
+# static/bundles/. En développement, les sources sont chargées séparément.
+BUNDLES_STATIQUES = {
+    'base': {
+        'css': ['css/uniquement_theme_clair.css'],
+        'js': ['js/utils.js', 'js/app.js'],
+    },
+    'connexion': {
+        'js': ['js/auth.js'],
+    },
+    'mot_de_passe': {
+        'css': ['css/auth.css'],
+    },
+    'evaluation': {
+        'js': ['js/validation.js'],
+    },
+    'dashboard': {
+        'js': ['js/dashboard.js'],
+    },
+}
+STATIC_BUNDLES = not DEBUG
+
+# Production (STATIC_BUNDLES) : noms hachés sur le contenu et variantes .gz /
+# .br, manifeste écrit par collectstatic / build_assets. Sinon (développement,
+# tests) : stockage standard, sans manifeste.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'configurations.storage.StockageStatique' if STATIC_BUNDLES
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+STATIC_DUREE_CACHE = 3600  # Fichiers statiques non hachés, en secondes
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -133,9 +265,180 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache partagé entre processus (versions des modèles, vues mises en cache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+# Durée de vie des vues mises en cache par profil de permissions, en secondes
+CACHE_VUES_DUREE = 300
+# Recalcul unique et service de la valeur périmée (configurations.caching.obtenir)
+CACHE_RAFRAICHISSEMENT_AVANCE = 0.2  # Recalcul pendant les 20 % finaux de la durée de vie
+CACHE_PERIME_DUREE = 3600  # Délai pendant lequel une entrée périmée peut encore être servie
+CACHE_VERROU_DUREE = 30  # Durée maximale d'un recalcul avant libération du verrou
+CACHE_ATTENTE_CALCUL = 2  # Attente maximale du calcul d'un autre processus (cache vide)
+
+# Compression des réponses (brotli si le module « brotli » est installé, gzip sinon)
+COMPRESSION_TAILLE_MIN = 1024  # En dessous, en octets, la réponse n'est pas compressée
+COMPRESSION_OCTETS_ALEATOIRES = 100  # Remplissage aléatoire maximal du gzip dynamique (attaque BREACH), en octets
+
+# Instantanés nocturnes des rapports (commande snapshot_rapports), un dossier par date
+RAPPORTS_DOSSIER = BASE_DIR / 'var' / 'rapports'
+RAPPORTS_CONSERVATION_JOURS = 90  # Instantanés plus anciens supprimés par la commande
+
+# Comptages du tableau de bord (configurations/agregats.py), sur PostgreSQL
+AGREGATS_FILS = 2  # Comptages lancés en parallèle par requête, chacun sur sa propre connexion
+
+# Dossiers d'impression des évaluations (suivi_conducteurs/impression.py)
+IMPRESSION_TAILLE_LOT = 25  # Fiches rendues ensemble (deux requêtes par lot)
+IMPRESSION_MAX_FICHES = 500  # Au-delà, la vue renvoie vers la commande imprimer_evaluations
+IMPRESSION_PROCESSUS = 4  # Pool de rendu de la commande
+IMPRESSION_DOSSIER = BASE_DIR / 'var' / 'impressions'
+
+# Préchauffage des workers gunicorn (configurations/prechauffage.py)
+PRECHAUFFAGE_GABARITS = [
+    'base.html',
+    'registration/login.html',
+    'suivi_conducteurs/dashboard.html',
+    'suivi_conducteurs/evaluation_list.html',
+    'suivi_conducteurs/evaluation_detail.html',
+    'suivi_conducteurs/create_evaluation.html',
+    'suivi_conducteurs/partials/criteres_form.html',
+    'suivi_conducteurs/conducteur_list.html',
+    'suivi_conducteurs/conducteur_detail.html',
+    'suivi_conducteurs/evaluations_a_planifier.html',
+    'suivi_conducteurs/statistiques.html',
+    'suivi_conducteurs/recherche.html',
+]
+# Données de référence chargées dans le cache partagé par chaque worker
+PRECHAUFFAGE_REFERENCES = [
+    'suivi_conducteurs.impression.references',
+]
+
+# Limitation de la concurrence des vues lourdes (LimiteurConcurrenceMiddleware)
+CONCURRENCE_DOSSIER = BASE_DIR / 'var' / 'concurrence'  # Fichiers de verrous partagés entre processus
+CONCURRENCE_CAPACITE = config('GUNICORN_CAPACITE', default=8, cast=int)  # Fils d'exécution du serveur (workers × threads, voir gunicorn.conf.py)
+CONCURRENCE_RESERVE = 2  # Fils jamais occupés par les vues lourdes
+CONCURRENCE_ATTENTE = 2  # Attente maximale d'une place, en secondes, avant la 503
+CONCURRENCE_RETRY_AFTER = 5  # En-tête Retry-After de la 503, en secondes
+CONCURRENCE_BUDGETS = {
+    'statistiques': 2,
+    'listes': 3,
+    'recherche': 2,
+}
+CONCURRENCE_VUES = {
+    'suivi_conducteurs:statistiques': 'statistiques',
+    'dashboard_stats': 'statistiques',
+    'gestion_groupes:api_stats': 'statistiques',
+    'suivi_conducteurs:evaluation_list': 'listes',
+    'suivi_conducteurs:conducteur_list': 'listes',
+    'suivi_conducteurs:societe_list': 'listes',
+    'suivi_conducteurs:site_list': 'listes',
+    'suivi_conducteurs:evaluations_a_planifier': 'listes',
+    'suivi_conducteurs:api_evaluations_a_planifier': 'listes',
+    'suivi_conducteurs:impression_evaluations': 'listes',
+    'gestion_groupes:historique': 'listes',
+    'suivi_conducteurs:recherche': 'recherche',
+    'suivi_conducteurs:api_recherche': 'recherche',
+}
+# Jamais limitées : elles disposent toujours de la réserve
+CONCURRENCE_VUES_RESERVEES = (
+    'suivi_conducteurs:submit_evaluation',
+    'login',
+)
+
+# Réplique en lecture seule (configurations/routage.py, RoutageMiddleware)
+REPLIQUE_ALIAS = 'replica'
+REPLIQUE_DELAI = 5  # Lectures sur la base principale après une écriture, en secondes (> retard de réplication)
+REPLIQUE_COOKIE = 'base_principale'
+REPLIQUE_APPLICATIONS_EXCLUES = ('sessions', 'taches')  # Toujours lues sur la base principale
+REPLIQUE_VUES = (
+    'suivi_conducteurs:statistiques',
+    'dashboard_stats',
+    'gestion_groupes:api_stats',
+    'suivi_conducteurs:evaluation_list',
+    'suivi_conducteurs:conducteur_list',
+    'suivi_conducteurs:societe_list',
+    'suivi_conducteurs:site_list',
+    'suivi_conducteurs:evaluations_a_planifier',
+    'suivi_conducteurs:api_evaluations_a_planifier',
+    'suivi_conducteurs:impression_evaluations',
+    'gestion_groupes:historique',
+)
+
+# Limitation du débit par IP et par session (LimiteurDebitMiddleware) :
+# nom d'URL -> (capacité du seau, jetons rechargés par minute)
+DEBIT_VUES = {
+    'suivi_conducteurs:validate_field_htmx': (30, 120),
+    'suivi_conducteurs:load_criteres_htmx': (20, 60),
+    'dashboard_stats': (10, 30),
+    'gestion_groupes:api_stats': (10, 30),
+    'suivi_conducteurs:flux_evenements': (5, 10),
+}
+DEBIT_EN_TETE_IP = None  # Derrière un mandataire inverse : 'HTTP_X_FORWARDED_FOR'
+
+# Flux Server-Sent Events du tableau de bord (suivi_conducteurs/flux.py)
+EVENEMENTS_DUREE = 300  # Conservation d'un événement dans le journal, en secondes
+EVENEMENTS_INTERVALLE = 1  # Lecture du journal par connexion ouverte, en secondes
+EVENEMENTS_DUREE_CONNEXION = 600  # Durée d'une connexion ASGI avant reconnexion, en secondes
+EVENEMENTS_RECONNEXION = 3000  # Délai de reconnexion du navigateur (ASGI), en millisecondes
+EVENEMENTS_RECONNEXION_WSGI = 30000  # Sous WSGI, la connexion est fermée après chaque lot
+
+# File des tâches de fond (application taches, commande run_worker)
+TACHES_PROCESSUS = 1  # Processus travailleurs lancés par run_worker
+TACHES_ATTENTE = 1  # Intervalle de lecture de la file vide, en secondes
+TACHES_DUREE_RESERVATION = 300  # Au-delà sans progression, la tâche est reprise par un autre travailleur
+TACHES_TENTATIVES_MAX = 3
+TACHES_DELAI_REESSAI = 30  # Délai avant le premier nouvel essai, doublé à chaque échec, en secondes
+TACHES_DELAI_ALERTE = 600  # Tâche en attente au-delà de ce délai : travailleur run_worker présumé arrêté, en secondes
+
+# Recalcul en masse des données dérivées (commande backfill)
+BACKFILL_PROCESSUS = 4
+BACKFILL_TAILLE = 1000  # Clés primaires par tranche
+BACKFILL_DOSSIER = BASE_DIR / 'var' / 'backfill'  # Points de reprise
+
+# Tâches périodiques (commande run_scheduler), expressions cron en heure locale
+TACHES_PERIODIQUES = {
+    'recalcul_echeances': {
+        'tache': 'suivi_conducteurs.tasks.recalculer_echeances',
+        'cron': '0 */6 * * *',
+    },
+    'instantane_rapports': {
+        'tache': 'suivi_conducteurs.tasks.ecrire_instantane_rapports',
+        'cron': '30 2 * * *',
+    },
+    'purge_sessions': {
+        'tache': 'suivi_conducteurs.tasks.purger_sessions',
+        'cron': '15 3 * * *',
+        'execution': 'local',
+    },
+    'maintenance_base': {
+        'tache': 'taches.tasks.maintenir_base',
+        'cron': '0 4 * * *',
+    },
+}
+PLANIFICATEUR_EXECUTION = 'file'  # 'file' : exécutées par run_worker ; 'local' : dans le planificateur
+PLANIFICATEUR_FILS = 2  # Tâches 'local' exécutées en parallèle
+PLANIFICATEUR_INTERVALLE = 10  # Vérification de l'échéance, en secondes
+
+# Historique des groupes (gestion_groupes/historique.py) : écrit à la
+# validation de la transaction plutôt que dans la transaction elle-même
+HISTORIQUE_APRES_VALIDATION = False
+
 # Configuration des sessions
+# Cache devant la base, expiration glissante réécrite au plus une fois par
+# SESSION_SEUIL_ECRITURE (voir configurations/sessions.py et purge_sessions)
+SESSION_ENGINE = 'configurations.sessions'
 SESSION_COOKIE_AGE = 3600 * 8  # 8 heures
 SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SEUIL_ECRITURE = 600  # En secondes
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 
 # Sécurité - Configuration de base
@@ -144,6 +447,8 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = 'DENY'
 
 # Configuration d'authentification
+# Permissions servies depuis un instantané en cache (voir gestion_groupes/backends.py)
+AUTHENTICATION_BACKENDS = ['gestion_groupes.backends.PermissionsInstantaneesBackend']
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/login/'
@@ -180,6 +485,16 @@ LOGIN_REQUIRED_IGNORE_VIEW_NAMES = [
 ]
 
 
+# File des évaluations à planifier
+ECHEANCES_MOIS_DEFAUT = 12  # Délai par défaut sans évaluation, en mois
+ECHEANCES_VALIDITE_HEURES = 24  # Au-delà, l'instantané est ignoré au profit de la requête directe
+
+# Recherche globale : ancienneté maximale des évaluations indexées, en jours
+RECHERCHE_EVALUATIONS_JOURS = 365
+# Listes filtrées par la recherche : nombre de résultats classés par pertinence en tête de liste
+RECHERCHE_LIMITE_RESULTATS = 200
+
+
 MESSAGE_TAGS = {
     messages.DEBUG: 'debug',
     messages.INFO: 'info',
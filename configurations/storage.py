@@ -0,0 +1,36 @@
+# configurations/storage.py
+"""
+Stockage des fichiers statiques de production : noms hachés sur le contenu
+(manifeste Django) et variantes .gz / .br écrites à côté de chaque fichier
+haché, servies telles quelles par StatiqueMiddleware.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from . import compression
+
+# Suffixe des variantes précompressées, par encodage
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+EXTENSIONS_COMPRESSIBLES = {'.css', '.js', '.svg', '.txt', '.json', '.webmanifest', '.ico'}
+
+
+class StockageStatique(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        taille_min = getattr(settings, 'COMPRESSION_TAILLE_MIN', 1024)
+        for nom_hache in set(self.hashed_files.values()):
+            chemin = Path(self.path(nom_hache))
+            if chemin.suffix not in EXTENSIONS_COMPRESSIBLES:
+                continue
+            contenu = chemin.read_bytes()
+            if len(contenu) < taille_min:
+                continue
+            for encodage, variante in compression.variantes(contenu).items():
+                Path(str(chemin) + SUFFIXES[encodage]).write_bytes(variante)
@@ -0,0 +1,547 @@
+import gzip
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+
+from suivi_conducteurs.models import Conducteur
+from taches.models import Tache
+from . import bases, caching, compression, prechauffage, routage
+from .middleware import (
+    LimiteurConcurrenceMiddleware, LimiteurDebitMiddleware, RoutageMiddleware, consommer_jeton,
+)
+from .routage import RouteurReplique
+from .sessions import SessionStore
+
+CACHE_TESTS = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-configurations'}}
+
+SITES = '/dashboard/sites/'
+CONDUCTEURS = '/dashboard/conducteurs/'
+
+
+# 'default' tient lieu de réplique : seules les décisions de routage sont vérifiées
+@override_settings(CACHES=CACHE_TESTS, REPLIQUE_ALIAS='default', REPLIQUE_DELAI=5)
+class RouteurTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.routeur = RouteurReplique()
+
+    def test_hors_contexte(self):
+        self.assertIsNone(self.routeur.db_for_read(Conducteur))
+        self.assertEqual(self.routeur.db_for_write(Conducteur), 'default')
+
+    def test_sur_replique(self):
+        with routage.sur_replique() as decision:
+            self.assertEqual(decision.raison, routage.REPLIQUE)
+            self.assertEqual(self.routeur.db_for_read(Conducteur), 'default')
+            # REPLIQUE_APPLICATIONS_EXCLUES
+            self.assertIsNone(self.routeur.db_for_read(Tache))
+        self.assertIsNone(self.routeur.db_for_read(Conducteur))
+
+    def test_ecriture_ramene_les_lectures_sur_la_principale(self):
+        with routage.sur_replique() as decision:
+            self.assertEqual(self.routeur.db_for_write(Conducteur), 'default')
+            self.assertTrue(decision.ecriture)
+            self.assertIsNone(self.routeur.db_for_read(Conducteur))
+
+    def test_ecriture_recente(self):
+        caching.incrementer_versions('suivi_conducteurs.conducteur')
+        with routage.sur_replique() as decision:
+            self.assertFalse(decision.replique)
+            self.assertEqual(decision.raison, routage.ECRITURE_RECENTE)
+            self.assertIsNone(self.routeur.db_for_read(Conducteur))
+
+    @override_settings(REPLIQUE_ALIAS='absente')
+    def test_sans_replique(self):
+        with routage.sur_replique() as decision:
+            self.assertEqual(
+                (decision.replique, decision.raison, decision.alias), (False, routage.PRINCIPALE, 'default'),
+            )
+            self.assertIsNone(self.routeur.db_for_read(Conducteur))
+
+    def test_pas_de_migration_sur_la_replique(self):
+        self.assertIs(self.routeur.allow_migrate('default', 'suivi_conducteurs'), False)
+        with self.settings(REPLIQUE_ALIAS='absente'):
+            self.assertIsNone(self.routeur.allow_migrate('default', 'suivi_conducteurs'))
+
+    def test_contenu_en_flux_produit_avec_le_routage(self):
+        decision = routage.activer(routage.Routage())
+        contenu = (routage.routage_courant() for _ in range(2))
+        self.assertEqual(list(routage.iterer(decision, contenu)), [decision, decision])
+        self.assertIsNone(routage.routage_courant())
+
+
+@override_settings(
+    CACHES=CACHE_TESTS, REPLIQUE_ALIAS='default', REPLIQUE_DELAI=5,
+    REPLIQUE_COOKIE='base_principale', REPLIQUE_VUES=('suivi_conducteurs:site_list',),
+)
+class RoutageMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def traiter(self, chemin, ecrire=False, cookies=None):
+        def vue(request):
+            middleware.process_view(request, None, (), {})
+            if ecrire:
+                RouteurReplique().db_for_write(Conducteur)
+            return HttpResponse('ok')
+
+        middleware = RoutageMiddleware(vue)
+        request = RequestFactory().get(chemin)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(chemin)
+        return middleware(request)
+
+    def test_vue_de_consultation(self):
+        self.assertEqual(self.traiter(SITES)['X-Database-Alias'], 'default; raison=replique')
+
+    def test_autre_vue(self):
+        self.assertEqual(self.traiter(CONDUCTEURS)['X-Database-Alias'], 'default; raison=principale')
+
+    def test_ecriture_pose_le_cookie(self):
+        response = self.traiter(SITES, ecrire=True)
+        self.assertEqual(response.cookies['base_principale']['max-age'], 5)
+
+    def test_epinglage(self):
+        response = self.traiter(SITES, cookies={'base_principale': '1'})
+        self.assertEqual(response['X-Database-Alias'], 'default; raison=epinglage')
+
+    @override_settings(REPLIQUE_ALIAS='absente')
+    def test_inactif_sans_replique(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            RoutageMiddleware(lambda request: HttpResponse())
+
+
+@override_settings(CACHES=CACHE_TESTS, CACHE_ATTENTE_CALCUL=0.1)
+class ObtenirTests(SimpleTestCase):
+    """Lecture en cache single-flight avec service de la valeur périmée"""
+
+    MODELES = ('suivi_conducteurs.site',)
+
+    def setUp(self):
+        cache.clear()
+        self.calculs = 0
+
+    def calculer(self):
+        self.calculs += 1
+        return self.calculs
+
+    def obtenir(self):
+        return caching.obtenir('essai', self.calculer, modeles=self.MODELES)
+
+    def test_calcul_unique(self):
+        self.assertEqual(self.obtenir(), 1)
+        self.assertEqual(self.obtenir(), 1)
+
+    def test_version_modifiee(self):
+        self.obtenir()
+        caching.incrementer_versions(*self.MODELES)
+        self.assertEqual(self.obtenir(), 2)
+
+    def test_valeur_perimee_pendant_le_recalcul(self):
+        self.obtenir()
+        caching.incrementer_versions(*self.MODELES)
+        # Recalcul en cours dans un autre processus
+        cache.add(caching._cle_verrou('essai'), 1)
+        self.assertEqual(self.obtenir(), 1)
+        self.assertEqual(self.calculs, 1)
+
+    def test_sans_entree_attente_puis_calcul(self):
+        cache.add(caching._cle_verrou('essai'), 1)
+        self.assertEqual(self.obtenir(), 1)
+
+    def test_none_non_mis_en_cache(self):
+        caching.obtenir('vide', lambda: None)
+        self.assertEqual(caching.obtenir('vide', lambda: 'calculé'), 'calculé')
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class ConditionnelTests(SimpleTestCase):
+    """ETag calculé sur les versions des modèles, 304 sans exécuter la vue"""
+
+    def setUp(self):
+        cache.clear()
+        self.appels = 0
+
+        @caching.conditionnel('suivi_conducteurs.site', par_utilisateur=False)
+        def vue(request):
+            self.appels += 1
+            valeur = caching.obtenir(
+                'vue_essai', lambda: f'appel {self.appels}', modeles=['suivi_conducteurs.site'],
+            )
+            return HttpResponse(valeur)
+
+        self.vue = vue
+
+    def get(self, etag=None):
+        en_tetes = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = RequestFactory().get(SITES, **en_tetes)
+        request.user = AnonymousUser()
+        return self.vue(request)
+
+    def test_304_sans_executer_la_vue(self):
+        response = self.get()
+        self.assertTrue(response.has_header('ETag'))
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertEqual(self.get(response['ETag']).status_code, 304)
+        self.assertEqual(self.appels, 1)
+
+    def test_nouvel_etag_apres_ecriture(self):
+        etag = self.get()['ETag']
+        caching.incrementer_versions('suivi_conducteurs.site')
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_valeur_perimee_sans_etag(self):
+        etag = self.get()['ETag']
+        caching.incrementer_versions('suivi_conducteurs.site')
+        cache.add(caching._cle_verrou('vue_essai'), 1)
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'appel 1')
+        # Contenu ancien : pas d'ETag des versions courantes
+        self.assertFalse(response.has_header('ETag'))
+
+        cache.delete(caching._cle_verrou('vue_essai'))
+        response = self.get()
+        self.assertEqual(response.content, b'appel 3')
+        self.assertTrue(response.has_header('ETag'))
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class CacheParPermissionsTests(SimpleTestCase):
+    """Entrée partagée entre utilisateurs de mêmes droits"""
+
+    def setUp(self):
+        cache.clear()
+        self.appels = 0
+
+        @caching.cache_par_permissions('suivi_conducteurs.site')
+        def vue(request):
+            self.appels += 1
+            return HttpResponse(f'appel {self.appels}', content_type='text/plain')
+
+        self.vue = vue
+
+    def requete(self, user, methode='get', chemin=SITES):
+        request = getattr(RequestFactory(), methode)(chemin)
+        request.user = user
+        return self.vue(request)
+
+    def test_partage_entre_memes_droits(self):
+        premier = User(username='a', is_superuser=True)
+        second = User(username='b', is_superuser=True)
+        self.assertEqual(self.requete(premier).content, b'appel 1')
+        self.assertEqual(self.requete(second).content, b'appel 1')
+        # Droits différents : autre entrée
+        self.assertEqual(self.requete(AnonymousUser()).content, b'appel 2')
+
+    def test_parametres_normalises(self):
+        user = User(username='a', is_superuser=True)
+        self.requete(user, chemin=SITES + '?b=2&a=1&vide=')
+        self.assertEqual(self.requete(user, chemin=SITES + '?a=1&b=2').content, b'appel 1')
+        self.assertEqual(self.requete(user, chemin=SITES + '?a=2').content, b'appel 2')
+
+    def test_invalidation(self):
+        user = User(username='a', is_superuser=True)
+        self.requete(user)
+        caching.incrementer_versions('suivi_conducteurs.site')
+        self.assertEqual(self.requete(user).content, b'appel 2')
+
+    def test_post_non_mis_en_cache(self):
+        user = User(username='a', is_superuser=True)
+        self.requete(user, 'post')
+        self.assertEqual(self.requete(user, 'post').content, b'appel 2')
+
+
+class CompressionTests(SimpleTestCase):
+
+    def test_remplissage_aleatoire_du_gzip_dynamique(self):
+        contenu = b'<html>' + b'x' * 2000 + b'</html>'
+        compresses = {compression.compresser(contenu, 'gzip') for _ in range(10)}
+        self.assertGreater(len({len(c) for c in compresses}), 1)
+        for compresse in compresses:
+            self.assertEqual(gzip.decompress(compresse), contenu)
+
+    def test_variante_precalculee_stable(self):
+        contenu = b'x' * 2000
+        self.assertEqual(
+            compression.compresser(contenu, 'gzip', precalcul=True),
+            compression.compresser(contenu, 'gzip', precalcul=True),
+        )
+
+    def test_gzip_seul_pour_une_page_avec_secret(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(compression.encodage_accepte(request, secret=True), 'gzip')
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br')
+        self.assertIsNone(compression.encodage_accepte(request, secret=True))
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class CompressionPageAvecJetonTests(TestCase):
+    """Page de connexion : jeton CSRF dans le corps, jamais de brotli"""
+
+    def setUp(self):
+        cache.clear()
+        # brotli, dépendance optionnelle, supposé installé
+        self.enterContext(mock.patch.object(compression, 'encodages_disponibles', return_value=('br', 'gzip')))
+        self.compresser = self.enterContext(
+            mock.patch.object(compression, 'compresser', wraps=compression.compresser)
+        )
+
+    def test_jeton_detecte_apres_csrf_view_middleware(self):
+        secrets = []
+        porte_jeton_csrf = compression.porte_jeton_csrf
+
+        def espion(request, response):
+            secrets.append(porte_jeton_csrf(request, response))
+            return secrets[-1]
+
+        with mock.patch.object(compression, 'porte_jeton_csrf', espion):
+            response = self.client.get('/login/', HTTP_ACCEPT_ENCODING='br')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertIn('csrftoken', response.cookies)
+        self.assertEqual(secrets, [True])
+        # Ni brotli, ni repli sur gzip non accepté : corps non compressé
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.compresser.assert_not_called()
+
+    def test_gzip_avec_remplissage(self):
+        response = self.client.get('/login/', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.compresser.assert_called_once()
+        self.assertEqual(self.compresser.call_args.args[1], 'gzip')
+
+
+@override_settings(
+    CONCURRENCE_VUES={'lourde': 'statistiques', 'liste': 'listes', 'reservee': 'statistiques'},
+    CONCURRENCE_VUES_RESERVEES=('reservee',),
+    CONCURRENCE_BUDGETS={'statistiques': 1, 'listes': 2},
+    CONCURRENCE_CAPACITE=4, CONCURRENCE_RESERVE=2, CONCURRENCE_ATTENTE=0, CONCURRENCE_RETRY_AFTER=7,
+)
+class LimiteurConcurrenceTests(SimpleTestCase):
+    """Places par budget et budget commun, partagées entre processus par des fichiers verrouillés"""
+
+    def setUp(self):
+        dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dossier)
+        self.enterContext(override_settings(CONCURRENCE_DOSSIER=dossier))
+        self.middleware = LimiteurConcurrenceMiddleware(lambda request: HttpResponse('ok'))
+
+    def requete(self, vue):
+        """Place demandée pour la vue ; la requête la conserve jusqu'à sa libération"""
+        request = RequestFactory().get('/')
+        request.resolver_match = SimpleNamespace(view_name=vue)
+        self.addCleanup(self.liberer, request)
+        return request, self.middleware.process_view(request, None, (), {})
+
+    def liberer(self, request):
+        for fichier in getattr(request, '_places_concurrence', ()):
+            fichier.close()
+
+    def test_budget_plein(self):
+        premiere, refus = self.requete('lourde')
+        self.assertIsNone(refus)
+        _, response = self.requete('lourde')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        # Places libérées une fois la réponse rendue
+        self.liberer(premiere)
+        self.assertIsNone(self.requete('lourde')[1])
+
+    def test_budget_commun(self):
+        self.assertIsNone(self.requete('lourde')[1])
+        self.assertIsNone(self.requete('liste')[1])
+        # Place libre dans « listes », mais capacité moins réserve atteinte
+        self.assertEqual(self.requete('liste')[1].status_code, 503)
+
+    def test_vues_non_limitees(self):
+        self.requete('lourde')
+        for vue in ('reservee', 'autre'):
+            request, response = self.requete(vue)
+            self.assertIsNone(response)
+            self.assertFalse(hasattr(request, '_places_concurrence'))
+
+    def test_places_rendues_apres_la_reponse(self):
+        request = RequestFactory().get('/')
+        request.resolver_match = SimpleNamespace(view_name='lourde')
+
+        def vue(request):
+            return self.middleware.process_view(request, None, (), {}) or HttpResponse('ok')
+
+        self.middleware.get_response = vue
+        self.assertEqual(self.middleware(request).status_code, 200)
+        self.assertIsNone(self.requete('lourde')[1])
+
+    def test_flux_conserve_ses_places(self):
+        request = RequestFactory().get('/')
+        request.resolver_match = SimpleNamespace(view_name='lourde')
+
+        def vue(request):
+            self.middleware.process_view(request, None, (), {})
+            return StreamingHttpResponse(iter(['a', 'b']))
+
+        self.middleware.get_response = vue
+        response = self.middleware(request)
+        # Contenu produit après la vue : places conservées jusqu'à la fin du flux
+        self.assertEqual(self.requete('lourde')[1].status_code, 503)
+        self.assertEqual(b''.join(response.streaming_content), b'ab')
+        self.assertIsNone(self.requete('lourde')[1])
+
+    def test_flux_ferme_sans_etre_lu(self):
+        request = RequestFactory().get('/')
+        request.resolver_match = SimpleNamespace(view_name='lourde')
+
+        def vue(request):
+            self.middleware.process_view(request, None, (), {})
+            return StreamingHttpResponse(iter(['a']))
+
+        self.middleware.get_response = vue
+        self.middleware(request).close()
+        self.assertIsNone(self.requete('lourde')[1])
+
+
+@override_settings(CACHES=CACHE_TESTS, DEBIT_VUES={'htmx': (2, 6)})
+class LimiteurDebitTests(SimpleTestCase):
+    """Seau à jetons par adresse IP et par session"""
+
+    def setUp(self):
+        cache.clear()
+        self.middleware = LimiteurDebitMiddleware(lambda request: HttpResponse('ok'))
+
+    def requete(self, adresse='10.0.0.1', session=None, vue='htmx'):
+        request = RequestFactory().get('/', REMOTE_ADDR=adresse)
+        if session:
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = session
+        request.resolver_match = SimpleNamespace(view_name=vue)
+        return self.middleware.process_view(request, None, (), {})
+
+    def test_consommer_jeton(self):
+        self.assertEqual(consommer_jeton('essai', 2, 6), 0)
+        self.assertEqual(consommer_jeton('essai', 2, 6), 0)
+        # Un jeton toutes les 10 secondes
+        self.assertEqual(consommer_jeton('essai', 2, 6), 10)
+
+    def test_429_par_adresse(self):
+        self.assertIsNone(self.requete())
+        self.assertIsNone(self.requete())
+        response = self.requete()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '10')
+        self.assertIsNone(self.requete(adresse='10.0.0.2'))
+        self.assertIsNone(self.requete(vue='autre'))
+
+    def test_429_par_session(self):
+        self.requete(adresse='10.0.0.1', session='abc')
+        self.requete(adresse='10.0.0.2', session='abc')
+        self.assertEqual(self.requete(adresse='10.0.0.3', session='abc').status_code, 429)
+        self.assertIsNone(self.requete(adresse='10.0.0.3', session='def'))
+
+
+@override_settings(CACHES=CACHE_TESTS, SESSION_COOKIE_AGE=3600, SESSION_SEUIL_ECRITURE=600)
+class SessionsTests(TestCase):
+    """Sessions en cache devant la base, échéance glissante écrite au-delà du seuil"""
+
+    def setUp(self):
+        cache.clear()
+        session = SessionStore()
+        session['a'] = 1
+        session.save()
+        self.cle = session.session_key
+
+    def expiration(self):
+        return Session.objects.get(pk=self.cle).expire_date
+
+    def plus_tard(self, minutes):
+        return mock.patch(
+            'django.contrib.sessions.backends.base.timezone.now',
+            return_value=timezone.now() + timedelta(minutes=minutes),
+        )
+
+    def test_lecture_depuis_le_cache(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(SessionStore(self.cle)['a'], 1)
+
+    def test_echeance_sous_le_seuil_non_ecrite(self):
+        session = SessionStore(self.cle)
+        self.assertEqual(session['a'], 1)
+        with self.plus_tard(5), self.assertNumQueries(0):
+            session.save()
+
+    def test_echeance_au_dela_du_seuil(self):
+        avant = self.expiration()
+        session = SessionStore(self.cle)
+        self.assertEqual(session['a'], 1)
+        with self.plus_tard(15):
+            session.save()
+        self.assertGreater(self.expiration() - avant, timedelta(minutes=14))
+
+    def test_donnees_modifiees_ecrites(self):
+        session = SessionStore(self.cle)
+        session['b'] = 2
+        session.save()
+        cache.clear()
+        self.assertEqual(SessionStore(self.cle)['b'], 2)
+
+    def test_purge_sessions(self):
+        Session.objects.filter(pk=self.cle).update(expire_date=timezone.now() - timedelta(seconds=1))
+        sortie = StringIO()
+        call_command('purge_sessions', stdout=sortie)
+        self.assertIn('1 session(s) expirée(s) supprimée(s)', sortie.getvalue())
+        self.assertFalse(Session.objects.exists())
+
+
+def reference_en_echec():
+    raise RuntimeError('référence indisponible')
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class PrechauffageTests(TestCase):
+    """Préchauffage des workers : connexion du fil principal rendue en fin de préchauffage"""
+
+    def setUp(self):
+        self.close_all = self.enterContext(mock.patch.object(prechauffage.connections, 'close_all'))
+
+    @override_settings(PRECHAUFFAGE_GABARITS=['base.html', 'absent.html'])
+    def test_code(self):
+        with self.assertLogs('configurations.prechauffage', 'WARNING') as journal:
+            prechauffage.prechauffer_code()
+        self.assertIn('absent.html', journal.output[0])
+
+    def test_connexion_rendue(self):
+        prechauffage.prechauffer_donnees()
+        self.close_all.assert_called_once_with()
+
+    @override_settings(PRECHAUFFAGE_REFERENCES=['configurations.tests.reference_en_echec'])
+    def test_connexion_rendue_apres_une_erreur(self):
+        with self.assertRaises(RuntimeError):
+            prechauffage.prechauffer_donnees()
+        self.close_all.assert_called_once_with()
+
+
+class FermerAvantForkTests(SimpleTestCase):
+
+    def test_connexions_et_pools_fermes(self):
+        avec_pool, sans_pool = mock.Mock(), mock.Mock(spec=['close'])
+        with mock.patch.object(bases, 'connections') as connexions:
+            connexions.all.return_value = [avec_pool, sans_pool]
+            bases.fermer_avant_fork()
+        connexions.close_all.assert_called_once_with()
+        connexions.all.assert_called_once_with(initialized_only=True)
+        avec_pool.close_pool.assert_called_once_with()
@@ -9,7 +9,10 @@ from django.utils import timezone
 from django.http import JsonResponse
 from datetime import timedelta
 
+from configurations import agregats, caching
+from configurations.caching import conditionnel
 from .models import ProfilUtilisateur, HistoriqueGroupes
+from .backends import calculer_instantane, instantane_droits
 
 
 def user_login(request):
@@ -24,6 +27,10 @@ def user_login(request):
             if user is not None:
                 if user.is_active:
                     login(request, user)
+
+                    # Instantané des permissions : servi à has_perm et perms
+                    # pendant toute la session, jusqu'au prochain changement de droits
+                    calculer_instantane(user)
                     
                     # Créer le profil s'il n'existe pas
                     from .models import ProfilUtilisateur
@@ -136,8 +143,11 @@ def change_password(request):
     return render(request, 'registration/change_password.html', context)
 
 
+@conditionnel(
+    'suivi_conducteurs.Evaluation', 'suivi_conducteurs.TypologieEvaluation', 'suivi_conducteurs.Conducteur'
+)
 def dashboard_stats(request):
-    """API pour les statistiques du dashboard utilisateur"""
+    """API pour les statistiques du dashboard utilisateur (comptages concurrents sur PostgreSQL)"""
     # Stats pour l'utilisateur connecté
     stats = {}
     
@@ -147,35 +157,48 @@ def dashboard_stats(request):
         
         # Évaluations ce mois-ci
         current_month = timezone.now().replace(day=1)
-        evaluations_ce_mois = Evaluation.objects.filter(
-            date_evaluation__gte=current_month
-        ).count()
         
-        # Évaluations par type
-        evaluations_par_type = {}
-        for type_eval in TypologieEvaluation.objects.all():
-            count = Evaluation.objects.filter(type_evaluation=type_eval).count()
-            evaluations_par_type[type_eval.nom] = count
+        def calculer_evaluations():
+            types = list(TypologieEvaluation.objects.all())
+            requetes = {
+                'ce_mois': Evaluation.objects.filter(date_evaluation__gte=current_month),
+                'total': Evaluation.objects.all(),
+            }
+            # Évaluations par type
+            for type_eval in types:
+                requetes[f'type:{type_eval.pk}'] = Evaluation.objects.filter(type_evaluation=type_eval)
+            comptes = agregats.compter(requetes)
+            return {
+                'ce_mois': comptes['ce_mois'],
+                'total': comptes['total'],
+                'par_type': {type_eval.nom: comptes[f'type:{type_eval.pk}'] for type_eval in types},
+            }
         
-        stats['evaluations'] = {
-            'ce_mois': evaluations_ce_mois,
-            'total': Evaluation.objects.count(),
-            'par_type': evaluations_par_type,
-        }
+        stats['evaluations'] = caching.obtenir(
+            f'stats_dashboard:evaluations:{current_month.date().isoformat()}',
+            calculer_evaluations,
+            modeles=(Evaluation, TypologieEvaluation),
+        )
     
     # Si l'utilisateur peut voir les conducteurs
     if request.user.has_perm('suivi_conducteurs.view_conducteur'):
         from suivi_conducteurs.models import Conducteur
-        stats['conducteurs'] = {
-            'total': Conducteur.objects.count(),
-            'actifs': Conducteur.objects.filter(salactif=True).count(),
-        }
+        
+        def calculer_conducteurs():
+            return agregats.compter({
+                'total': Conducteur.objects.all(),
+                'actifs': Conducteur.objects.filter(salactif=True),
+            })
+        
+        stats['conducteurs'] = caching.obtenir(
+            'stats_dashboard:conducteurs', calculer_conducteurs, modeles=(Conducteur,)
+        )
     
-    # Stats des groupes utilisateur
+    # Stats des groupes utilisateur (lues dans l'instantané des droits)
+    droits = instantane_droits(request.user)
     stats['user'] = {
-        'groupes': [g.name for g in request.user.groups.all()],
-        'permissions_count': request.user.user_permissions.count() + 
-                           sum(g.permissions.count() for g in request.user.groups.all()),
+        'groupes': droits['groupes'],
+        'permissions_count': len(droits['permissions']),
     }
     
     return JsonResponse(stats)
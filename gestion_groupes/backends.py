@@ -0,0 +1,93 @@
+# gestion_groupes/backends.py
+"""
+Backend d'authentification servant les permissions depuis un instantané.
+
+L'ensemble des permissions effectives d'un utilisateur (permissions directes
+et permissions de ses groupes) et la liste de ses groupes sont calculés une
+fois, à la connexion ou au premier besoin, puis conservés dans le cache sous
+une clé qui contient la version des droits (voir configurations/caching.py).
+Un changement de groupes ou de permissions incrémente cette version : les
+instantanés existants sont alors ignorés et recalculés à la demande.
+
+L'empreinte des droits d'un utilisateur (empreinte_droits) sert de clé aux
+fragments {% cache %} de la barre de navigation : elle ne change que si ce
+que la barre affiche pour lui a changé, et non à chaque modification de
+droits d'un autre utilisateur.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from configurations import caching
+
+
+def _cle(user, version):
+    return f'droits:{user.pk}:{version}'
+
+
+def calculer_instantane(user):
+    """Calcule et met en cache l'instantané des droits de l'utilisateur"""
+    version = caching.version_droits()
+    backend = ModelBackend()
+    permissions = backend.get_user_permissions(user) | backend.get_group_permissions(user)
+    groupes = list(user.groups.order_by('name').values_list('name', 'groupe_etendu__couleur'))
+    instantane = {
+        'version': version,
+        'permissions': sorted(permissions),
+        'groupes': [nom for nom, _ in groupes],
+        # Badges de la barre de navigation
+        'couleurs': [couleur for _, couleur in groupes],
+    }
+    cache.set(_cle(user, version), instantane, settings.SESSION_COOKIE_AGE)
+    user._instantane_droits = instantane
+    return instantane
+
+
+def instantane_droits(user):
+    """
+    Instantané des droits : {'version', 'permissions', 'groupes', 'couleurs'}.
+    Mémorisé sur l'objet utilisateur pour la durée de la requête.
+    """
+    if not user.is_authenticated:
+        return {'version': None, 'permissions': [], 'groupes': []}
+    instantane = getattr(user, '_instantane_droits', None)
+    if instantane is None:
+        instantane = cache.get(_cle(user, caching.version_droits()))
+        if instantane is None:
+            return calculer_instantane(user)
+        user._instantane_droits = instantane
+    return instantane
+
+
+def empreinte_droits(user):
+    """
+    Empreinte de ce que la barre de navigation affiche pour l'utilisateur :
+    permissions, groupes et leurs couleurs, nom, e-mail, statut staff /
+    superuser. Lue dans l'instantané, sans requête s'il est en cache.
+    """
+    if not user.is_authenticated:
+        return 'anonyme'
+    instantane = instantane_droits(user)
+    elements = [
+        instantane['permissions'],
+        instantane['groupes'],
+        instantane.get('couleurs'),
+        user.get_full_name(),
+        user.email,
+        user.is_staff,
+        user.is_superuser,
+    ]
+    return hashlib.sha1(repr(elements).encode()).hexdigest()[:16]
+
+
+class PermissionsInstantaneesBackend(ModelBackend):
+    """ModelBackend dont has_perm, perms et get_all_permissions lisent l'instantané"""
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            user_obj._perm_cache = set(instantane_droits(user_obj)['permissions'])
+        return user_obj._perm_cache
@@ -0,0 +1,55 @@
+# gestion_groupes/historique.py
+"""
+Écriture groupée de l'historique des groupes (HistoriqueGroupes).
+
+Les affectations d'utilisateurs et de permissions déclenchent un signal
+m2m_changed par opération, quel que soit le nombre d'objets concernés :
+les entrées d'une opération sont enregistrées ensemble par bulk_create,
+les utilisateurs et permissions étant lus en une requête (in_bulk).
+
+Avec HISTORIQUE_APRES_VALIDATION, l'écriture est différée à la validation
+de la transaction (rien n'est écrit en cas d'annulation) ; sinon elle a
+lieu aussitôt, dans la transaction de la modification.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from configurations import caching, evenements
+
+# Entrées d'une même opération poussées au flux du tableau de bord : au-delà,
+# seules les dernières le sont (l'historique complet reste en base)
+MAX_EVENEMENTS = 20
+
+
+def donnees_evenement(entree, nom_groupe):
+    """Contenu de l'événement « historique » du flux du tableau de bord"""
+    return {
+        'id': entree.pk,
+        'groupe': nom_groupe,
+        'action': entree.action,
+        'libelle': entree.get_action_display(),
+        'details': entree.details,
+        'date': entree.date_action.isoformat(),
+    }
+
+
+def _ecrire(entrees):
+    from .models import HistoriqueGroupes
+
+    creees = HistoriqueGroupes.objects.bulk_create(entrees)
+    # bulk_create n'émet pas post_save : version du modèle et flux mis à jour ici
+    caching.modele_modifie(HistoriqueGroupes)
+    for entree in creees[-MAX_EVENEMENTS:]:
+        if entree.pk is not None:
+            evenements.publier('historique', donnees_evenement(entree, entree.group.name))
+
+
+def enregistrer(entrees):
+    """Enregistre des entrées HistoriqueGroupes non sauvegardées, en une requête"""
+    entrees = list(entrees)
+    if not entrees:
+        return
+    if getattr(settings, 'HISTORIQUE_APRES_VALIDATION', False):
+        transaction.on_commit(lambda: _ecrire(entrees))
+    else:
+        _ecrire(entrees)
@@ -3,11 +3,20 @@ from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import Group, User
 
+from configurations import caching, evenements
+
+from . import historique
+
 
 @receiver(post_save, sender='auth.User')
 def create_or_update_user_profile(sender, instance, created, **kwargs):
     """Créer automatiquement un profil utilisateur lors de la création d'un user"""
     from .models import ProfilUtilisateur
+
+    # Nom, statut staff/superuser : affichés dans la barre de navigation
+    # (la mise à jour de last_login à chaque connexion n'en change rien)
+    if kwargs.get('update_fields') != frozenset({'last_login'}):
+        caching.droits_modifies()
     
     if created:
         ProfilUtilisateur.objects.get_or_create(
@@ -51,44 +60,57 @@ def create_or_update_group_extended(sender, instance, created, **kwargs):
         )
 
 
+# Groupes dont les membres sont évaluateurs (voir create_evaluateur_if_needed)
+GROUPES_EVALUATEURS = ['RH', 'Exploitation']
+
+
 @receiver(m2m_changed, sender=Group.user_set.through)
-def track_user_group_changes(sender, instance, action, pk_set, **kwargs):
-    """Suivre les changements d'affectation des utilisateurs aux groupes"""
+def track_user_group_changes(sender, instance, action, pk_set, model, **kwargs):
+    """
+    Suivre les changements d'affectation des utilisateurs aux groupes.
+    Appelé depuis les deux côtés de la relation : group.user_set.add(...)
+    (instance = groupe) ou user.groups.add(...) (instance = utilisateur).
+    """
     from .models import HistoriqueGroupes
-    
-    if action == "post_add":
-        for user_pk in pk_set:
-            try:
-                user = User.objects.get(pk=user_pk)
-                HistoriqueGroupes.objects.create(
-                    group=instance,
-                    action='add_user',
-                    utilisateur_cible=user,
-                    details=f'Ajout de {user.username} au groupe {instance.name}'
-                )
-                
-                # NOUVEAU : Créer automatiquement un évaluateur si ajouté à RH ou Exploitation
-                create_evaluateur_if_needed(user)
-                
-            except User.DoesNotExist:
-                pass
-    
-    elif action == "post_remove":
-        for user_pk in pk_set:
-            try:
-                user = User.objects.get(pk=user_pk)
-                HistoriqueGroupes.objects.create(
-                    group=instance,
-                    action='remove_user',
-                    utilisateur_cible=user,
-                    details=f'Retrait de {user.username} du groupe {instance.name}'
-                )
-                
-                # NOUVEAU : Vérifier s'il faut supprimer l'évaluateur
-                update_evaluateur_status(user)
-                
-            except User.DoesNotExist:
-                pass
+
+    if action.startswith('post_'):
+        caching.droits_modifies()
+
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if model is User:
+        groupes = {instance.pk: instance}
+        utilisateurs = User.objects.in_bulk(pk_set)
+        couples = [(instance, utilisateurs[pk]) for pk in pk_set if pk in utilisateurs]
+    else:
+        groupes = Group.objects.only('pk', 'name').in_bulk(pk_set)
+        couples = [(groupes[pk], instance) for pk in pk_set if pk in groupes]
+
+    if action == 'post_add':
+        action_historique, libelle = 'add_user', 'Ajout de {user} au groupe {groupe}'
+    else:
+        action_historique, libelle = 'remove_user', 'Retrait de {user} du groupe {groupe}'
+    historique.enregistrer(
+        HistoriqueGroupes(
+            group=groupe,
+            action=action_historique,
+            utilisateur_cible=user,
+            details=libelle.format(user=user.username, groupe=groupe.name),
+        )
+        for groupe, user in couples
+    )
+
+    # Évaluateurs : seuls les groupes RH et Exploitation en changent le service
+    if not any(groupe.name in GROUPES_EVALUATEURS for groupe in groupes.values()):
+        return
+    for user in {user.pk: user for _, user in couples}.values():
+        if action == 'post_add':
+            # NOUVEAU : Créer automatiquement un évaluateur si ajouté à RH ou Exploitation
+            create_evaluateur_if_needed(user)
+        else:
+            # NOUVEAU : Vérifier s'il faut supprimer l'évaluateur
+            update_evaluateur_status(user)
 
 
 def create_evaluateur_if_needed(user):
@@ -219,36 +241,40 @@ def determine_service_from_groups(group_names):
     return None
 
 @receiver(m2m_changed, sender=Group.permissions.through)
-def track_group_permission_changes(sender, instance, action, pk_set, **kwargs):
-    """Suivre les changements de permissions des groupes"""
+def track_group_permission_changes(sender, instance, action, pk_set, model, **kwargs):
+    """
+    Suivre les changements de permissions des groupes (group.permissions.add(...),
+    ou permission.group_set.add(...) avec instance = permission)
+    """
     from django.contrib.auth.models import Permission
     from .models import HistoriqueGroupes
-    
-    if action == "post_add":
-        for perm_pk in pk_set:
-            try:
-                permission = Permission.objects.get(pk=perm_pk)
-                HistoriqueGroupes.objects.create(
-                    group=instance,
-                    action='add_permission',
-                    permission_cible=permission,
-                    details=f'Ajout de la permission {permission.name} au groupe {instance.name}'
-                )
-            except Permission.DoesNotExist:
-                pass
-    
-    elif action == "post_remove":
-        for perm_pk in pk_set:
-            try:
-                permission = Permission.objects.get(pk=perm_pk)
-                HistoriqueGroupes.objects.create(
-                    group=instance,
-                    action='remove_permission',
-                    permission_cible=permission,
-                    details=f'Retrait de la permission {permission.name} du groupe {instance.name}'
-                )
-            except Permission.DoesNotExist:
-                pass
+
+    if action.startswith('post_'):
+        caching.droits_modifies()
+
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if model is Permission:
+        permissions = Permission.objects.only('pk', 'name').in_bulk(pk_set)
+        couples = [(instance, permissions[pk]) for pk in pk_set if pk in permissions]
+    else:
+        groupes = Group.objects.only('pk', 'name').in_bulk(pk_set)
+        couples = [(groupes[pk], instance) for pk in pk_set if pk in groupes]
+
+    if action == 'post_add':
+        action_historique, libelle = 'add_permission', 'Ajout de la permission {permission} au groupe {groupe}'
+    else:
+        action_historique, libelle = 'remove_permission', 'Retrait de la permission {permission} du groupe {groupe}'
+    historique.enregistrer(
+        HistoriqueGroupes(
+            group=groupe,
+            action=action_historique,
+            permission_cible=permission,
+            details=libelle.format(permission=permission.name, groupe=groupe.name),
+        )
+        for groupe, permission in couples
+    )
 
 
 @receiver(post_delete, sender='auth.Group')
@@ -259,3 +285,27 @@ def track_group_deletion(sender, instance, **kwargs):
     import logging
     logger = logging.getLogger(__name__)
     logger.info(f'Suppression du groupe {instance.name} (ID: {instance.id})')
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def track_user_permission_changes(sender, action, **kwargs):
+    """Les permissions directes d'un utilisateur modifient sa barre de navigation"""
+    if action.startswith('post_'):
+        caching.droits_modifies()
+
+
+@receiver(post_save, sender='auth.Group')
+@receiver(post_delete, sender='auth.Group')
+@receiver(post_delete, sender='auth.User')
+@receiver(post_save, sender='gestion_groupes.GroupeEtendu')
+def invalider_badges_groupes(sender, **kwargs):
+    """Nom et couleur des groupes : affichés en badges dans la barre de navigation"""
+    caching.droits_modifies()
+
+
+@receiver(post_save, sender='gestion_groupes.HistoriqueGroupes')
+def publier_historique(sender, instance, created, raw=False, **kwargs):
+    """Nouvelle entrée d'historique : poussée au flux du tableau de bord"""
+    if raw or not created:
+        return
+    evenements.publier('historique', historique.donnees_evenement(instance, instance.group.name))
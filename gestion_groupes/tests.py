@@ -1,3 +1,146 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from suivi_conducteurs.models import Conducteur, Evaluation
+from .backends import empreinte_droits, instantane_droits
+from .models import HistoriqueGroupes
+
+CACHE_TESTS = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-groupes'}}
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class ConnexionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lecteur', password='pw')
+
+    def test_page_de_connexion(self):
+        self.assertEqual(self.client.get('/login/').status_code, 200)
+
+    @override_settings(DEBUG=False)
+    def test_page_de_connexion_en_production(self):
+        self.assertEqual(self.client.get('/login/').status_code, 200)
+
+    def test_connexion_calcule_l_instantane(self):
+        response = self.client.post('/login/', {'username': 'lecteur', 'password': 'pw'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(instantane_droits(User.objects.get(pk=self.user.pk))['permissions'], [])
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class DroitsTests(TestCase):
+    """Instantané des permissions et empreinte des fragments de la barre de navigation"""
+
+    def setUp(self):
+        cache.clear()
+        self.groupe_a = Group.objects.create(name='Groupe A')
+        self.groupe_b = Group.objects.create(name='Groupe B')
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.bruno = User.objects.create_user('bruno', password='pw')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.groups.add(self.groupe_a)
+            self.bruno.groups.add(self.groupe_b)
+        self.permission = Permission.objects.get(codename='view_conducteur')
+
+    def recharger(self, user):
+        # Nouvel objet : ni instantané ni permissions mémorisés
+        return User.objects.get(pk=user.pk)
+
+    def test_permissions_lues_dans_l_instantane(self):
+        self.assertFalse(self.recharger(self.alice).has_perm('suivi_conducteurs.view_conducteur'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.groupe_a.permissions.add(self.permission)
+        self.assertTrue(self.recharger(self.alice).has_perm('suivi_conducteurs.view_conducteur'))
+
+    def test_empreinte_inchangee_par_les_droits_des_autres(self):
+        avant = empreinte_droits(self.recharger(self.alice))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.groupe_b.permissions.add(self.permission)
+        self.assertEqual(empreinte_droits(self.recharger(self.alice)), avant)
+        self.assertNotEqual(empreinte_droits(self.recharger(self.bruno)), avant)
+
+    def test_empreinte_modifiee_par_ses_droits(self):
+        avant = empreinte_droits(self.recharger(self.alice))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.groupe_a.permissions.add(self.permission)
+        self.assertNotEqual(empreinte_droits(self.recharger(self.alice)), avant)
+
+    def test_empreinte_modifiee_par_la_couleur_du_groupe(self):
+        avant = empreinte_droits(self.recharger(self.alice))
+        with self.captureOnCommitCallbacks(execute=True):
+            etendu = self.groupe_a.groupe_etendu
+            etendu.couleur = '#123456'
+            etendu.save()
+        self.assertNotEqual(empreinte_droits(self.recharger(self.alice)), avant)
+
+    def test_barre_de_navigation_propre_a_l_utilisateur(self):
+        self.client.force_login(self.alice)
+        self.assertNotContains(self.client.get(reverse('user_profile')), 'Groupe B')
+        self.client.force_login(self.bruno)
+        self.assertContains(self.client.get(reverse('user_profile')), 'Groupe B')
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class StatistiquesTableauDeBordTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_superutilisateur(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw'))
+        stats = self.client.get(reverse('dashboard_stats')).json()
+        self.assertEqual(set(stats), {'evaluations', 'conducteurs', 'user'})
+        self.assertEqual(stats['conducteurs']['total'], Conducteur.objects.count())
+        self.assertEqual(stats['evaluations']['total'], Evaluation.objects.count())
+
+    def test_blocs_limites_aux_permissions(self):
+        self.client.force_login(User.objects.create_user('lecteur', password='pw'))
+        stats = self.client.get(reverse('dashboard_stats')).json()
+        self.assertEqual(stats, {'user': {'groupes': [], 'permissions_count': 0}})
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class HistoriqueTests(TestCase):
+    """Historique des affectations, écrit par lot pour chaque opération"""
+
+    def setUp(self):
+        cache.clear()
+        self.groupe = Group.objects.create(name='Contrôleurs')
+        self.permission = Permission.objects.get(codename='view_conducteur')
+
+    def entrees(self, action):
+        return HistoriqueGroupes.objects.filter(group=self.groupe, action=action)
+
+    def test_ajout_groupe(self):
+        users = [User.objects.create_user(f'user{i}') for i in range(20)]
+        with CaptureQueriesContext(connection) as requetes:
+            self.groupe.user_set.add(*users)
+        self.assertLess(len(requetes), 10)
+        self.assertCountEqual(
+            self.entrees('add_user').values_list('utilisateur_cible', flat=True), [user.pk for user in users],
+        )
+        self.groupe.user_set.remove(users[0])
+        self.assertEqual(
+            self.entrees('remove_user').get().details, 'Retrait de user0 du groupe Contrôleurs',
+        )
+
+    def test_cote_inverse_des_relations(self):
+        alice = User.objects.create_user('alice', password='pw')
+        alice.groups.add(self.groupe)
+        self.assertEqual(self.entrees('add_user').get().utilisateur_cible, alice)
+        self.permission.group_set.add(self.groupe)
+        self.assertEqual(self.entrees('add_permission').get().permission_cible, self.permission)
+
+    @override_settings(HISTORIQUE_APRES_VALIDATION=True)
+    def test_ecriture_a_la_validation(self):
+        with self.captureOnCommitCallbacks() as rappels:
+            self.groupe.permissions.add(self.permission)
+        self.assertFalse(self.entrees('add_permission').exists())
+        for rappel in rappels:
+            rappel()
+        self.assertTrue(self.entrees('add_permission').exists())
@@ -9,37 +9,42 @@ from django.core.paginator import Paginator
 from django.utils import timezone
 from datetime import timedelta
 
+from configurations import caching
+from configurations.caching import cache_par_permissions, conditionnel
 from .models import ProfilUtilisateur, GroupeEtendu, HistoriqueGroupes
 
+# Modèles lus par les statistiques des groupes (ETag et cache de la réponse)
+MODELES_GROUPES = (Group, GroupeEtendu, User, User.groups.through, Group.permissions.through)
+
 
 # LoginRequiredMiddleware protège automatiquement cette vue
 def dashboard_groupes(request):
     """Dashboard principal de la gestion des groupes"""
     
-    # Statistiques générales
-    total_users = User.objects.count()
-    total_groups = Group.objects.count()
-    users_actifs = User.objects.filter(is_active=True).count()
-    users_staff = User.objects.filter(is_staff=True).count()
-    
-    # Statistiques par groupe
-    groupes_stats = []
-    for group in Group.objects.all():
-        try:
-            groupe_etendu = group.groupe_etendu
+    # Statistiques générales et par groupe : recalculées par un seul
+    # processus à la fois, valeur précédente servie pendant le recalcul
+    def calculer_stats():
+        groupes_stats = []
+        for group in Group.objects.all():
+            try:
+                groupe_etendu = group.groupe_etendu
+            except GroupeEtendu.DoesNotExist:
+                groupe_etendu = None
             groupes_stats.append({
                 'group': group,
                 'groupe_etendu': groupe_etendu,
                 'utilisateurs_count': group.user_set.count(),
                 'permissions_count': group.permissions.count(),
             })
-        except GroupeEtendu.DoesNotExist:
-            groupes_stats.append({
-                'group': group,
-                'groupe_etendu': None,
-                'utilisateurs_count': group.user_set.count(),
-                'permissions_count': group.permissions.count(),
-            })
+        return {
+            'total_users': User.objects.count(),
+            'total_groups': Group.objects.count(),
+            'users_actifs': User.objects.filter(is_active=True).count(),
+            'users_staff': User.objects.filter(is_staff=True).count(),
+            'groupes_stats': groupes_stats,
+        }
+    
+    stats = caching.obtenir('stats_groupes:dashboard', calculer_stats, modeles=MODELES_GROUPES)
     
     # Activité récente
     activites_recentes = HistoriqueGroupes.objects.select_related(
@@ -52,11 +57,7 @@ def dashboard_groupes(request):
     ).order_by('-date_joined')[:5]
     
     context = {
-        'total_users': total_users,
-        'total_groups': total_groups,
-        'users_actifs': users_actifs,
-        'users_staff': users_staff,
-        'groupes_stats': groupes_stats,
+        **stats,
         'activites_recentes': activites_recentes,
         'utilisateurs_recents': utilisateurs_recents,
     }
@@ -264,7 +265,9 @@ def historique_complet(request):
     return render(request, 'gestion_groupes/historique.html', context)
 
 
-# Pas de décorateur nécessaire pour une API simple
+# Pas de contrôle d'accès pour une API simple ; réponse conditionnelle (ETag)
+@conditionnel(*MODELES_GROUPES, par_utilisateur=False)
+@cache_par_permissions(*MODELES_GROUPES)
 def api_stats_groupes(request):
     """API pour les statistiques des groupes (pour graphiques)"""
     
@@ -0,0 +1,70 @@
+# gunicorn.conf.py
+"""
+Profil de production de gunicorn (chargé automatiquement depuis ce dossier) :
+
+    gunicorn configurations.wsgi:application
+
+Workers gthread dimensionnés sur le nombre de CPU, application chargée une
+fois dans le maître avant le fork (preload_app), préchauffage de chaque
+worker (configurations/prechauffage.py) et recyclage après max_requests
+requêtes, décalé par la gigue pour que les workers ne redémarrent pas tous
+ensemble.
+
+Variables d'environnement : GUNICORN_BIND, GUNICORN_WORKERS,
+GUNICORN_THREADS, GUNICORN_MAX_REQUESTS, GUNICORN_TIMEOUT.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+
+worker_class = 'gthread'
+# Requêtes surtout en attente de la base : deux workers par CPU, quelques fils chacun
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Capacité lue par LimiteurConcurrenceMiddleware (CONCURRENCE_CAPACITE)
+os.environ.setdefault('GUNICORN_CAPACITE', str(workers * threads))
+
+preload_app = True
+
+# Recyclage des workers (fuites mémoire lentes, caches par processus)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Battement des workers en mémoire plutôt que sur disque (conteneurs)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # Maître, application préchargée : code partagé par les workers après le fork
+    from configurations import prechauffage
+
+    duree = prechauffage.prechauffer_code()
+    server.log.info("Code préchauffé en %.2f s", duree)
+
+
+def pre_fork(server, worker):
+    # Aucune connexion à la base ne doit être héritée par un worker
+    from configurations import bases
+
+    bases.fermer_avant_fork()
+
+
+def post_fork(server, worker):
+    from configurations import prechauffage
+
+    try:
+        duree = prechauffage.prechauffer_code() + prechauffage.prechauffer_donnees()
+    except Exception:
+        # Base indisponible au démarrage : le worker sert quand même les requêtes
+        server.log.exception("Préchauffage du worker %s incomplet", worker.pid)
+    else:
+        server.log.info("Worker %s préchauffé en %.2f s", worker.pid, duree)
@@ -8,8 +8,31 @@ class DashboardManager {
     init() {
         this.setupStatsCards();
         this.setupQuickActions();
-        this.setupRecentActivities();
-        this.loadDashboardData();
+        
+        // Flux d'événements poussés par le serveur ; à défaut, interrogation
+        // périodique des statistiques (304 si rien n'a changé)
+        if (!this.connecterFlux()) {
+            this.loadDashboardData();
+            if (document.querySelector('[data-stats-url]')) {
+                setInterval(() => this.loadDashboardData(), 60000);
+            }
+        }
+    }
+    
+    /**
+     * Connexion au flux Server-Sent Events (data-events-url) : compteurs,
+     * nouvelles évaluations et historique des groupes. Le navigateur se
+     * reconnecte seul et reprend au dernier événement reçu.
+     */
+    connecterFlux() {
+        const source = document.querySelector('[data-events-url]');
+        if (!source || !window.EventSource) return false;
+        
+        this.flux = new EventSource(source.dataset.eventsUrl);
+        this.flux.addEventListener('compteurs', (e) => this.updateStats(JSON.parse(e.data)));
+        this.flux.addEventListener('evaluation', (e) => this.ajouterEvaluation(JSON.parse(e.data)));
+        this.flux.addEventListener('historique', (e) => this.ajouterHistorique(JSON.parse(e.data)));
+        return true;
     }
     
     setupStatsCards() {
@@ -56,25 +79,13 @@ class DashboardManager {
         });
     }
     
-    setupRecentActivities() {
-        const activities = document.querySelectorAll('.activity-item');
-        
-        // Auto-refresh des activités récentes
-        if (activities.length > 0) {
-            setInterval(() => {
-                this.refreshRecentActivities();
-            }, 30000); // Toutes les 30 secondes
-        }
-    }
-    
     async loadDashboardData() {
         try {
             // Chargement des statistiques dynamiques si disponible
             const statsEndpoint = document.querySelector('[data-stats-url]');
             if (statsEndpoint) {
-                const response = await fetch(statsEndpoint.dataset.statsUrl);
-                const data = await response.json();
-                this.updateStats(data);
+                const data = await DashboardUtils.fetchConditionnel(statsEndpoint.dataset.statsUrl);
+                if (data) this.updateStats(data);
             }
         } catch (error) {
             console.error('Erreur lors du chargement des données:', error);
@@ -112,25 +123,72 @@ class DashboardManager {
         animate();
     }
     
-    async refreshRecentActivities() {
-        const activitiesContainer = document.querySelector('.recent-activities tbody');
-        if (!activitiesContainer) return;
+    /**
+     * Ajoute une évaluation en tête du tableau des évaluations récentes
+     */
+    ajouterEvaluation(evaluation) {
+        const tbody = document.querySelector('.recent-activities tbody');
+        if (!tbody || tbody.querySelector(`[data-evaluation-id="${evaluation.id}"]`)) return;
         
-        try {
-            const response = await fetch('/api/recent-activities/');
-            const activities = await response.json();
-            
-            // Mettre à jour le contenu
-            activitiesContainer.innerHTML = activities.map(activity => `
-                <tr>
-                    <td>${AppUtils.formatDate(activity.date)}</td>
-                    <td>${activity.description}</td>
-                    <td><span class="badge bg-${activity.type}">${activity.status}</span></td>
-                </tr>
-            `).join('');
-            
-        } catch (error) {
-            console.error('Erreur refresh activités:', error);
+        const ligne = document.createElement('tr');
+        ligne.dataset.evaluationId = evaluation.id;
+        
+        const cellule = (...enfants) => {
+            const td = document.createElement('td');
+            td.append(...enfants);
+            ligne.appendChild(td);
+            return td;
+        };
+        const badge = (texte, classes) => {
+            const span = document.createElement('span');
+            span.className = `badge ${classes}`;
+            span.textContent = texte;
+            return span;
+        };
+        
+        cellule(AppUtils.formatDate(evaluation.date));
+        const nom = document.createElement('strong');
+        nom.textContent = evaluation.conducteur;
+        cellule(nom, document.createElement('br'), evaluation.site);
+        const classesType = { rh1: 'bg-info', ex1: 'bg-success' }[evaluation.abreviation] || 'bg-warning text-dark';
+        cellule(badge(evaluation.type, classesType));
+        if (evaluation.score === null) {
+            cellule(badge('-', 'bg-secondary'));
+        } else {
+            const score = evaluation.score;
+            const classesScore = score >= 80 ? 'bg-success'
+                : score >= 65 ? 'bg-info'
+                : score >= 50 ? 'bg-warning text-dark'
+                : 'bg-danger';
+            cellule(badge(`${score}%`, classesScore));
+        }
+        cellule(evaluation.evaluateur);
+        const lien = document.createElement('a');
+        lien.href = evaluation.url;
+        lien.className = 'btn btn-sm btn-outline-primary';
+        lien.textContent = 'Voir';
+        cellule(lien);
+        
+        tbody.prepend(ligne);
+        // Le tableau n'affiche que les dernières évaluations
+        while (tbody.rows.length > 5) {
+            tbody.deleteRow(-1);
+        }
+    }
+    
+    /**
+     * Ajoute une entrée en tête de l'historique des groupes, s'il est affiché
+     */
+    ajouterHistorique(entree) {
+        const tbody = document.querySelector('.historique-groupes tbody');
+        if (!tbody) return;
+        
+        const ligne = tbody.insertRow(0);
+        [AppUtils.formatDate(entree.date), entree.groupe, entree.libelle, entree.details].forEach(texte => {
+            ligne.insertCell().textContent = texte;
+        });
+        while (tbody.rows.length > 10) {
+            tbody.deleteRow(-1);
         }
     }
     
@@ -182,6 +240,36 @@ class DashboardManager {
 
 // Utilitaires spécifiques au dashboard
 const DashboardUtils = {
+    // Dernier ETag reçu par URL
+    etags: new Map(),
+    
+    /**
+     * Requête JSON conditionnelle : renvoie le dernier ETag reçu dans
+     * If-None-Match. Résout à null si la ressource n'a pas changé (304).
+     */
+    async fetchConditionnel(url) {
+        const headers = { 'Accept': 'application/json' };
+        const etag = this.etags.get(url);
+        if (etag) {
+            headers['If-None-Match'] = etag;
+        }
+        
+        // no-store : les ETag sont gérés ici, pas par le cache du navigateur
+        const response = await fetch(url, { headers, cache: 'no-store', credentials: 'same-origin' });
+        if (response.status === 304) {
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        
+        const nouvelEtag = response.headers.get('ETag');
+        if (nouvelEtag) {
+            this.etags.set(url, nouvelEtag);
+        }
+        return response.json();
+    },
+    
     /**
      * Crée un graphique simple avec Chart.js (si disponible)
      */
@@ -201,8 +289,8 @@ const DashboardUtils = {
         
         const updateStats = async () => {
             try {
-                const response = await fetch(endpoint);
-                const data = await response.json();
+                const data = await DashboardUtils.fetchConditionnel(endpoint);
+                if (!data) return;
                 
                 Object.entries(data).forEach(([key, value]) => {
                     const statEl = element.querySelector(`[data-live-stat="${key}"]`);
@@ -322,6 +322,73 @@ const FilterManager = {
     }
 };
 
+/**
+ * Recherche globale de la barre de navigation (suggestions groupées par type)
+ */
+const RechercheGlobale = {
+    init() {
+        const form = document.querySelector('[data-recherche-globale]');
+        if (!form) return;
+
+        const input = form.querySelector('input[name="q"]');
+        const menu = form.querySelector('[data-recherche-resultats]');
+        let controller = null;
+
+        const rechercher = AppUtils.debounce(async (query) => {
+            if (query.trim().length < 2) {
+                menu.classList.remove('show');
+                return;
+            }
+            // Annuler la requête précédente encore en vol
+            if (controller) controller.abort();
+            controller = new AbortController();
+
+            try {
+                const url = `${form.dataset.apiUrl}?q=${encodeURIComponent(query)}`;
+                const response = await fetch(url, { signal: controller.signal });
+                const data = await response.json();
+                this.afficher(menu, data.groupes, form.action, query);
+            } catch (error) {
+                if (error.name !== 'AbortError') {
+                    console.error('Erreur recherche globale:', error);
+                }
+            }
+        }, 200);
+
+        input.addEventListener('input', (e) => rechercher(e.target.value));
+        document.addEventListener('click', (e) => {
+            if (!form.contains(e.target)) menu.classList.remove('show');
+        });
+    },
+
+    afficher(menu, groupes, pageUrl, query) {
+        const echapper = (texte) => {
+            const div = document.createElement('div');
+            div.textContent = texte;
+            return div.innerHTML;
+        };
+
+        if (!groupes.length) {
+            menu.innerHTML = '<span class="dropdown-item-text text-muted">Aucun résultat</span>';
+        } else {
+            menu.innerHTML = groupes.map(groupe => `
+                <h6 class="dropdown-header">${echapper(groupe.libelle)}</h6>
+                ${groupe.resultats.map(r => `
+                    <a class="dropdown-item" href="${r.url}">
+                        <div class="fw-bold">${echapper(r.titre)}</div>
+                        <small class="text-muted">${echapper(r.details)}</small>
+                    </a>
+                `).join('')}
+            `).join('<div class="dropdown-divider"></div>') + `
+                <div class="dropdown-divider"></div>
+                <a class="dropdown-item text-center" href="${pageUrl}?q=${encodeURIComponent(query)}">
+                    Tous les résultats
+                </a>`;
+        }
+        menu.classList.add('show');
+    }
+};
+
 /**
  * Gestionnaire d'impression
  */
@@ -396,6 +463,9 @@ const PrintManager = {
 document.addEventListener('DOMContentLoaded', () => {
     // Initialiser le gestionnaire de thème
     ThemeManager.init();
+
+    // Recherche globale de la barre de navigation
+    RechercheGlobale.init();
     
     // Auto-masquage des alertes
     setTimeout(() => {
@@ -437,4 +507,5 @@ document.addEventListener('DOMContentLoaded', () => {
 window.AppUtils = AppUtils;
 window.ThemeManager = ThemeManager;
 window.FilterManager = FilterManager;
+window.RechercheGlobale = RechercheGlobale;
 window.PrintManager = PrintManager;
\ No newline at end of file
@@ -1,10 +1,12 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.db import models
 from django.forms import TextInput, Textarea
 from .models import (
     Site, Societe, Service, Conducteur, Evaluateur, 
     TypologieEvaluation, CritereEvaluation, Evaluation, Note
 )
+from .search import filtrer_conducteurs
+from taches.registre import file_en_souffrance
 
 
 @admin.register(Site)
@@ -91,6 +93,13 @@ class ConducteurAdmin(admin.ModelAdmin):
             'salsocid', 'site'
         ).prefetch_related('evaluation_set__notes__critere')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Recherche (et autocomplétion) via l'index plein texte, insensible aux accents"""
+        filtres = filtrer_conducteurs(queryset, search_term) if search_term else None
+        if filtres is None:
+            return super().get_search_results(request, queryset, search_term)
+        return filtres, False
+
     def nom_complet(self, obj):
         return obj.nom_complet
     nom_complet.short_description = 'Nom complet'
@@ -198,6 +207,22 @@ class CritereEvaluationAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if getattr(obj, '_bareme_modifie', False):
+            # Recalcul mis en file par signals.recalculer_scores_critere
+            if file_en_souffrance():
+                self.message_user(
+                    request,
+                    "Recalcul des scores mis en file, mais des tâches attendent depuis "
+                    "plusieurs minutes : vérifiez que la commande run_worker est lancée.",
+                    messages.WARNING,
+                )
+            else:
+                self.message_user(
+                    request, f"Scores du type « {obj.type_evaluation} » recalculés en tâche de fond.",
+                )
+
 
 class NoteInline(admin.TabularInline):
     model = Note
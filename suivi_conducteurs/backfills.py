@@ -0,0 +1,37 @@
+# suivi_conducteurs/backfills.py
+"""Cibles de la commande backfill (voir taches/backfill.py)"""
+from taches.backfill import cible
+
+from . import scores, search
+from .models import Conducteur, Evaluation
+
+
+@cible('scores', Evaluation.objects.all(), champs=['score'])
+def recalculer_scores(evaluations):
+    """Evaluation.score, depuis les notes"""
+    return scores.scores_modifies(evaluations)
+
+
+def _preparer_recherche():
+    if search.IndexTexte.disponible():
+        search.INDEX_CONDUCTEURS.creer()
+        search.INDEX_GLOBAL.creer()
+
+
+@cible('recherche_conducteurs', Conducteur.objects.all(), preparer=_preparer_recherche)
+def indexer_conducteurs(conducteurs):
+    """Index plein texte des conducteurs et entrées « conducteur » de l'index global"""
+    ids = list(conducteurs.values_list('pk', flat=True))
+    if ids and search.IndexTexte.disponible():
+        search.indexer_conducteurs(ids)
+        search.indexer_global('conducteur', ids)
+    return len(ids), []
+
+
+@cible('recherche_evaluations', Evaluation.objects.all(), preparer=_preparer_recherche)
+def indexer_evaluations(evaluations):
+    """Entrées « évaluation » de l'index global (les anciennes en sont retirées)"""
+    ids = list(evaluations.values_list('pk', flat=True))
+    if ids and search.IndexTexte.disponible():
+        search.indexer_global('evaluation', ids)
+    return len(ids), []
@@ -0,0 +1,123 @@
+# suivi_conducteurs/echeances.py
+"""
+File des conducteurs à évaluer : conducteurs actifs sans évaluation d'un type
+donné depuis N mois.
+
+Deux sources possibles :
+- la requête directe (anti-jointure sur l'index conducteur/type/date) ;
+- l'instantané EcheanceEvaluation, recalculé périodiquement par la commande
+  refresh_echeances, qui permet un affichage immédiat de la page.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Conducteur, EcheanceEvaluation, Evaluation, TypologieEvaluation
+
+
+def date_seuil(mois, reference=None):
+    """Date située `mois` mois avant la date de référence (jour borné à la fin du mois)"""
+    reference = reference or date.today()
+    total = reference.year * 12 + (reference.month - 1) - mois
+    annee, mois_index = divmod(total, 12)
+    jour = min(reference.day, calendar.monthrange(annee, mois_index + 1)[1])
+    return date(annee, mois_index + 1, jour)
+
+
+def _filtrer(conducteurs, site=None, societe=None):
+    if site:
+        conducteurs = conducteurs.filter(site__id=site)
+    if societe:
+        conducteurs = conducteurs.filter(salsocid__socid=societe)
+    return conducteurs
+
+
+def _ordonner(conducteurs):
+    # Les conducteurs jamais évalués d'abord, puis les plus anciennes évaluations
+    return conducteurs.select_related('salsocid', 'site').order_by(
+        F('derniere_evaluation').asc(nulls_first=True), 'salnom', 'salnom2'
+    )
+
+
+def conducteurs_a_evaluer(type_evaluation, mois, site=None, societe=None):
+    """Requête directe : une seule requête avec anti-jointure sur les évaluations récentes"""
+    seuil = date_seuil(mois)
+    evaluations_du_type = Evaluation.objects.filter(
+        conducteur=OuterRef('pk'),
+        type_evaluation=type_evaluation,
+    )
+    conducteurs = Conducteur.objects.filter(salactif=True).filter(
+        ~Exists(evaluations_du_type.filter(date_evaluation__gte=seuil))
+    ).annotate(
+        derniere_evaluation=Subquery(
+            evaluations_du_type.order_by('-date_evaluation').values('date_evaluation')[:1]
+        )
+    )
+    return _ordonner(_filtrer(conducteurs, site, societe))
+
+
+def conducteurs_a_evaluer_instantane(type_evaluation, mois, site=None, societe=None):
+    """Lecture de l'instantané EcheanceEvaluation"""
+    seuil = date_seuil(mois)
+    echeance = EcheanceEvaluation.objects.filter(
+        conducteur=OuterRef('pk'),
+        type_evaluation=type_evaluation,
+    )
+    conducteurs = Conducteur.objects.filter(salactif=True).filter(
+        Exists(echeance.filter(
+            Q(derniere_evaluation__isnull=True) | Q(derniere_evaluation__lt=seuil)
+        ))
+    ).annotate(
+        derniere_evaluation=Subquery(echeance.values('derniere_evaluation')[:1])
+    )
+    return _ordonner(_filtrer(conducteurs, site, societe))
+
+
+def date_dernier_instantane():
+    """Date du dernier calcul de l'instantané, ou None s'il n'a jamais été calculé"""
+    return EcheanceEvaluation.objects.aggregate(derniere=Max('date_calcul'))['derniere']
+
+
+def instantane_valide(date_calcul):
+    """L'instantané est utilisable tant qu'il n'est pas plus ancien que ECHEANCES_VALIDITE_HEURES"""
+    if date_calcul is None:
+        return False
+    validite = timedelta(hours=getattr(settings, 'ECHEANCES_VALIDITE_HEURES', 24))
+    return timezone.now() - date_calcul <= validite
+
+
+def rafraichir_echeances():
+    """
+    Recalcule l'instantané complet : une requête groupée MAX(date_evaluation)
+    par (conducteur, type), puis remplacement des lignes en une transaction.
+    Retourne le nombre de lignes écrites.
+    """
+    dernieres = {
+        (ligne['conducteur_id'], ligne['type_evaluation_id']): ligne['derniere']
+        for ligne in Evaluation.objects.order_by().values(
+            'conducteur_id', 'type_evaluation_id'
+        ).annotate(derniere=Max('date_evaluation'))
+    }
+    conducteurs_ids = list(Conducteur.objects.filter(salactif=True).values_list('id', flat=True))
+    types_ids = list(TypologieEvaluation.objects.values_list('id', flat=True))
+
+    maintenant = timezone.now()
+    lignes = [
+        EcheanceEvaluation(
+            conducteur_id=conducteur_id,
+            type_evaluation_id=type_id,
+            derniere_evaluation=dernieres.get((conducteur_id, type_id)),
+            date_calcul=maintenant,
+        )
+        for conducteur_id in conducteurs_ids
+        for type_id in types_ids
+    ]
+
+    with transaction.atomic():
+        EcheanceEvaluation.objects.all().delete()
+        EcheanceEvaluation.objects.bulk_create(lignes, batch_size=500)
+    return len(lignes)
@@ -0,0 +1,152 @@
+# suivi_conducteurs/flux.py
+"""
+Flux Server-Sent Events du tableau de bord : nouvelles évaluations,
+compteurs et historique des groupes, poussés dès leur validation (voir
+configurations/evenements.py) au lieu d'être interrogés périodiquement.
+
+Servi par un serveur ASGI (configurations/asgi.py), une connexion reste
+ouverte EVENEMENTS_DUREE_CONNEXION secondes sans occuper de fil d'exécution.
+Sous WSGI, chaque connexion transmet les événements en attente puis se
+ferme ; le navigateur se reconnecte après EVENEMENTS_RECONNEXION_WSGI
+millisecondes en reprenant au dernier événement reçu.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from configurations import evenements
+
+from . import rapports
+from .models import Evaluation
+
+# Permission requise pour recevoir chaque type d'événement
+PERMISSIONS_EVENEMENTS = {
+    'evaluation': 'suivi_conducteurs.view_evaluation',
+    'historique': 'gestion_groupes.view_historiquegroupes',
+}
+
+
+def donnees_evaluation(pk):
+    """Ligne « évaluations récentes » du tableau de bord, lue après validation"""
+    evaluation = Evaluation.objects.select_related(
+        'conducteur__site', 'evaluateur', 'type_evaluation'
+    ).filter(pk=pk).first()
+    if evaluation is None:
+        return None
+    return {
+        'id': evaluation.pk,
+        'date': evaluation.date_evaluation.isoformat(),
+        'conducteur': evaluation.conducteur.nom_complet,
+        'site': evaluation.conducteur.site.nom_commune,
+        'type': evaluation.type_evaluation.nom,
+        'abreviation': evaluation.type_evaluation.abreviation,
+        'score': evaluation.calculate_score(),
+        'evaluateur': evaluation.evaluateur.nom_complet,
+        'url': reverse('suivi_conducteurs:evaluation_detail', args=[evaluation.pk]),
+    }
+
+
+def _message(type_evenement, donnees, numero=None):
+    lignes = []
+    if numero is not None:
+        lignes.append(f'id: {numero}')
+    lignes.append(f'event: {type_evenement}')
+    lignes.append('data: ' + json.dumps(donnees, ensure_ascii=False))
+    return '\n'.join(lignes) + '\n\n'
+
+
+def _numero_depart(request):
+    try:
+        return int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        return None
+
+
+def _preparer(user):
+    """Droits de l'utilisateur pour le flux (lus une fois par connexion)"""
+    return {
+        type_evenement: user.has_perm(permission)
+        for type_evenement, permission in PERMISSIONS_EVENEMENTS.items()
+    }
+
+
+def _lot(user, autorises, numero):
+    """Messages des événements publiés après `numero` (compteurs envoyés une seule fois par lot)"""
+    lot, dernier = evenements.lire_depuis(numero)
+    messages = []
+    compteurs = False
+    for numero_evenement, evenement in lot:
+        if evenement['type'] == 'compteurs':
+            compteurs = True
+        elif autorises.get(evenement['type']) and evenement['donnees'] is not None:
+            messages.append(_message(evenement['type'], evenement['donnees'], numero_evenement))
+    if compteurs:
+        messages.append(_message('compteurs', rapports.compteurs_dashboard(user), dernier))
+    elif dernier != numero:
+        # Événements non transmis (sans permission) : avancer tout de même le Last-Event-ID
+        messages.append(f'id: {dernier}\n\n')
+    return messages, dernier
+
+
+async def flux_evenements(request):
+    """Flux text/event-stream des événements du tableau de bord"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    autorises = await sync_to_async(_preparer)(user)
+    depart = _numero_depart(request)
+
+    def initial():
+        # Première connexion : état courant des compteurs
+        numero = evenements.dernier_numero()
+        return _message('compteurs', rapports.compteurs_dashboard(user), numero), numero
+
+    if not isinstance(request, ASGIRequest):
+        def reponse_courte():
+            messages, numero = [], depart
+            if numero is None:
+                message, numero = initial()
+                messages.append(message)
+            suivants, _ = _lot(user, autorises, numero)
+            return ''.join(messages + suivants)
+
+        contenu = await sync_to_async(reponse_courte)()
+        retry = getattr(settings, 'EVENEMENTS_RECONNEXION_WSGI', 30000)
+        response = HttpResponse(f'retry: {retry}\n\n' + contenu, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    async def flux():
+        numero = depart
+        if numero is None:
+            message, numero = await sync_to_async(initial)()
+            yield message
+        yield f"retry: {getattr(settings, 'EVENEMENTS_RECONNEXION', 3000)}\n\n"
+        intervalle = getattr(settings, 'EVENEMENTS_INTERVALLE', 1)
+        fin = time.monotonic() + getattr(settings, 'EVENEMENTS_DUREE_CONNEXION', 600)
+        battement = time.monotonic()
+        # Connexion limitée dans le temps : les droits sont relus à la reconnexion
+        while time.monotonic() < fin:
+            await asyncio.sleep(intervalle)
+            messages, numero = await sync_to_async(_lot)(user, autorises, numero)
+            for message in messages:
+                yield message
+            if messages:
+                battement = time.monotonic()
+            elif time.monotonic() - battement > 15:
+                # Commentaire SSE : maintient la connexion à travers les mandataires
+                battement = time.monotonic()
+                yield ': battement\n\n'
+
+    response = StreamingHttpResponse(flux(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en mémoire tampon par nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,209 @@
+# suivi_conducteurs/impression.py
+"""
+Dossiers d'impression : les fiches de nombreuses évaluations (une sélection,
+ou toutes celles d'un site sur une période) dans un seul document HTML
+imprimable, une fiche par page.
+
+Les fiches sont rendues par lots de IMPRESSION_TAILLE_LOT : deux requêtes
+par lot (évaluations avec conducteur, site, société et évaluateur ; notes),
+les critères et types d'évaluation étant lus une fois dans le cache. Le
+document est produit au fil de l'eau, sans être gardé en mémoire :
+- la vue impression_evaluations rend les lots dans le processus et les
+  transmet au navigateur (jusqu'à IMPRESSION_MAX_FICHES fiches) ;
+- la commande imprimer_evaluations répartit les lots sur un pool de
+  processus et écrit le document sur disque.
+"""
+import multiprocessing
+import os
+import signal
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from configurations import bases, caching, routage
+
+from .models import CritereEvaluation, Evaluation, Note, Site, TypologieEvaluation
+
+
+def taille_lot():
+    return getattr(settings, 'IMPRESSION_TAILLE_LOT', 25)
+
+
+def selection(ids=None, site=None, du=None, au=None, type_evaluation=None, conducteur=None):
+    """Identifiants des évaluations à imprimer, dans l'ordre du document (site, conducteur, date)"""
+    evaluations = Evaluation.objects.all()
+    if ids is not None:
+        evaluations = evaluations.filter(pk__in=ids)
+    if site:
+        evaluations = evaluations.filter(conducteur__site_id=site)
+    if du:
+        evaluations = evaluations.filter(date_evaluation__gte=du)
+    if au:
+        evaluations = evaluations.filter(date_evaluation__lte=au)
+    if type_evaluation:
+        evaluations = evaluations.filter(type_evaluation_id=type_evaluation)
+    if conducteur:
+        evaluations = evaluations.filter(conducteur_id=conducteur)
+    return list(evaluations.order_by(
+        'conducteur__site__nom_commune', 'conducteur__salnom', 'conducteur__salnom2', 'date_evaluation', 'pk',
+    ).values_list('pk', flat=True))
+
+
+def titre(criteres):
+    """Titre du document d'après les critères de selection()"""
+    morceaux = ["Dossier d'évaluations"]
+    if criteres.get('site'):
+        site = Site.objects.filter(pk=criteres['site']).first()
+        if site:
+            morceaux.append(f"site de {site.nom_commune}")
+    if criteres.get('du'):
+        morceaux.append(f"du {criteres['du']:%d/%m/%Y}")
+    if criteres.get('au'):
+        morceaux.append(f"au {criteres['au']:%d/%m/%Y}")
+    return ' '.join(morceaux)
+
+
+CHAMPS_CRITERES = ('id', 'nom', 'valeur_mini', 'valeur_maxi', 'actif')
+CHAMPS_TYPES = ('id', 'nom', 'description')
+
+
+def references():
+    """Critères et types d'évaluation, communs à toutes les fiches"""
+    def calculer():
+        return {
+            'criteres': {critere['id']: critere for critere in CritereEvaluation.objects.values(*CHAMPS_CRITERES)},
+            'types': {type_eval['id']: type_eval for type_eval in TypologieEvaluation.objects.values(*CHAMPS_TYPES)},
+        }
+    return caching.obtenir('impression:references', calculer, modeles=(CritereEvaluation, TypologieEvaluation))
+
+
+def _completer(donnees, criteres, types):
+    """
+    Ajoute les critères et types absents des références : valeur en cache
+    périmée (servie pendant le recalcul) antérieure à leur création.
+    """
+    criteres = set(criteres) - donnees['criteres'].keys()
+    types = set(types) - donnees['types'].keys()
+    if not criteres and not types:
+        return donnees
+    completees = {'criteres': dict(donnees['criteres']), 'types': dict(donnees['types'])}
+    if criteres:
+        for critere in CritereEvaluation.objects.filter(pk__in=criteres).values(*CHAMPS_CRITERES):
+            completees['criteres'][critere['id']] = critere
+    if types:
+        for type_eval in TypologieEvaluation.objects.filter(pk__in=types).values(*CHAMPS_TYPES):
+            completees['types'][type_eval['id']] = type_eval
+    return completees
+
+
+def _fiche(evaluation, notes, references):
+    lignes = []
+    for note in notes:
+        critere = references['criteres'][note['critere_id']]
+        lignes.append({
+            'critere': critere['nom'],
+            'valeur': note['valeur'],
+            'valeur_mini': critere['valeur_mini'],
+            'valeur_maxi': critere['valeur_maxi'],
+            'pourcentage': (
+                round(note['valeur'] * 100 / critere['valeur_maxi'])
+                if note['valeur'] is not None and critere['valeur_maxi'] else None
+            ),
+        })
+    lignes.sort(key=lambda ligne: ligne['critere'])
+    return {
+        'evaluation': evaluation,
+        'type': references['types'][evaluation.type_evaluation_id],
+        'notes': lignes,
+        'notes_attribuees': sum(1 for ligne in lignes if ligne['valeur'] is not None),
+    }
+
+
+def rendre_lot(ids):
+    """HTML des fiches d'un lot d'évaluations, dans l'ordre de `ids`"""
+    evaluations = Evaluation.objects.select_related(
+        'conducteur__salsocid', 'conducteur__site', 'evaluateur__service',
+    ).in_bulk(ids)
+    notes = {}
+    criteres = set()
+    for note in Note.objects.filter(evaluation_id__in=ids).values('evaluation_id', 'critere_id', 'valeur'):
+        notes.setdefault(note['evaluation_id'], []).append(note)
+        criteres.add(note['critere_id'])
+    donnees = _completer(
+        references(), criteres, {evaluation.type_evaluation_id for evaluation in evaluations.values()},
+    )
+    fiches = [
+        _fiche(evaluations[pk], notes.get(pk, []), donnees)
+        for pk in ids
+        if pk in evaluations
+    ]
+    return render_to_string('suivi_conducteurs/impression/fiches.html', {'fiches': fiches})
+
+
+def entete(titre, nombre):
+    return render_to_string('suivi_conducteurs/impression/entete.html', {
+        'titre': titre,
+        'nombre': nombre,
+        'genere_le': timezone.now(),
+    })
+
+
+def pied():
+    return render_to_string('suivi_conducteurs/impression/pied.html')
+
+
+def lots(ids, taille=None):
+    taille = taille or taille_lot()
+    return [ids[debut:debut + taille] for debut in range(0, len(ids), taille)]
+
+
+def flux(ids, titre):
+    """Document complet, lot par lot, rendu dans le processus courant"""
+    yield entete(titre, len(ids))
+    for lot in lots(ids):
+        yield rendre_lot(lot)
+    yield pied()
+
+
+def _initialiser():
+    # Ctrl-C traité par le processus principal, qui arrête le pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Sans effet après un fork ; nécessaire si le processus est démarré par spawn
+    django.setup()
+
+
+def _rendre_lot_isole(ids):
+    try:
+        # Processus du pool : lectures sur la réplique, comme la commande
+        with routage.sur_replique():
+            return rendre_lot(ids)
+    finally:
+        close_old_connections()
+
+
+def ecrire(ids, titre, chemin, processus=1):
+    """
+    Écrit le document dans `chemin`, les lots étant rendus par `processus`
+    processus ; les lots sont écrits dans l'ordre, à mesure qu'ils arrivent.
+    """
+    os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+    # Références chargées dans le cache avant le démarrage du pool
+    references()
+    temporaire = chemin + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as fichier:
+        fichier.write(entete(titre, len(ids)))
+        if processus > 1:
+            # Connexions non partagées avec les processus du pool
+            bases.fermer_avant_fork()
+            with multiprocessing.Pool(processus, initializer=_initialiser) as pool:
+                for html in pool.imap(_rendre_lot_isole, lots(ids)):
+                    fichier.write(html)
+        else:
+            for lot in lots(ids):
+                fichier.write(rendre_lot(lot))
+        fichier.write(pied())
+    os.replace(temporaire, chemin)
+    return chemin
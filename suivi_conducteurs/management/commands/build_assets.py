@@ -0,0 +1,113 @@
+# suivi_conducteurs/management/commands/build_assets.py
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+# Déclarations de premier niveau (colonne 0) : deux fichiers d'un même bundle
+# ne doivent pas déclarer le même nom (SyntaxError pour const / class)
+DECLARATION = re.compile(r'^(?:const|let|var|class|function)\s+([A-Za-z_$][\w$]*)', re.MULTILINE)
+
+
+def minifier_js(contenu):
+    """
+    Minification prudente, ligne par ligne : indentation, lignes vides et
+    commentaires en début de ligne (le code qui suit la fin d'un commentaire
+    /* ... */ sur la même ligne est conservé). Les retours à la ligne sont
+    conservés (insertion automatique des points-virgules inchangée).
+    """
+    lignes = []
+    dans_commentaire = False
+    for ligne in contenu.splitlines():
+        ligne = ligne.strip()
+        while True:
+            if dans_commentaire:
+                fin = ligne.find('*/')
+                if fin == -1:
+                    ligne = ''
+                    break
+                dans_commentaire = False
+                ligne = ligne[fin + 2:].strip()
+            elif ligne.startswith('/*'):
+                dans_commentaire = True
+                ligne = ligne[2:]
+            else:
+                break
+        if not ligne or ligne.startswith('//'):
+            continue
+        lignes.append(ligne)
+    return '\n'.join(lignes)
+
+
+def minifier_css(contenu):
+    contenu = re.sub(r'/\*.*?\*/', '', contenu, flags=re.DOTALL)
+    contenu = re.sub(r'\s+', ' ', contenu)
+    return re.sub(r'\s*([{};,])\s*', r'\1', contenu).strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Construit les bundles statiques définis dans BUNDLES_STATIQUES (groupés, "
+        "minifiés), puis lance collectstatic : noms hachés et variantes .gz / .br"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sans-collectstatic', action='store_true',
+            help="Écrire uniquement les bundles dans static/bundles/",
+        )
+
+    def handle(self, *args, **options):
+        debut = time.monotonic()
+        dossier = Path(settings.BASE_DIR) / 'static' / 'bundles'
+        dossier.mkdir(exist_ok=True)
+
+        bundles = []
+        for nom, types in settings.BUNDLES_STATIQUES.items():
+            for type_fichier, sources in types.items():
+                contenus = []
+                for source in sources:
+                    chemin = finders.find(source)
+                    if chemin is None:
+                        raise CommandError(f"Bundle « {nom} » : fichier introuvable {source}")
+                    contenus.append((source, Path(chemin).read_text(encoding='utf-8')))
+
+                if type_fichier == 'js':
+                    self.verifier_doublons(nom, contenus)
+                    resultat = '\n;\n'.join(minifier_js(contenu) for _, contenu in contenus)
+                else:
+                    resultat = '\n'.join(minifier_css(contenu) for _, contenu in contenus)
+
+                fichier = f'bundles/{nom}.{type_fichier}'
+                (dossier / f'{nom}.{type_fichier}').write_text(resultat + '\n', encoding='utf-8')
+                taille_sources = sum(len(contenu.encode()) for _, contenu in contenus)
+                bundles.append((fichier, taille_sources, len(resultat.encode())))
+
+        for fichier, taille_sources, taille in bundles:
+            self.stdout.write(f'  {fichier} : {taille_sources} → {taille} octets')
+
+        if not options['sans_collectstatic']:
+            call_command('collectstatic', interactive=False, verbosity=0)
+            for fichier, _, _ in bundles:
+                self.stdout.write(f'  {fichier} → {staticfiles_storage.stored_name(fichier)}')
+
+        duree = time.monotonic() - debut
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(bundles)} bundle(s) construit(s) en {duree:.2f} s'
+        ))
+
+    def verifier_doublons(self, nom, contenus):
+        declarations = {}
+        for source, contenu in contenus:
+            for identifiant in DECLARATION.findall(contenu):
+                if identifiant in declarations and declarations[identifiant] != source:
+                    raise CommandError(
+                        f"Bundle « {nom} » : {identifiant} déclaré dans "
+                        f"{declarations[identifiant]} et {source}"
+                    )
+                declarations[identifiant] = source
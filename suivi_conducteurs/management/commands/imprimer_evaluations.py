@@ -0,0 +1,60 @@
+# suivi_conducteurs/management/commands/imprimer_evaluations.py
+import os
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from configurations.routage import sur_replique
+from suivi_conducteurs import impression
+
+
+class Command(BaseCommand):
+    help = (
+        "Écrit un dossier d'impression (fiches d'évaluations, une par page) dans un "
+        "fichier HTML, les fiches étant rendues par un pool de processus"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--site', type=int, help="Identifiant du site")
+        parser.add_argument('--du', type=date.fromisoformat, help="Date de début (AAAA-MM-JJ)")
+        parser.add_argument('--au', type=date.fromisoformat, help="Date de fin (AAAA-MM-JJ)")
+        parser.add_argument('--type-evaluation', type=int, help="Identifiant du type d'évaluation")
+        parser.add_argument('--conducteur', type=int, help="Identifiant du conducteur")
+        parser.add_argument('--ids', help="Identifiants d'évaluations séparés par des virgules")
+        parser.add_argument(
+            '--processus', type=int, default=None,
+            help="Processus de rendu (défaut : IMPRESSION_PROCESSUS)",
+        )
+        parser.add_argument(
+            '--sortie', default=None,
+            help="Fichier à écrire (défaut : IMPRESSION_DOSSIER/evaluations-<horodatage>.html)",
+        )
+
+    @sur_replique()
+    def handle(self, *args, **options):
+        criteres = {
+            nom: options[nom]
+            for nom in ('site', 'du', 'au', 'type_evaluation', 'conducteur')
+            if options[nom]
+        }
+        if options['ids']:
+            criteres['ids'] = [int(pk) for pk in options['ids'].split(',') if pk.strip()]
+        ids = impression.selection(**criteres)
+        if not ids:
+            raise CommandError("Aucune évaluation ne correspond à ces critères")
+
+        processus = options['processus'] or getattr(settings, 'IMPRESSION_PROCESSUS', 4)
+        sortie = options['sortie'] or os.path.join(
+            str(getattr(settings, 'IMPRESSION_DOSSIER', settings.BASE_DIR / 'var' / 'impressions')),
+            f'evaluations-{time.strftime("%Y%m%d-%H%M%S")}.html',
+        )
+
+        debut = time.monotonic()
+        impression.ecrire(ids, impression.titre(criteres), sortie, processus=processus)
+        duree = time.monotonic() - debut
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(ids)} fiche(s) écrite(s) dans {sortie} en {duree:.2f} s '
+            f'({len(ids) / duree:.0f} fiches/s, {processus} processus)'
+        ))
@@ -0,0 +1,18 @@
+# suivi_conducteurs/management/commands/purge_sessions.py
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Supprime les sessions expirées (à lancer périodiquement, par exemple chaque nuit)"
+
+    def handle(self, *args, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        supprimees = engine.SessionStore.clear_expired()
+        if supprimees is None:
+            # Backend standard : pas de décompte
+            self.stdout.write(self.style.SUCCESS('✅ Sessions expirées supprimées'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ {supprimees} session(s) expirée(s) supprimée(s)'))
@@ -0,0 +1,24 @@
+# suivi_conducteurs/management/commands/rebuild_search_index.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from suivi_conducteurs import search
+
+
+class Command(BaseCommand):
+    help = "Reconstruit entièrement les index de recherche plein texte"
+
+    def handle(self, *args, **options):
+        if not search.IndexTexte.disponible():
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Moteur {connection.vendor} non pris en charge : la recherche utilise icontains"
+            ))
+            return
+
+        debut = time.monotonic()
+        search.reconstruire_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Index de recherche reconstruits en {time.monotonic() - debut:.2f} s'
+        ))
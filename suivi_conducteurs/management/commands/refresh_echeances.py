@@ -0,0 +1,21 @@
+# suivi_conducteurs/management/commands/refresh_echeances.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from suivi_conducteurs.echeances import rafraichir_echeances
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule l'instantané des évaluations à planifier "
+        "(à lancer périodiquement, par exemple chaque nuit)"
+    )
+
+    def handle(self, *args, **options):
+        debut = time.monotonic()
+        total = rafraichir_echeances()
+        duree = time.monotonic() - debut
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Instantané des échéances recalculé : {total} ligne(s) en {duree:.2f} s'
+        ))
@@ -0,0 +1,25 @@
+# suivi_conducteurs/management/commands/snapshot_rapports.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from configurations.routage import sur_replique
+from suivi_conducteurs import rapports
+
+
+class Command(BaseCommand):
+    help = (
+        "Écrit l'instantané du jour des rapports (statistiques, synthèses par site "
+        "et par société) en JSON et HTML (à lancer chaque nuit)"
+    )
+
+    @sur_replique()
+    def handle(self, *args, **options):
+        debut = time.monotonic()
+        dossier = rapports.ecrire_instantane()
+        duree = time.monotonic() - debut
+        self.stdout.write(self.style.SUCCESS(f'✅ Instantané écrit dans {dossier} en {duree:.2f} s'))
+
+        # Les instantanés trop anciens ne sont plus consultés
+        for jour in rapports.purger_instantanes():
+            self.stdout.write(f'🗑️ Instantané du {jour.isoformat()} supprimé')
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suivi_conducteurs', '0003_evaluateur_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EcheanceEvaluation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('derniere_evaluation', models.DateField(blank=True, null=True, verbose_name='Dernière évaluation')),
+                ('date_calcul', models.DateTimeField(verbose_name='Date du calcul')),
+            ],
+            options={
+                'verbose_name': "Échéance d'évaluation",
+                'verbose_name_plural': "Échéances d'évaluation",
+            },
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['conducteur', 'type_evaluation', 'date_evaluation'], name='suivi_condu_conduct_d0a62b_idx'),
+        ),
+        migrations.AddField(
+            model_name='echeanceevaluation',
+            name='conducteur',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='echeances', to='suivi_conducteurs.conducteur', verbose_name='Conducteur'),
+        ),
+        migrations.AddField(
+            model_name='echeanceevaluation',
+            name='type_evaluation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='suivi_conducteurs.typologieevaluation', verbose_name="Type d'évaluation"),
+        ),
+        migrations.AddIndex(
+            model_name='echeanceevaluation',
+            index=models.Index(fields=['type_evaluation', 'derniere_evaluation'], name='suivi_condu_type_ev_5bf0a1_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='echeanceevaluation',
+            unique_together={('conducteur', 'type_evaluation')},
+        ),
+    ]
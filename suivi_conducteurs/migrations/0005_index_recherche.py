@@ -0,0 +1,104 @@
+# Index plein texte des conducteurs et des sociétés (FTS5 sous SQLite, tsvector sous PostgreSQL)
+#
+# Schéma et indexation figés ici : la migration ne dépend pas de l'état de
+# suivi_conducteurs/search.py, qui peut évoluer ensuite.
+
+import unicodedata
+
+from django.db import migrations
+
+INDEX = {
+    'suivi_conducteurs_conducteur_fts': ['salnom', 'salnom2', 'socnom'],
+    'suivi_conducteurs_societe_fts': ['socnom', 'soccode', 'socvillib1'],
+}
+
+
+def normaliser(texte):
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    return ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+
+
+def creer_table(cursor, vendor, table, colonnes):
+    if vendor == 'sqlite':
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5('
+            f'{", ".join(colonnes)}, '
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+    else:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ('
+            f'id bigint PRIMARY KEY, texte text NOT NULL, document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_document_idx ON {table} USING gin (document)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_texte_idx ON {table} USING gin (texte gin_trgm_ops)'
+        )
+
+
+def inserer(cursor, vendor, table, colonnes, lignes):
+    """`lignes` : itérable de (identifiant, [textes dans l'ordre des colonnes])"""
+    lignes = [(identifiant, [normaliser(t) for t in textes]) for identifiant, textes in lignes]
+    if not lignes:
+        return
+    if vendor == 'sqlite':
+        marqueurs = ', '.join(['%s'] * (len(colonnes) + 1))
+        cursor.executemany(
+            f'INSERT INTO {table} (rowid, {", ".join(colonnes)}) VALUES ({marqueurs})',
+            [[identifiant] + textes for identifiant, textes in lignes],
+        )
+    else:
+        document = ' || '.join(
+            f"setweight(to_tsvector('simple', %s), '{'ABCD'[min(i, 3)]}')"
+            for i in range(len(colonnes))
+        )
+        cursor.executemany(
+            f'INSERT INTO {table} (id, texte, document) VALUES (%s, %s, {document}) '
+            f'ON CONFLICT (id) DO UPDATE SET texte = EXCLUDED.texte, document = EXCLUDED.document',
+            [[identifiant, ' '.join(textes)] + textes for identifiant, textes in lignes],
+        )
+
+
+def creer_index_recherche(apps, schema_editor):
+    """Création des tables d'index et indexation des données existantes"""
+    conn = schema_editor.connection
+    if conn.vendor not in ('sqlite', 'postgresql'):
+        return
+    Conducteur = apps.get_model('suivi_conducteurs', 'Conducteur')
+    Societe = apps.get_model('suivi_conducteurs', 'Societe')
+
+    conducteurs = (
+        (c.id, [c.salnom, c.salnom2, c.salsocid.socnom])
+        for c in Conducteur.objects.using(conn.alias).select_related('salsocid').iterator(chunk_size=1000)
+    )
+    societes = (
+        (s.id, [s.socnom, s.soccode, s.socvillib1])
+        for s in Societe.objects.using(conn.alias).iterator(chunk_size=1000)
+    )
+    with conn.cursor() as cursor:
+        for (table, colonnes), lignes in zip(INDEX.items(), (conducteurs, societes)):
+            creer_table(cursor, conn.vendor, table, colonnes)
+            inserer(cursor, conn.vendor, table, colonnes, lignes)
+
+
+def supprimer_index_recherche(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ('sqlite', 'postgresql'):
+        return
+    with conn.cursor() as cursor:
+        for table in INDEX:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suivi_conducteurs', '0004_echeances_evaluation'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index_recherche, supprimer_index_recherche),
+    ]
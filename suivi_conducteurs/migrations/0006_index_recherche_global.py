@@ -0,0 +1,113 @@
+# Index de recherche global : conducteurs, sociétés, sites, évaluateurs et évaluations récentes
+#
+# Schéma et indexation figés ici : la migration ne dépend pas de l'état de
+# suivi_conducteurs/search.py, qui peut évoluer ensuite.
+
+import unicodedata
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import migrations
+
+TABLE = 'suivi_conducteurs_recherche_fts'
+COLONNES = ['titre', 'details']
+
+
+def normaliser(texte):
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    return ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+
+
+def creer_table(cursor, vendor):
+    if vendor == 'sqlite':
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(titre, details, '
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+    else:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+            f'id bigint PRIMARY KEY, texte text NOT NULL, document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING gin (document)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TABLE}_texte_idx ON {TABLE} USING gin (texte gin_trgm_ops)'
+        )
+
+
+def inserer(cursor, vendor, lignes):
+    """`lignes` : itérable de (identifiant, titre, details)"""
+    lignes = [
+        (identifiant, normaliser(titre), normaliser(details))
+        for identifiant, titre, details in lignes
+    ]
+    if not lignes:
+        return
+    if vendor == 'sqlite':
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, titre, details) VALUES (%s, %s, %s)', lignes,
+        )
+    else:
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (id, texte, document) VALUES (%s, %s, '
+            f"setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+            f'ON CONFLICT (id) DO UPDATE SET texte = EXCLUDED.texte, document = EXCLUDED.document',
+            [(i, f'{titre} {details}', titre, details) for i, titre, details in lignes],
+        )
+
+
+def lignes_globales(apps, alias):
+    """(id * 8 + code du type, titre, details) des objets à indexer"""
+    def modele(nom):
+        return apps.get_model('suivi_conducteurs', nom).objects.using(alias).order_by('id')
+
+    depuis = date.today() - timedelta(days=getattr(settings, 'RECHERCHE_EVALUATIONS_JOURS', 365))
+    for c in modele('Conducteur').select_related('salsocid', 'site').iterator(chunk_size=1000):
+        yield c.id * 8 + 1, f"{c.salnom} {c.salnom2}", f"{c.salsocid.socnom} {c.site.nom_commune}"
+    for s in modele('Societe').iterator(chunk_size=1000):
+        yield s.id * 8 + 2, s.socnom, f"{s.soccode} {s.soccp} {s.socvillib1}"
+    for s in modele('Site').iterator(chunk_size=1000):
+        yield s.id * 8 + 3, s.nom_commune, s.code_postal
+    for e in modele('Evaluateur').select_related('service').iterator(chunk_size=1000):
+        yield e.id * 8 + 4, f"{e.prenom} {e.nom}", e.service.nom
+    evaluations = modele('Evaluation').filter(date_evaluation__gte=depuis).select_related(
+        'conducteur', 'type_evaluation', 'evaluateur'
+    )
+    for e in evaluations.iterator(chunk_size=1000):
+        yield (
+            e.id * 8 + 5,
+            f"{e.conducteur.salnom} {e.conducteur.salnom2}",
+            f"{e.type_evaluation.nom} {e.date_evaluation:%d/%m/%Y} {e.evaluateur.prenom} {e.evaluateur.nom}",
+        )
+
+
+def creer_index_global(apps, schema_editor):
+    """Création de la table d'index et indexation des données existantes"""
+    conn = schema_editor.connection
+    if conn.vendor not in ('sqlite', 'postgresql'):
+        return
+    with conn.cursor() as cursor:
+        creer_table(cursor, conn.vendor)
+        inserer(cursor, conn.vendor, lignes_globales(apps, conn.alias))
+
+
+def supprimer_index_global(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ('sqlite', 'postgresql'):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suivi_conducteurs', '0005_index_recherche'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index_global, supprimer_index_global),
+    ]
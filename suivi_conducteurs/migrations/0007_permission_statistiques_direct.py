@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suivi_conducteurs', '0006_index_recherche_global'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='evaluation',
+            options={'ordering': ['-date_evaluation'], 'permissions': [('voir_statistiques_direct', 'Peut consulter les statistiques en direct (hors instantané nocturne)')], 'verbose_name': 'Évaluation', 'verbose_name_plural': 'Évaluations'},
+        ),
+    ]
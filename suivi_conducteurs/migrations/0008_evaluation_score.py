@@ -0,0 +1,41 @@
+# Score enregistré des évaluations, calculé pour les évaluations existantes
+# (recalcul ultérieur : manage.py backfill scores)
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def calculer_scores(apps, schema_editor):
+    Evaluation = apps.get_model('suivi_conducteurs', 'Evaluation')
+    Note = apps.get_model('suivi_conducteurs', 'Note')
+    alias = schema_editor.connection.alias
+    totaux = Note.objects.using(alias).filter(
+        valeur__isnull=False, critere__actif=True,
+    ).order_by().values('evaluation_id').annotate(
+        total=Sum('valeur'), maximum=Sum('critere__valeur_maxi'),
+    )
+    lot = []
+    for ligne in totaux.iterator(chunk_size=2000):
+        if ligne['maximum']:
+            lot.append(Evaluation(pk=ligne['evaluation_id'], score=round(ligne['total'] / ligne['maximum'] * 100, 1)))
+        if len(lot) >= 1000:
+            Evaluation.objects.using(alias).bulk_update(lot, ['score'])
+            lot = []
+    if lot:
+        Evaluation.objects.using(alias).bulk_update(lot, ['score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suivi_conducteurs', '0007_permission_statistiques_direct'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluation',
+            name='score',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Score (%)'),
+        ),
+        migrations.RunPython(calculer_scores, migrations.RunPython.noop),
+    ]
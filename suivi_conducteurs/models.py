@@ -218,6 +218,8 @@ class Evaluation(models.Model):
     conducteur = models.ForeignKey(Conducteur, on_delete=models.CASCADE, verbose_name="Conducteur")
     type_evaluation = models.ForeignKey(TypologieEvaluation, on_delete=models.CASCADE, verbose_name="Type d'évaluation")
     date_creation = models.DateTimeField(auto_now_add=True)
+    # Valeur de calculate_score enregistrée (voir scores.py, commande backfill scores)
+    score = models.FloatField(null=True, blank=True, editable=False, verbose_name="Score (%)")
 
     def __str__(self):
         return f"{self.date_evaluation} - {self.conducteur} par {self.evaluateur} ({self.type_evaluation})"
@@ -284,10 +286,15 @@ class Evaluation(models.Model):
         verbose_name_plural = "Évaluations"
         unique_together = ['conducteur', 'date_evaluation', 'evaluateur', 'type_evaluation']
         ordering = ['-date_evaluation']
+        permissions = [
+            ('voir_statistiques_direct', "Peut consulter les statistiques en direct (hors instantané nocturne)"),
+        ]
         indexes = [
             models.Index(fields=['date_evaluation']),
             models.Index(fields=['conducteur']),
             models.Index(fields=['type_evaluation']),
+            # Couvre la recherche de la dernière évaluation d'un type par conducteur
+            models.Index(fields=['conducteur', 'type_evaluation', 'date_evaluation']),
         ]
         
 class Note(models.Model):
@@ -339,3 +346,22 @@ class Note(models.Model):
         indexes = [
             models.Index(fields=['evaluation', 'critere']),
         ]
+
+
+class EcheanceEvaluation(models.Model):
+    """Instantané de la dernière évaluation de chaque conducteur actif, par type d'évaluation"""
+    conducteur = models.ForeignKey(Conducteur, on_delete=models.CASCADE, related_name='echeances', verbose_name="Conducteur")
+    type_evaluation = models.ForeignKey(TypologieEvaluation, on_delete=models.CASCADE, verbose_name="Type d'évaluation")
+    derniere_evaluation = models.DateField(null=True, blank=True, verbose_name="Dernière évaluation")
+    date_calcul = models.DateTimeField(verbose_name="Date du calcul")
+
+    def __str__(self):
+        return f"{self.conducteur} - {self.type_evaluation} : {self.derniere_evaluation or 'jamais évalué'}"
+
+    class Meta:
+        verbose_name = "Échéance d'évaluation"
+        verbose_name_plural = "Échéances d'évaluation"
+        unique_together = ['conducteur', 'type_evaluation']
+        indexes = [
+            models.Index(fields=['type_evaluation', 'derniere_evaluation']),
+        ]
@@ -0,0 +1,238 @@
+# suivi_conducteurs/rapports.py
+"""
+Rapports « de la veille » : statistiques globales, synthèses par site et par
+société ; compteurs du tableau de bord.
+
+La commande snapshot_rapports calcule les agrégats une fois par nuit et les
+écrit dans RAPPORTS_DOSSIER/<AAAA-MM-JJ>/ (JSON, plus une version HTML
+autonome du rapport). La page des statistiques lit le dernier instantané sur
+disque ; le calcul en direct reste accessible avec la permission
+voir_statistiques_direct.
+"""
+import json
+import os
+import shutil
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import TruncMonth
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from configurations import agregats, caching
+
+from .models import Conducteur, Evaluation, Site, Societe, TypologieEvaluation
+
+# Fichiers d'un instantané, servis tels quels par la vue rapport_instantane
+FICHIERS = {
+    'statistiques.json': 'application/json',
+    'sites.json': 'application/json',
+    'societes.json': 'application/json',
+    'statistiques.html': 'text/html; charset=utf-8',
+}
+
+
+def dossier_rapports():
+    return str(getattr(settings, 'RAPPORTS_DOSSIER', settings.BASE_DIR / 'var' / 'rapports'))
+
+
+def compteurs_dashboard(user):
+    """
+    Compteurs du tableau de bord (nuls sans la permission correspondante).
+    Communs à tous les utilisateurs : un seul calcul à la fois, valeur
+    précédente servie pendant le recalcul.
+    """
+    debut_mois = date.today().replace(day=1)
+
+    def calculer():
+        # Comptages concurrents sur PostgreSQL (voir configurations/agregats.py)
+        return agregats.compter({
+            'total_conducteurs': Conducteur.objects.filter(salactif=True),
+            'total_evaluations': Evaluation.objects.all(),
+            'evaluations_ce_mois': Evaluation.objects.filter(date_evaluation__gte=debut_mois),
+        })
+
+    compteurs = caching.obtenir(
+        f'compteurs_dashboard:{debut_mois.isoformat()}', calculer, modeles=(Conducteur, Evaluation)
+    )
+    voir_conducteurs = user.has_perm('suivi_conducteurs.view_conducteur')
+    voir_evaluations = user.has_perm('suivi_conducteurs.view_evaluation')
+    return {
+        'total_conducteurs': compteurs['total_conducteurs'] if voir_conducteurs else 0,
+        'total_evaluations': compteurs['total_evaluations'] if voir_evaluations else 0,
+        'evaluations_ce_mois': compteurs['evaluations_ce_mois'] if voir_evaluations else 0,
+    }
+
+
+def conducteurs_par_site():
+    """Conducteurs actifs / total par site (sites sans conducteur exclus)"""
+    sites = Site.objects.annotate(
+        total=Count('conducteur'),
+        actifs=Count('conducteur', filter=Q(conducteur__salactif=True)),
+    ).filter(total__gt=0)
+    return [
+        {
+            'site': {'id': site.id, 'nom': str(site)},
+            'actifs': site.actifs,
+            'total': site.total,
+            'inactifs': site.total - site.actifs,
+        }
+        for site in sites
+    ]
+
+
+def conducteurs_par_societe():
+    """Répartition des conducteurs par société active"""
+    actifs = Q(conducteur__salactif=True)
+    societes = Societe.objects.filter(socactif=True).annotate(
+        total=Count('conducteur'),
+        actifs=Count('conducteur', filter=actifs),
+        interim=Count('conducteur', filter=actifs & Q(conducteur__interim_p=True)),
+        sous_traitants=Count('conducteur', filter=actifs & Q(conducteur__sous_traitant_p=True)),
+    ).filter(total__gt=0)
+    return [
+        {
+            'societe': {'id': societe.pk, 'nom': str(societe)},
+            'actifs': societe.actifs,
+            'total': societe.total,
+            'inactifs': societe.total - societe.actifs,
+            'interim': societe.interim,
+            'sous_traitants': societe.sous_traitants,
+            'permanents': societe.actifs - societe.interim - societe.sous_traitants,
+        }
+        for societe in societes
+    ]
+
+
+def calculer_statistiques():
+    """Contexte complet de la page des statistiques"""
+    stats = {
+        'total_conducteurs': Conducteur.objects.filter(salactif=True).count(),
+        'total_evaluations': Evaluation.objects.count(),
+        'total_societes': Societe.objects.filter(socactif=True).count(),
+        'total_sites': Site.objects.count(),
+    }
+
+    conducteurs_stats = Conducteur.objects.aggregate(
+        total_actifs=Count('pk', filter=Q(salactif=True)),
+        total_inactifs=Count('pk', filter=Q(salactif=False)),
+        interim=Count('pk', filter=Q(salactif=True, interim_p=True)),
+        sous_traitants=Count('pk', filter=Q(salactif=True, sous_traitant_p=True)),
+        permanents=Count('pk', filter=Q(salactif=True, interim_p=False, sous_traitant_p=False)),
+    )
+
+    # Évaluations par mois (derniers 12 mois)
+    debut_periode = date.today() - timedelta(days=365)
+    evaluations_par_mois = Evaluation.objects.filter(
+        date_evaluation__gte=debut_periode
+    ).annotate(
+        mois=TruncMonth('date_evaluation')
+    ).values('mois').annotate(
+        count=Count('id')
+    ).order_by('mois')
+
+    # Scores moyens par type d'évaluation (scores enregistrés, voir scores.py)
+    scores_par_type = {}
+    types = TypologieEvaluation.objects.annotate(
+        moyenne=Avg('evaluation__score'),
+        count=Count('evaluation__score'),
+        total_evaluations=Count('evaluation'),
+    ).filter(count__gt=0)
+    for type_eval in types:
+        scores_par_type[type_eval.nom] = {
+            'moyenne': type_eval.moyenne,
+            'count': type_eval.count,
+            'total_evaluations': type_eval.total_evaluations,
+        }
+
+    return {
+        'stats': stats,
+        'conducteurs_stats': conducteurs_stats,
+        'conducteurs_par_site': conducteurs_par_site(),
+        'conducteurs_par_societe': conducteurs_par_societe(),
+        'evaluations_par_mois': list(evaluations_par_mois),
+        'scores_par_type': scores_par_type,
+    }
+
+
+def _ecrire(chemin, contenu):
+    # Écriture atomique : un lecteur ne voit jamais un fichier à moitié écrit
+    temporaire = chemin + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as fichier:
+        fichier.write(contenu)
+    os.replace(temporaire, chemin)
+
+
+def ecrire_instantane(jour=None):
+    """Calcule les rapports et les écrit dans le dossier du jour. Renvoie ce dossier."""
+    jour = jour or date.today()
+    dossier = os.path.join(dossier_rapports(), jour.isoformat())
+    os.makedirs(dossier, exist_ok=True)
+
+    contexte = calculer_statistiques()
+    genere_le = timezone.now()
+    donnees = {'genere_le': genere_le, **contexte}
+
+    def ecrire_json(nom, valeur):
+        _ecrire(os.path.join(dossier, nom), json.dumps(valeur, cls=DjangoJSONEncoder, ensure_ascii=False))
+
+    ecrire_json('statistiques.json', donnees)
+    ecrire_json('sites.json', {'genere_le': genere_le, 'sites': contexte['conducteurs_par_site']})
+    ecrire_json('societes.json', {'genere_le': genere_le, 'societes': contexte['conducteurs_par_societe']})
+    _ecrire(
+        os.path.join(dossier, 'statistiques.html'),
+        render_to_string('suivi_conducteurs/rapport_statistiques.html', {'jour': jour, **donnees}),
+    )
+    return dossier
+
+
+def jours_disponibles():
+    """Dates des instantanés présents sur disque, la plus récente en premier"""
+    try:
+        noms = os.listdir(dossier_rapports())
+    except FileNotFoundError:
+        return []
+    jours = []
+    for nom in noms:
+        try:
+            jours.append(date.fromisoformat(nom))
+        except ValueError:
+            pass
+    return sorted(jours, reverse=True)
+
+
+def purger_instantanes():
+    """Supprime les instantanés antérieurs à RAPPORTS_CONSERVATION_JOURS ; renvoie leurs dates"""
+    limite = date.today() - timedelta(days=getattr(settings, 'RAPPORTS_CONSERVATION_JOURS', 90))
+    supprimes = []
+    for jour in jours_disponibles():
+        if jour < limite:
+            shutil.rmtree(os.path.join(dossier_rapports(), jour.isoformat()))
+            supprimes.append(jour)
+    return supprimes
+
+
+def chemin_instantane(nom, jour=None):
+    """Chemin d'un fichier d'instantané (le plus récent par défaut), ou None"""
+    jours = [jour] if jour else jours_disponibles()
+    for candidat in jours:
+        chemin = os.path.join(dossier_rapports(), candidat.isoformat(), nom)
+        if os.path.isfile(chemin):
+            return chemin
+    return None
+
+
+def lire_statistiques():
+    """Contexte de la page des statistiques depuis le dernier instantané, ou None"""
+    chemin = chemin_instantane('statistiques.json')
+    if chemin is None:
+        return None
+    with open(chemin, encoding='utf-8') as fichier:
+        donnees = json.load(fichier)
+    # Types perdus par la sérialisation JSON, utilisés par les filtres du gabarit
+    donnees['genere_le'] = datetime.fromisoformat(donnees['genere_le'])
+    for item in donnees['evaluations_par_mois']:
+        item['mois'] = date.fromisoformat(item['mois'][:10])
+    return donnees
@@ -0,0 +1,75 @@
+# suivi_conducteurs/scores.py
+"""
+Score enregistré des évaluations (Evaluation.score) : même calcul que
+Evaluation.calculate_score, mais pour un ensemble d'évaluations en deux
+requêtes, et lisible directement par les agrégats (moyennes par type).
+
+Tenu à jour par les signaux (notes enregistrées ou supprimées, critères
+modifiés) ; recalcul complet avec « manage.py backfill scores ».
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import Sum
+
+from configurations import caching
+
+from .models import Evaluation, Note
+
+
+def scores(evaluations):
+    """{evaluation_id: score} des évaluations du queryset ayant au moins une note comptée"""
+    totaux = Note.objects.filter(
+        evaluation__in=evaluations, valeur__isnull=False, critere__actif=True,
+    ).order_by().values('evaluation_id').annotate(
+        total=Sum('valeur'), maximum=Sum('critere__valeur_maxi'),
+    )
+    return {
+        ligne['evaluation_id']: round(ligne['total'] / ligne['maximum'] * 100, 1)
+        for ligne in totaux
+        if ligne['maximum']
+    }
+
+
+def scores_modifies(evaluations):
+    """(nombre d'évaluations lues, évaluations dont le score enregistré a changé)"""
+    calcules = scores(evaluations)
+    lues = 0
+    modifiees = []
+    for evaluation in evaluations.only('pk', 'score'):
+        lues += 1
+        score = calcules.get(evaluation.pk)
+        if evaluation.score != score:
+            evaluation.score = score
+            modifiees.append(evaluation)
+    return lues, modifiees
+
+
+def recalculer(evaluations):
+    """Recalcule et enregistre les scores ; renvoie le nombre de scores modifiés"""
+    _, modifiees = scores_modifies(evaluations)
+    if modifiees:
+        Evaluation.objects.bulk_update(modifiees, ['score'], batch_size=500)
+        # bulk_update n'émet pas post_save : vues en cache invalidées ici
+        caching.incrementer_versions(Evaluation)
+    return len(modifiees)
+
+
+# Évaluations dont les notes ont changé dans la transaction en cours (une
+# connexion par fil d'exécution, donc un ensemble par fil)
+_local = threading.local()
+
+
+def _recalculer_en_attente():
+    ids = getattr(_local, 'evaluations', set())
+    _local.evaluations = set()
+    if ids:
+        recalculer(Evaluation.objects.filter(pk__in=ids))
+
+
+def recalculer_apres_validation(evaluation_id):
+    """Score recalculé une fois la transaction validée, une seule fois par évaluation"""
+    if not hasattr(_local, 'evaluations'):
+        _local.evaluations = set()
+    _local.evaluations.add(evaluation_id)
+    transaction.on_commit(_recalculer_en_attente)
@@ -0,0 +1,466 @@
+# suivi_conducteurs/search.py
+"""
+Recherche plein texte insensible aux accents.
+
+- SQLite : table virtuelle FTS5 (tokenizer unicode61 sans diacritiques),
+  classement bm25 et recherche par préfixe.
+- PostgreSQL : table avec colonne tsvector (index GIN) et texte normalisé
+  indexé en trigrammes pour tolérer les fautes de frappe.
+
+Les textes sont normalisés côté Python (minuscules, accents retirés) pour que
+les deux moteurs se comportent de la même façon : « Hélène » trouve « Helene ».
+Les index sont tenus à jour par les signaux de suivi_conducteurs/signals.py et
+peuvent être reconstruits avec la commande rebuild_search_index.
+
+En plus des index par modèle (filtres des listes, autocomplétion), un index
+global regroupe conducteurs, sociétés, sites, évaluateurs et évaluations
+récentes pour la recherche de la barre de navigation.
+"""
+import re
+import unicodedata
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Case, IntegerField, When
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+# Index global : nombre de codes de type réservés par identifiant (id * NB_CODES + code)
+NB_CODES = 8
+
+
+def normaliser(texte):
+    """Minuscules et suppression des accents"""
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    return ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+
+
+def termes(recherche):
+    """Découpe une saisie utilisateur en termes sûrs (lettres et chiffres uniquement)"""
+    return re.findall(r'\w+', normaliser(recherche))
+
+
+class IndexTexte:
+    """Index plein texte adossé à une table dédiée, clé = identifiant de l'objet indexé"""
+
+    def __init__(self, table, colonnes):
+        self.table = table
+        self.colonnes = colonnes
+
+    @staticmethod
+    def disponible(conn=None):
+        return (conn or connection).vendor in ('sqlite', 'postgresql')
+
+    # --- Schéma -----------------------------------------------------------
+
+    def creer(self, conn=None):
+        conn = conn or connection
+        with conn.cursor() as cursor:
+            if conn.vendor == 'sqlite':
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5('
+                    f'{", ".join(self.colonnes)}, '
+                    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+            elif conn.vendor == 'postgresql':
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                    f'id bigint PRIMARY KEY, texte text NOT NULL, document tsvector NOT NULL)'
+                )
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {self.table}_document_idx '
+                    f'ON {self.table} USING gin (document)'
+                )
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {self.table}_texte_idx '
+                    f'ON {self.table} USING gin (texte gin_trgm_ops)'
+                )
+
+    def detruire(self, conn=None):
+        conn = conn or connection
+        if self.disponible(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    # --- Écriture ---------------------------------------------------------
+
+    def remplacer(self, lignes, conn=None):
+        """
+        Indexe ou réindexe des objets.
+        `lignes` : itérable de (identifiant, {colonne: texte}).
+        """
+        conn = conn or connection
+        if not self.disponible(conn):
+            return
+        lignes = [
+            (identifiant, [normaliser(valeurs.get(colonne)) for colonne in self.colonnes])
+            for identifiant, valeurs in lignes
+        ]
+        if not lignes:
+            return
+
+        with conn.cursor() as cursor:
+            if conn.vendor == 'sqlite':
+                self._retirer(cursor, [identifiant for identifiant, _ in lignes], 'rowid')
+                marqueurs = ', '.join(['%s'] * (len(self.colonnes) + 1))
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (rowid, {", ".join(self.colonnes)}) VALUES ({marqueurs})',
+                    [[identifiant] + textes for identifiant, textes in lignes],
+                )
+            else:
+                # Pondération décroissante : la première colonne compte le plus
+                poids = 'ABCD'
+                document = ' || '.join(
+                    f"setweight(to_tsvector('simple', %s), '{poids[min(i, 3)]}')"
+                    for i in range(len(self.colonnes))
+                )
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (id, texte, document) VALUES (%s, %s, {document}) '
+                    f'ON CONFLICT (id) DO UPDATE SET texte = EXCLUDED.texte, document = EXCLUDED.document',
+                    [[identifiant, ' '.join(textes)] + textes for identifiant, textes in lignes],
+                )
+
+    def retirer(self, identifiants, conn=None):
+        conn = conn or connection
+        identifiants = list(identifiants)
+        if not identifiants or not self.disponible(conn):
+            return
+        with conn.cursor() as cursor:
+            self._retirer(cursor, identifiants, 'rowid' if conn.vendor == 'sqlite' else 'id')
+
+    def _retirer(self, cursor, identifiants, cle):
+        for debut in range(0, len(identifiants), 500):
+            lot = identifiants[debut:debut + 500]
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE {cle} IN ({", ".join(["%s"] * len(lot))})',
+                lot,
+            )
+
+    def vider(self, conn=None):
+        conn = conn or connection
+        if self.disponible(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table}')
+
+    # --- Lecture ----------------------------------------------------------
+
+    def _correspondances(self, mots, conn, code=None):
+        """
+        Requête (sql, paramètres) des identifiants correspondant à tous les
+        termes (recherche par préfixe), sans ordre ni limite.
+        `code` : index à identifiants id * NB_CODES + code (index global),
+        seuls ceux de ce type sont retenus.
+        """
+        cle = 'rowid' if conn.vendor == 'sqlite' else 'id'
+        code_sql = f' AND {cle} %% {NB_CODES} = %s' if code is not None else ''
+        code_params = [code] if code is not None else []
+        if conn.vendor == 'sqlite':
+            requete = ' '.join(f'"{mot}"*' for mot in mots)
+            return (
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s{code_sql}',
+                [requete] + code_params,
+            )
+        requete = ' & '.join(f'{mot}:*' for mot in mots)
+        return (
+            f"SELECT id FROM {self.table} "
+            f"WHERE (document @@ to_tsquery('simple', %s) OR texte %% %s){code_sql}",
+            [requete, ' '.join(mots)] + code_params,
+        )
+
+    def rechercher(self, recherche, limite=None, conn=None, code=None):
+        """
+        Identifiants correspondant à tous les termes (recherche par préfixe),
+        du plus pertinent au moins pertinent. Retourne None si l'index n'est
+        pas disponible sur ce moteur, pour permettre un repli sur icontains.
+        `code` : voir _correspondances.
+        """
+        conn = conn or connection
+        if not self.disponible(conn):
+            return None
+        mots = termes(recherche)
+        if not mots:
+            return []
+
+        sql, params = self._correspondances(mots, conn, code)
+        if conn.vendor == 'sqlite':
+            sql += ' ORDER BY rank'
+        else:
+            requete = ' & '.join(f'{mot}:*' for mot in mots)
+            sql += " ORDER BY similarity(texte, %s) * 0.1 + ts_rank(document, to_tsquery('simple', %s)) DESC"
+            params += [' '.join(mots), requete]
+        if limite:
+            sql += ' LIMIT %s'
+            params.append(limite)
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [ligne[0] for ligne in cursor.fetchall()]
+
+    def filtrer(self, queryset, recherche):
+        """
+        Restreint `queryset` à tous les objets correspondant à la recherche,
+        par une sous-requête sur l'index (ni limite ni liste d'identifiants) :
+        les autres filtres de la liste s'appliquent à l'ensemble des résultats.
+        Retourne None si l'index n'est pas disponible sur ce moteur.
+        """
+        conn = connections[queryset.db]
+        if not self.disponible(conn):
+            return None
+        mots = termes(recherche)
+        if not mots:
+            return queryset.none()
+        return queryset.filter(id__in=RawSQL(*self._correspondances(mots, conn)))
+
+
+INDEX_CONDUCTEURS = IndexTexte('suivi_conducteurs_conducteur_fts', ['salnom', 'salnom2', 'socnom'])
+INDEX_SOCIETES = IndexTexte('suivi_conducteurs_societe_fts', ['socnom', 'soccode', 'socvillib1'])
+
+
+def lignes_conducteurs(conducteurs):
+    return (
+        (c.id, {'salnom': c.salnom, 'salnom2': c.salnom2, 'socnom': c.salsocid.socnom})
+        for c in conducteurs
+    )
+
+
+def lignes_societes(societes):
+    return (
+        (s.id, {'socnom': s.socnom, 'soccode': s.soccode, 'socvillib1': s.socvillib1})
+        for s in societes
+    )
+
+
+def indexer_conducteurs(ids=None):
+    """(Ré)indexe les conducteurs donnés, ou tous si ids est None"""
+    from .models import Conducteur
+
+    conducteurs = Conducteur.objects.select_related('salsocid').order_by('id')
+    if ids is not None:
+        conducteurs = conducteurs.filter(id__in=list(ids))
+    INDEX_CONDUCTEURS.remplacer(lignes_conducteurs(conducteurs.iterator(chunk_size=1000)))
+
+
+def indexer_societes(ids=None):
+    """(Ré)indexe les sociétés données, ou toutes si ids est None"""
+    from .models import Societe
+
+    societes = Societe.objects.order_by('id')
+    if ids is not None:
+        societes = societes.filter(id__in=list(ids))
+    INDEX_SOCIETES.remplacer(lignes_societes(societes.iterator(chunk_size=1000)))
+
+
+def reconstruire_index():
+    """Reconstruction complète des index conducteurs, sociétés et de l'index global"""
+    for index in (INDEX_CONDUCTEURS, INDEX_SOCIETES, INDEX_GLOBAL):
+        index.creer()
+        index.vider()
+    indexer_conducteurs()
+    indexer_societes()
+    for type_recherche in TYPES_RECHERCHE.values():
+        indexer_global(type_recherche.cle)
+
+
+def rechercher_conducteurs(recherche, limite=None):
+    return INDEX_CONDUCTEURS.rechercher(recherche, limite)
+
+
+def rechercher_societes(recherche, limite=None):
+    return INDEX_SOCIETES.rechercher(recherche, limite)
+
+
+def filtrer_conducteurs(queryset, recherche):
+    return INDEX_CONDUCTEURS.filtrer(queryset, recherche)
+
+
+def filtrer_societes(queryset, recherche):
+    return INDEX_SOCIETES.filtrer(queryset, recherche)
+
+
+def limite_resultats():
+    """Nombre de résultats classés par pertinence en tête d'une liste filtrée par la recherche"""
+    return getattr(settings, 'RECHERCHE_LIMITE_RESULTATS', 200)
+
+
+def par_pertinence(queryset, ids):
+    """
+    Place en tête de `queryset` les identifiants `ids` (résultat borné d'une
+    recherche), du plus pertinent au moins pertinent ; les autres suivent dans
+    l'ordre d'origine du queryset.
+    """
+    if not ids:
+        return queryset
+    rang = Case(
+        *[When(id=identifiant, then=position) for position, identifiant in enumerate(ids)],
+        default=len(ids),
+        output_field=IntegerField(),
+    )
+    return queryset.order_by(rang, *queryset.query.order_by)
+
+
+# --- Index global ---------------------------------------------------------
+
+# Chaque objet est rangé sous l'identifiant id * NB_CODES + code du type
+INDEX_GLOBAL = IndexTexte('suivi_conducteurs_recherche_fts', ['titre', 'details'])
+
+
+def date_limite_evaluations():
+    """Seules les évaluations postérieures à cette date figurent dans l'index global"""
+    return date.today() - timedelta(days=getattr(settings, 'RECHERCHE_EVALUATIONS_JOURS', 365))
+
+
+class TypeRecherche(ABC):
+    """Description d'un type d'objet de l'index global"""
+
+    def __init__(self, code, cle, modele, libelle, permission, select_related=()):
+        self.code = code
+        self.cle = cle
+        self.modele = modele
+        self.libelle = libelle
+        self.permission = permission
+        self.select_related = select_related
+
+    def queryset(self, models):
+        """`models` : registre d'applications (réel ou historique dans les migrations)"""
+        qs = models.get_model('suivi_conducteurs', self.modele).objects.order_by('id')
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        return qs
+
+    def lignes(self, objets):
+        for objet in objets:
+            titre, details = self.textes(objet)
+            yield objet.id * NB_CODES + self.code, {'titre': titre, 'details': details}
+
+    @abstractmethod
+    def textes(self, objet):
+        """(titre, détails) indexés et affichés"""
+
+    def resultat(self, objet):
+        """Représentation affichée dans les résultats : titre, détails, URL"""
+        titre, details = self.textes(objet)
+        return {'titre': titre, 'details': details, 'url': self.url(objet)}
+
+    @abstractmethod
+    def url(self, objet):
+        """Page de l'objet"""
+
+
+class RechercheConducteur(TypeRecherche):
+    def textes(self, c):
+        return f"{c.salnom} {c.salnom2}", f"{c.salsocid.socnom} {c.site.nom_commune}"
+
+    def url(self, c):
+        return reverse('suivi_conducteurs:conducteur_detail', args=[c.id])
+
+
+class RechercheSociete(TypeRecherche):
+    def textes(self, s):
+        return s.socnom, f"{s.soccode} {s.soccp} {s.socvillib1}"
+
+    def url(self, s):
+        return reverse('suivi_conducteurs:conducteur_list') + f'?societe={s.socid}'
+
+
+class RechercheSite(TypeRecherche):
+    def textes(self, s):
+        return s.nom_commune, s.code_postal
+
+    def url(self, s):
+        return reverse('suivi_conducteurs:conducteur_list') + f'?site={s.id}'
+
+
+class RechercheEvaluateur(TypeRecherche):
+    def textes(self, e):
+        return f"{e.prenom} {e.nom}", e.service.nom
+
+    def url(self, e):
+        return reverse('suivi_conducteurs:evaluation_list')
+
+
+class RechercheEvaluation(TypeRecherche):
+    def queryset(self, models):
+        return super().queryset(models).filter(date_evaluation__gte=date_limite_evaluations())
+
+    def textes(self, e):
+        return (
+            f"{e.conducteur.salnom} {e.conducteur.salnom2}",
+            f"{e.type_evaluation.nom} {e.date_evaluation:%d/%m/%Y} {e.evaluateur.prenom} {e.evaluateur.nom}",
+        )
+
+    def url(self, e):
+        return reverse('suivi_conducteurs:evaluation_detail', args=[e.id])
+
+
+TYPES_RECHERCHE = {
+    t.cle: t for t in [
+        RechercheConducteur(1, 'conducteur', 'Conducteur', 'Conducteurs',
+                            'suivi_conducteurs.view_conducteur', ('salsocid', 'site')),
+        RechercheSociete(2, 'societe', 'Societe', 'Sociétés', 'suivi_conducteurs.view_societe'),
+        RechercheSite(3, 'site', 'Site', 'Sites', 'suivi_conducteurs.view_site'),
+        RechercheEvaluateur(4, 'evaluateur', 'Evaluateur', 'Évaluateurs',
+                            'suivi_conducteurs.view_evaluateur', ('service',)),
+        RechercheEvaluation(5, 'evaluation', 'Evaluation', 'Évaluations récentes',
+                            'suivi_conducteurs.view_evaluation',
+                            ('conducteur', 'type_evaluation', 'evaluateur')),
+    ]
+}
+TYPES_PAR_CODE = {t.code: t for t in TYPES_RECHERCHE.values()}
+
+
+def indexer_global(cle, ids=None, conn=None, models=None):
+    """(Ré)indexe dans l'index global les objets d'un type, ou tous si ids est None"""
+    if models is None:
+        from django.apps import apps as models
+    type_recherche = TYPES_RECHERCHE[cle]
+    objets = type_recherche.queryset(models)
+    if conn is not None:
+        objets = objets.using(conn.alias)
+    if ids is not None:
+        ids = list(ids)
+        # Les objets sortis du périmètre (évaluations anciennes) sont retirés
+        retirer_global(cle, ids, conn)
+        objets = objets.filter(id__in=ids)
+    INDEX_GLOBAL.remplacer(type_recherche.lignes(objets.iterator(chunk_size=1000)), conn)
+
+
+def retirer_global(cle, ids, conn=None):
+    code = TYPES_RECHERCHE[cle].code
+    INDEX_GLOBAL.retirer([identifiant * NB_CODES + code for identifiant in ids], conn)
+
+
+def recherche_globale(recherche, user, limite_par_type=5):
+    """
+    Recherche dans l'index global, résultats groupés par type et limités aux
+    types que l'utilisateur a le droit de consulter.
+    Par type autorisé, une requête sur l'index (les meilleurs résultats de ce
+    type seulement : un type très représenté n'évince pas les autres), puis
+    une requête sur le modèle si elle a trouvé quelque chose.
+    """
+    from django.apps import apps as models
+
+    types_autorises = {
+        code: t for code, t in TYPES_PAR_CODE.items() if user.has_perm(t.permission)
+    }
+    if not types_autorises:
+        return []
+
+    groupes = []
+    for code, type_recherche in types_autorises.items():
+        identifiants = INDEX_GLOBAL.rechercher(recherche, limite=limite_par_type, code=code)
+        if identifiants is None:
+            return []
+        if not identifiants:
+            continue
+        ids = [identifiant // NB_CODES for identifiant in identifiants]
+        objets = type_recherche.queryset(models).in_bulk(ids)
+        resultats = [type_recherche.resultat(objets[i]) for i in ids if i in objets]
+        if resultats:
+            groupes.append({
+                'type': type_recherche.cle,
+                'libelle': type_recherche.libelle,
+                'resultats': resultats,
+            })
+    return groupes
@@ -0,0 +1,189 @@
+# suivi_conducteurs/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+
+from configurations import caching, evenements
+from taches.registre import mettre_en_file
+from . import scores, search, tasks
+from .flux import donnees_evaluation
+from .models import Conducteur, CritereEvaluation, Evaluateur, Evaluation, Note, Site, Societe
+
+
+def _evaluations_recentes(**filtres):
+    return Evaluation.objects.filter(
+        date_evaluation__gte=search.date_limite_evaluations(), **filtres
+    ).values_list('id', flat=True)
+
+
+def _reindexer_conducteurs(conducteurs_ids):
+    """Réindexe des conducteurs et leurs évaluations récentes (leur nom y figure)"""
+    conducteurs_ids = list(conducteurs_ids)
+    search.indexer_conducteurs(conducteurs_ids)
+    search.indexer_global('conducteur', conducteurs_ids)
+    search.indexer_global('evaluation', _evaluations_recentes(conducteur_id__in=conducteurs_ids))
+
+
+@receiver(post_save, sender=Conducteur)
+def indexer_conducteur(sender, instance, raw=False, **kwargs):
+    """Tenir les index de recherche à jour après création ou modification d'un conducteur"""
+    if raw:
+        return
+    transaction.on_commit(lambda: _reindexer_conducteurs([instance.pk]))
+
+
+@receiver(post_delete, sender=Conducteur)
+def desindexer_conducteur(sender, instance, **kwargs):
+    pk = instance.pk
+
+    def retirer():
+        search.INDEX_CONDUCTEURS.retirer([pk])
+        search.retirer_global('conducteur', [pk])
+
+    transaction.on_commit(retirer)
+
+
+@receiver(post_save, sender=Societe)
+def indexer_societe(sender, instance, raw=False, **kwargs):
+    """Réindexer la société et ses conducteurs (le nom de la société fait partie de leur index)"""
+    if raw:
+        return
+
+    def reindexer():
+        search.indexer_societes([instance.pk])
+        search.indexer_global('societe', [instance.pk])
+        _reindexer_conducteurs(
+            Conducteur.objects.filter(salsocid=instance).values_list('id', flat=True)
+        )
+
+    transaction.on_commit(reindexer)
+
+
+@receiver(post_delete, sender=Societe)
+def desindexer_societe(sender, instance, **kwargs):
+    pk = instance.pk
+
+    def retirer():
+        search.INDEX_SOCIETES.retirer([pk])
+        search.retirer_global('societe', [pk])
+
+    transaction.on_commit(retirer)
+
+
+@receiver(post_save, sender=Site)
+def indexer_site(sender, instance, raw=False, **kwargs):
+    """Réindexer le site et ses conducteurs (la commune figure dans leurs détails)"""
+    if raw:
+        return
+
+    def reindexer():
+        search.indexer_global('site', [instance.pk])
+        search.indexer_global(
+            'conducteur', Conducteur.objects.filter(site=instance).values_list('id', flat=True)
+        )
+
+    transaction.on_commit(reindexer)
+
+
+@receiver(post_save, sender=Evaluateur)
+def indexer_evaluateur(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    def reindexer():
+        search.indexer_global('evaluateur', [instance.pk])
+        search.indexer_global('evaluation', _evaluations_recentes(evaluateur_id=instance.pk))
+
+    transaction.on_commit(reindexer)
+
+
+@receiver(post_save, sender=Evaluation)
+def indexer_evaluation(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: search.indexer_global('evaluation', [instance.pk]))
+
+
+@receiver(post_delete, sender=Site)
+def desindexer_site(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: search.retirer_global('site', [pk]))
+
+
+@receiver(post_delete, sender=Evaluateur)
+def desindexer_evaluateur(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: search.retirer_global('evaluateur', [pk]))
+
+
+@receiver(post_delete, sender=Evaluation)
+def desindexer_evaluation(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: search.retirer_global('evaluation', [pk]))
+
+
+@receiver(post_save, sender=Evaluation)
+def publier_evaluation(sender, instance, created, raw=False, **kwargs):
+    """Nouvelle évaluation : ligne poussée au flux du tableau de bord, notes comprises"""
+    if raw or not created:
+        return
+    pk = instance.pk
+    evenements.publier('evaluation', lambda: donnees_evaluation(pk))
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def recalculer_score(sender, instance, raw=False, **kwargs):
+    """Score enregistré de l'évaluation recalculé après validation"""
+    if raw:
+        return
+    scores.recalculer_apres_validation(instance.evaluation_id)
+
+
+# Champs du critère qui entrent dans le calcul des scores enregistrés
+CHAMPS_SCORE_CRITERE = ('actif', 'valeur_maxi')
+
+
+@receiver(pre_save, sender=CritereEvaluation)
+def comparer_bareme_critere(sender, instance, raw=False, **kwargs):
+    """Note si la sauvegarde change l'un des champs de CHAMPS_SCORE_CRITERE"""
+    instance._bareme_modifie = False
+    if raw or instance.pk is None:
+        return
+    ancien = sender.objects.filter(pk=instance.pk).values(*CHAMPS_SCORE_CRITERE).first()
+    instance._bareme_modifie = ancien is not None and any(
+        ancien[champ] != getattr(instance, champ) for champ in CHAMPS_SCORE_CRITERE
+    )
+
+
+@receiver(post_save, sender=CritereEvaluation)
+def recalculer_scores_critere(sender, instance, created, raw=False, **kwargs):
+    """
+    Critère désactivé ou barème modifié : scores du type recalculés en tâche de
+    fond, exécutée par la commande run_worker (sans travailleur actif, les
+    scores enregistrés restent ceux de l'ancien barème).
+    """
+    if raw or created or not getattr(instance, '_bareme_modifie', False):
+        return
+    mettre_en_file(tasks.recalculer_scores, type_evaluation_id=instance.type_evaluation_id)
+
+
+@receiver(post_save, sender=Conducteur)
+@receiver(post_delete, sender=Conducteur)
+@receiver(post_save, sender=Evaluation)
+@receiver(post_delete, sender=Evaluation)
+def publier_compteurs(sender, raw=False, **kwargs):
+    """Les compteurs du tableau de bord ont changé (recalculés par le flux)"""
+    if raw:
+        return
+    evenements.publier('compteurs')
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def invalider_cache_vues(sender, raw=False, action='post_', **kwargs):
+    """Toute écriture validée incrémente la version du modèle dans le cache des vues"""
+    if raw or action.startswith('pre_'):
+        return
+    caching.modele_modifie(sender)
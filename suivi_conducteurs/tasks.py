@@ -0,0 +1,54 @@
+# suivi_conducteurs/tasks.py
+"""
+Tâches de fond de l'application (file des tâches, voir taches/registre.py).
+Mêmes traitements que les commandes refresh_echeances, snapshot_rapports et
+purge_sessions, exécutables par run_worker sans bloquer une requête, et
+recalcul des scores après modification d'un critère.
+"""
+from importlib import import_module
+
+from django.conf import settings
+
+from configurations.routage import sur_replique
+from taches.registre import progression, tache
+
+from . import rapports, scores
+from .echeances import rafraichir_echeances
+from .models import Evaluation
+
+
+@tache(priorite=5)
+def recalculer_echeances():
+    """Instantané des évaluations à planifier ; renvoie le nombre de lignes"""
+    return {'lignes': rafraichir_echeances()}
+
+
+@tache
+@sur_replique()
+def ecrire_instantane_rapports():
+    """Instantané du jour des rapports, puis purge des plus anciens"""
+    dossier = rapports.ecrire_instantane()
+    progression(90, 'Instantané écrit')
+    supprimes = rapports.purger_instantanes()
+    return {'dossier': dossier, 'supprimes': [jour.isoformat() for jour in supprimes]}
+
+
+@tache(priorite=-5)
+def purger_sessions():
+    """Sessions expirées supprimées de la base"""
+    engine = import_module(settings.SESSION_ENGINE)
+    return {'supprimees': engine.SessionStore.clear_expired()}
+
+
+@tache(priorite=5)
+def recalculer_scores(type_evaluation_id=None, taille=1000):
+    """Scores enregistrés des évaluations d'un type (toutes sans type), par lots"""
+    evaluations = Evaluation.objects.order_by('pk')
+    if type_evaluation_id is not None:
+        evaluations = evaluations.filter(type_evaluation_id=type_evaluation_id)
+    ids = list(evaluations.values_list('pk', flat=True))
+    modifies = 0
+    for debut in range(0, len(ids), taille):
+        modifies += scores.recalculer(Evaluation.objects.filter(pk__in=ids[debut:debut + taille]))
+        progression(100 * (debut + taille) // len(ids), f'{min(debut + taille, len(ids))}/{len(ids)} évaluations')
+    return {'evaluations': len(ids), 'modifies': modifies}
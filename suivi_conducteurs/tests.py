@@ -1,3 +1,495 @@
-from django.test import TestCase
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from configurations import evenements
+from taches.models import Tache
+from . import echeances, impression, rapports, search
+from .management.commands.build_assets import Command, minifier_css, minifier_js
+from .models import (
+    Conducteur, CritereEvaluation, Evaluateur, Evaluation, Note, Service, Site, Societe, TypologieEvaluation,
+)
+
+# Cache propre à chaque test, sans toucher au cache fichier de var/
+CACHE_TESTS = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-suivi'}}
+
+
+def creer_conducteur(salnom, salnom2, societe, site):
+    return Conducteur.objects.create(salnom=salnom, salnom2=salnom2, salsocid=societe, site=site)
+
+
+class EcheancesTests(TestCase):
+    """File des conducteurs à évaluer : requête directe et instantané EcheanceEvaluation"""
+
+    def setUp(self):
+        self.type_evaluation = TypologieEvaluation.objects.create(nom='Sécurité', abreviation='SE', description='')
+        service = Service.objects.create(nom='Formation', abreviation='FOR')
+        self.evaluateur = Evaluateur.objects.create(nom='Martin', prenom='Lise', service=service)
+        # Site distinct des données initiales (migration 0001)
+        self.site = Site.objects.create(nom_commune='Cestas', code_postal='33610')
+        self.societe = Societe.objects.create(
+            socid=9005, socnom='Navettes Sud', soccode='NS', soccp='33610', socvillib1='Cestas',
+        )
+        self.jamais = creer_conducteur('Aubert', 'Jean', self.societe, self.site)
+        self.ancien = creer_conducteur('Bonnet', 'Anne', self.societe, self.site)
+        self.recent = creer_conducteur('Colin', 'Paul', self.societe, self.site)
+        inactif = creer_conducteur('Dumas', 'Léa', self.societe, self.site)
+        inactif.salactif = False
+        inactif.save()
+        self.evaluer(self.ancien, date.today() - timedelta(days=800))
+        self.evaluer(self.recent, date.today() - timedelta(days=30))
+
+    def evaluer(self, conducteur, jour):
+        return Evaluation.objects.create(
+            date_evaluation=jour, evaluateur=self.evaluateur, type_evaluation=self.type_evaluation,
+            conducteur=conducteur,
+        )
+
+    def ids(self, conducteurs):
+        return [conducteur.id for conducteur in conducteurs]
+
+    def test_date_seuil_bornee_a_la_fin_du_mois(self):
+        self.assertEqual(echeances.date_seuil(1, date(2024, 3, 31)), date(2024, 2, 29))
+        self.assertEqual(echeances.date_seuil(14, date(2024, 1, 15)), date(2022, 11, 15))
+
+    def test_requete_directe(self):
+        conducteurs = echeances.conducteurs_a_evaluer(self.type_evaluation, 12, site=self.site.id)
+        # Jamais évalués d'abord, conducteurs inactifs exclus
+        self.assertEqual(self.ids(conducteurs), [self.jamais.id, self.ancien.id])
+        self.assertIsNone(conducteurs[0].derniere_evaluation)
+        self.assertEqual(
+            self.ids(echeances.conducteurs_a_evaluer(self.type_evaluation, 36, societe=self.societe.socid)),
+            [self.jamais.id],
+        )
+
+    def test_instantane(self):
+        self.assertFalse(echeances.instantane_valide(echeances.date_dernier_instantane()))
+        echeances.rafraichir_echeances()
+        self.assertTrue(echeances.instantane_valide(echeances.date_dernier_instantane()))
+        self.assertEqual(
+            self.ids(echeances.conducteurs_a_evaluer_instantane(self.type_evaluation, 12, site=self.site.id)),
+            [self.jamais.id, self.ancien.id],
+        )
+        # Évaluation postérieure au calcul : seule la requête directe en tient compte
+        self.evaluer(self.jamais, date.today())
+        self.assertEqual(
+            self.ids(echeances.conducteurs_a_evaluer_instantane(self.type_evaluation, 12, site=self.site.id)),
+            [self.jamais.id, self.ancien.id],
+        )
+        self.assertEqual(
+            self.ids(echeances.conducteurs_a_evaluer(self.type_evaluation, 12, site=self.site.id)),
+            [self.ancien.id],
+        )
+
+    @override_settings(ECHEANCES_VALIDITE_HEURES=1)
+    def test_instantane_perime(self):
+        self.assertTrue(echeances.instantane_valide(timezone.now() - timedelta(minutes=30)))
+        self.assertFalse(echeances.instantane_valide(timezone.now() - timedelta(hours=2)))
+
+    def test_page_source_et_liens(self):
+        for i in range(50):
+            creer_conducteur('Ernoult', f'Conducteur {i}', self.societe, self.site)
+        echeances.rafraichir_echeances()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw'))
+        url = reverse('suivi_conducteurs:evaluations_a_planifier')
+        filtres = {'type_evaluation': self.type_evaluation.id, 'mois': 12, 'site': self.site.id}
+
+        response = self.client.get(url, filtres)
+        self.assertEqual(response.context['source'], 'instantane')
+        self.assertEqual(response.context['page_obj'].paginator.count, 52)
+
+        response = self.client.get(url, {**filtres, 'live': 1})
+        self.assertEqual(response.context['source'], 'direct')
+        # Page suivante en temps réel, avec les mêmes filtres
+        suivante = re.search(r'href="([^"]*page=2[^"]*)"', response.content.decode()).group(1)
+        self.assertIn('live=1', suivante)
+        self.assertIn(f'site={self.site.id}', suivante)
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class RechercheTests(TestCase):
+    """Index plein texte (FTS5 sous SQLite, tsvector sous PostgreSQL) tenu à jour par les signaux"""
+
+    def setUp(self):
+        cache.clear()
+        # Indexation faite à la validation de la transaction (signaux)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site = Site.objects.create(nom_commune='Mérignac', code_postal='33700')
+            # Identifiants et noms distincts des données initiales (migration 0001)
+            self.societe = Societe.objects.create(
+                socid=9001, socnom='Transports Étoile', soccode='TE', soccp='33000', socvillib1='Bordeaux',
+            )
+            self.helene = creer_conducteur('Dupré', 'Hélène', self.societe, self.site)
+            self.marc = creer_conducteur('Quintal', 'Marc', self.societe, self.site)
+
+    def test_recherche_insensible_aux_accents(self):
+        self.assertEqual(search.rechercher_conducteurs('helene'), [self.helene.id])
+        self.assertEqual(search.rechercher_conducteurs('DUPRE'), [self.helene.id])
+        self.assertEqual(search.rechercher_societes('etoile'), [self.societe.id])
+
+    def test_recherche_par_prefixe_et_tous_les_termes(self):
+        self.assertEqual(search.rechercher_conducteurs('hel dup'), [self.helene.id])
+        self.assertEqual(search.rechercher_conducteurs('hel quintal'), [])
+        # Nom de la société indexé avec le conducteur
+        self.assertCountEqual(search.rechercher_conducteurs('etoi'), [self.helene.id, self.marc.id])
+
+    def test_saisie_sans_terme(self):
+        self.assertEqual(search.rechercher_conducteurs('"*()'), [])
+
+    def test_limite(self):
+        self.assertEqual(len(search.rechercher_conducteurs('etoile', limite=1)), 1)
+
+    def test_modification_et_suppression_reindexees(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.marc.salnom = 'Lefèvre'
+            self.marc.save()
+        self.assertEqual(search.rechercher_conducteurs('lefevre'), [self.marc.id])
+        self.assertEqual(search.rechercher_conducteurs('quintal'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.marc.delete()
+        self.assertEqual(search.rechercher_conducteurs('lefevre'), [])
+
+    def test_renommage_de_la_societe_reindexe_ses_conducteurs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.societe.socnom = 'Autocars Océan'
+            self.societe.save()
+        self.assertCountEqual(search.rechercher_conducteurs('ocean'), [self.helene.id, self.marc.id])
+
+    def test_par_pertinence_en_tete(self):
+        conducteurs = Conducteur.objects.filter(salsocid=self.societe).order_by('salnom')
+        ids = [self.marc.id, self.helene.id]
+        self.assertEqual([c.id for c in search.par_pertinence(conducteurs, ids)], ids)
+        # Au-delà des identifiants classés : ordre d'origine
+        self.assertEqual([c.id for c in search.par_pertinence(conducteurs, [])], [self.helene.id, self.marc.id])
+
+    def test_filtrer_sans_terme(self):
+        self.assertEqual(list(search.filtrer_conducteurs(Conducteur.objects.all(), '"*()')), [])
+
+    def test_liste_des_conducteurs_filtree(self):
+        admin = User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('suivi_conducteurs:conducteur_list'), {'search': 'hélène'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [ligne['conducteur'].id for ligne in response.context['conducteurs_with_stats']],
+            [self.helene.id],
+        )
+
+    @override_settings(RECHERCHE_LIMITE_RESULTATS=3)
+    def test_liste_filtree_au_dela_de_la_limite(self):
+        # Plus de résultats que RECHERCHE_LIMITE_RESULTATS, répartis sur deux sociétés
+        with self.captureOnCommitCallbacks(execute=True):
+            nord = Societe.objects.create(
+                socid=9004, socnom='Cars du Nord', soccode='CN', soccp='33000', socvillib1='Bordeaux',
+            )
+            attendus = []
+            for i in range(4):
+                creer_conducteur('Vernier', f'Étoile {i}', self.societe, self.site)
+                attendus.append(creer_conducteur('Vernier', f'Nord {i}', nord, self.site).id)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw'))
+        response = self.client.get(
+            reverse('suivi_conducteurs:conducteur_list'), {'search': 'vernier', 'societe': nord.socid},
+        )
+        self.assertCountEqual(
+            [ligne['conducteur'].id for ligne in response.context['conducteurs_with_stats']], attendus,
+        )
+        self.assertEqual(response.context['total_count'], 4)
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class RechercheGlobaleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            site = Site.objects.create(nom_commune='Zorgnac', code_postal='33127')
+            societe = Societe.objects.create(
+                socid=9002, socnom='Lignes Zeta', soccode='LZ', soccp='33000', socvillib1='Bordeaux',
+            )
+            # Bien plus de conducteurs que de résultats demandés par type
+            for i in range(30):
+                creer_conducteur('Zorglub', f'Conducteur {i}', societe, site)
+        self.site = site
+
+    def utilisateur(self, *codenames):
+        user = User.objects.create_user('lecteur', password='pw')
+        user.user_permissions.set(Permission.objects.filter(codename__in=codenames))
+        return User.objects.get(pk=user.pk)
+
+    def test_chaque_type_a_ses_resultats(self):
+        admin = User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw')
+        groupes = {g['type']: g for g in search.recherche_globale('zorg', admin, limite_par_type=2)}
+        self.assertEqual(len(groupes['conducteur']['resultats']), 2)
+        # Le site n'est pas évincé par les conducteurs, plus nombreux
+        self.assertEqual(groupes['site']['resultats'][0]['titre'], 'Zorgnac')
+
+    def test_types_limites_aux_permissions(self):
+        user = self.utilisateur('view_site')
+        groupes = search.recherche_globale('zorg', user)
+        self.assertEqual([g['type'] for g in groupes], ['site'])
+        self.assertEqual(
+            groupes[0]['resultats'][0]['url'],
+            reverse('suivi_conducteurs:conducteur_list') + f'?site={self.site.id}',
+        )
+
+    def test_sans_permission(self):
+        self.assertEqual(search.recherche_globale('zorg', self.utilisateur()), [])
+
+    def test_type_abstrait(self):
+        with self.assertRaises(TypeError):
+            search.TypeRecherche(6, 'autre', 'Site', 'Autres', 'suivi_conducteurs.view_site')
+
+
+class MinificationTests(SimpleTestCase):
+    """Bundles statiques de build_assets"""
+
+    def test_commentaires_js(self):
+        source = '/**\n * Documentation\n */\n    const a = 1;\n\n    // seul sur sa ligne\n    f(a);\n'
+        self.assertEqual(minifier_js(source), 'const a = 1;\nf(a);')
+
+    def test_code_apres_un_commentaire_ferme_sur_la_ligne(self):
+        self.assertEqual(minifier_js('/* a */ init();\nsuite();'), 'init();\nsuite();')
+        self.assertEqual(minifier_js('/* a\n b */ init();\nsuite();'), 'init();\nsuite();')
+
+    def test_css(self):
+        self.assertEqual(minifier_css('/* titre */\nh1 {\n  color: red;\n}\n'), 'h1{color: red;}')
+
+    def test_declarations_en_double(self):
+        contenus = [('a.js', 'const Table = 1;\n'), ('b.js', 'function Table() {}\n')]
+        with self.assertRaisesMessage(CommandError, 'Table déclaré dans a.js et b.js'):
+            Command().verifier_doublons('essai', contenus)
+
+
+@override_settings(CACHES=CACHE_TESTS, RAPPORTS_CONSERVATION_JOURS=30)
+class RapportsTests(TestCase):
+    """Instantanés nocturnes des rapports, écrits puis relus sur disque"""
+
+    def setUp(self):
+        cache.clear()
+        dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dossier)
+        self.enterContext(override_settings(RAPPORTS_DOSSIER=dossier))
+        self.dossier = dossier
+
+    def test_instantane_ecrit_puis_relu(self):
+        dossier = rapports.ecrire_instantane()
+        self.assertCountEqual(os.listdir(dossier), rapports.FICHIERS)
+        contexte = rapports.lire_statistiques()
+        self.assertEqual(contexte['stats']['total_sites'], Site.objects.count())
+        self.assertIsInstance(contexte['genere_le'], datetime)
+
+    def test_sans_instantane(self):
+        self.assertIsNone(rapports.lire_statistiques())
+        self.assertIsNone(rapports.chemin_instantane('statistiques.json'))
+
+    def test_commande_et_purge(self):
+        ancien = date.today() - timedelta(days=31)
+        os.makedirs(os.path.join(self.dossier, ancien.isoformat()))
+        os.makedirs(os.path.join(self.dossier, 'autre'))
+        sortie = StringIO()
+        call_command('snapshot_rapports', stdout=sortie)
+        self.assertIn(f'Instantané du {ancien.isoformat()} supprimé', sortie.getvalue())
+        self.assertEqual(rapports.jours_disponibles(), [date.today()])
+
+    def test_page_des_statistiques(self):
+        rapports.ecrire_instantane()
+        Site.objects.create(nom_commune='Talence', code_postal='33400')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw'))
+        url = reverse('suivi_conducteurs:statistiques')
+
+        response = self.client.get(url)
+        self.assertTrue(response.context['instantane'])
+        self.assertEqual(response.context['stats']['total_sites'], Site.objects.count() - 1)
+
+        response = self.client.get(url, {'live': 1})
+        self.assertNotIn('instantane', response.context)
+        self.assertEqual(response.context['stats']['total_sites'], Site.objects.count())
+
+    def test_fichier_d_instantane(self):
+        rapports.ecrire_instantane()
+        self.client.force_login(User.objects.create_user('lecteur', password='pw'))
+        response = self.client.get(reverse('suivi_conducteurs:rapport_instantane', args=['sites.json']))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('sites', json.loads(b''.join(response.streaming_content)))
+        for fichier, params in (('inconnu.json', {}), ('sites.json', {'date': '2001-01-01'})):
+            response = self.client.get(reverse('suivi_conducteurs:rapport_instantane', args=[fichier]), params)
+            self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CACHES=CACHE_TESTS, EVENEMENTS_RECONNEXION_WSGI=30000)
+class FluxEvenementsTests(TestCase):
+    """Journal d'événements et flux SSE du tableau de bord, servi sous WSGI"""
+
+    def setUp(self):
+        cache.clear()
+
+    def publier(self, type_evenement, donnees=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            evenements.publier(type_evenement, donnees)
+        return evenements.dernier_numero()
+
+    def test_publication_a_la_validation(self):
+        with self.captureOnCommitCallbacks() as rappels:
+            evenements.publier('evaluation', lambda: {'id': 1})
+        self.assertEqual(evenements.dernier_numero(), 0)
+        rappels[0]()
+        self.assertEqual(evenements.lire_depuis(0), ([(1, {'type': 'evaluation', 'donnees': {'id': 1}})], 1))
+        self.assertEqual(evenements.lire_depuis(1), ([], 1))
+
+    @override_settings(EVENEMENTS_MAX_LOT=2)
+    def test_connexion_en_retard(self):
+        for numero in range(3):
+            self.publier('evaluation', {'id': numero})
+        lot, dernier = evenements.lire_depuis(0)
+        self.assertEqual(([n for n, _ in lot], dernier), ([2, 3], 3))
+
+    def test_non_connecte(self):
+        self.assertEqual(self.client.get(reverse('suivi_conducteurs:flux_evenements')).status_code, 401)
+
+    def test_reponse_courte(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw'))
+        url = reverse('suivi_conducteurs:flux_evenements')
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        contenu = response.content.decode()
+        self.assertTrue(contenu.startswith('retry: 30000\n\n'))
+        self.assertIn('event: compteurs', contenu)
+
+        numero = self.publier('evaluation', {'id': 7})
+        contenu = self.client.get(url, HTTP_LAST_EVENT_ID=str(numero - 1)).content.decode()
+        self.assertIn(f'id: {numero}\nevent: evaluation\ndata: {{"id": 7}}', contenu)
+        self.assertNotIn('event: compteurs', contenu)
+
+    def test_evenements_reserves_aux_permissions(self):
+        self.client.force_login(User.objects.create_user('lecteur', password='pw'))
+        numero = self.publier('evaluation', {'id': 7})
+        contenu = self.client.get(
+            reverse('suivi_conducteurs:flux_evenements'), HTTP_LAST_EVENT_ID=str(numero - 1),
+        ).content.decode()
+        self.assertNotIn('event: evaluation', contenu)
+        # Last-Event-ID avancé malgré tout
+        self.assertIn(f'id: {numero}\n\n', contenu)
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class RecalculScoresCritereTests(TestCase):
+    """Recalcul des scores mis en file seulement si le barème du critère change"""
+
+    def setUp(self):
+        type_evaluation = TypologieEvaluation.objects.create(nom='Conduite', abreviation='CD', description='')
+        self.critere = CritereEvaluation.objects.create(
+            nom='Freinage', type_evaluation=type_evaluation, valeur_mini=0, valeur_maxi=5,
+        )
+        service = Service.objects.create(nom='Exploitation', abreviation='EXP')
+        evaluateur = Evaluateur.objects.create(nom='Durand', prenom='Paul', service=service)
+        site = Site.objects.create(nom_commune='Pessac', code_postal='33600')
+        societe = Societe.objects.create(socid=9003, socnom='TP', soccode='TP', soccp='33600', socvillib1='Pessac')
+        Evaluation.objects.create(
+            date_evaluation=date.today(), evaluateur=evaluateur, type_evaluation=type_evaluation,
+            conducteur=creer_conducteur('Petit', 'Luc', societe, site),
+        )
+
+    def recalculs(self):
+        return Tache.objects.filter(nom='suivi_conducteurs.tasks.recalculer_scores').count()
+
+    def test_renommage_sans_recalcul(self):
+        self.critere.nom = 'Freinage doux'
+        self.critere.save()
+        self.assertEqual(self.recalculs(), 0)
+
+    def test_bareme_modifie(self):
+        self.critere.valeur_maxi = 10
+        self.critere.save()
+        self.critere.actif = False
+        self.critere.save()
+        self.assertEqual(self.recalculs(), 2)
+        self.assertEqual(
+            Tache.objects.filter(nom='suivi_conducteurs.tasks.recalculer_scores').first().arguments,
+            {'args': [], 'kwargs': {'type_evaluation_id': self.critere.type_evaluation_id}},
+        )
+
+
+@override_settings(CACHES=CACHE_TESTS, IMPRESSION_TAILLE_LOT=2)
+class ImpressionTests(TestCase):
+    """Dossiers d'impression rendus lot par lot"""
+
+    def setUp(self):
+        cache.clear()
+        self.type_evaluation = TypologieEvaluation.objects.create(nom='Éco-conduite', abreviation='EC', description='')
+        self.critere = CritereEvaluation.objects.create(
+            nom='Anticipation', type_evaluation=self.type_evaluation, valeur_mini=0, valeur_maxi=4,
+        )
+        service = Service.objects.create(nom='Qualité', abreviation='QUA')
+        self.evaluateur = Evaluateur.objects.create(nom='Roux', prenom='Marie', service=service)
+        self.site = Site.objects.create(nom_commune='Blanquefort', code_postal='33290')
+        societe = Societe.objects.create(
+            socid=9006, socnom='Lignes Ouest', soccode='LO', soccp='33290', socvillib1='Blanquefort',
+        )
+        self.conducteurs = [creer_conducteur(nom, 'Alex', societe, self.site) for nom in ('Valette', 'Barre', 'Morin')]
+        self.evaluations = [self.evaluer(conducteur, date(2026, 3, 2)) for conducteur in self.conducteurs]
+
+    def evaluer(self, conducteur, jour):
+        evaluation = Evaluation.objects.create(
+            date_evaluation=jour, evaluateur=self.evaluateur, type_evaluation=self.type_evaluation,
+            conducteur=conducteur,
+        )
+        Note.objects.create(evaluation=evaluation, critere=self.critere, valeur=3)
+        return evaluation
+
+    def test_selection(self):
+        ancienne = self.evaluer(self.conducteurs[0], date(2025, 3, 2))
+        # Ordre du document : site, conducteur, date
+        self.assertEqual(
+            impression.selection(site=self.site.id),
+            [self.evaluations[1].pk, self.evaluations[2].pk, ancienne.pk, self.evaluations[0].pk],
+        )
+        self.assertEqual(len(impression.selection(site=self.site.id, du=date(2026, 1, 1))), 3)
+
+    def test_references_perimees(self):
+        perimees = impression.references()
+        # Critère créé après le calcul des références, servies périmées pendant leur recalcul
+        critere = CritereEvaluation.objects.create(
+            nom='Freinage souple', type_evaluation=self.type_evaluation, valeur_mini=0, valeur_maxi=5,
+        )
+        Note.objects.create(evaluation=self.evaluations[0], critere=critere, valeur=5)
+        with mock.patch.object(impression, 'references', return_value=perimees):
+            html = impression.rendre_lot([self.evaluations[0].pk])
+        self.assertIn('Freinage souple', html)
+        self.assertIn('75%', html)
+
+    def test_vue_en_flux(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw'))
+        ids = ','.join(str(evaluation.pk) for evaluation in self.evaluations)
+        response = self.client.get(reverse('suivi_conducteurs:impression_evaluations'), {'ids': ids})
+        self.assertTrue(response.streaming)
+        contenu = b''.join(response.streaming_content).decode()
+        self.assertEqual(contenu.count('<section class="fiche">'), 3)
+
+    @override_settings(IMPRESSION_MAX_FICHES=2)
+    def test_vue_au_dela_du_maximum(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.fr', 'pw'))
+        response = self.client.get(reverse('suivi_conducteurs:impression_evaluations'), {'site': self.site.id})
+        self.assertRedirects(response, reverse('suivi_conducteurs:evaluation_list'), fetch_redirect_response=False)
+
+    def test_commande(self):
+        dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dossier)
+        sortie = os.path.join(dossier, 'dossier.html')
+        call_command('imprimer_evaluations', site=self.site.id, processus=1, sortie=sortie, stdout=StringIO())
+        with open(sortie, encoding='utf-8') as fichier:
+            self.assertEqual(fichier.read().count('<section class="fiche">'), 3)
@@ -1,6 +1,6 @@
 # urls.py
 from django.urls import path
-from . import views
+from . import flux, views
 
 # Nom de l'application pour les namespaces
 app_name = 'suivi_conducteurs'
@@ -12,16 +12,21 @@ urlpatterns = [
      
     # Page d'accueil (optionnel)
     path('', views.dashboard, name='dashboard'),
+    path('evenements/', flux.flux_evenements, name='flux_evenements'),
     
     # Évaluations
     path('evaluations/', views.evaluation_list, name='evaluation_list'),
     path('evaluations/create/', views.create_evaluation, name='create_evaluation'),
     path('evaluations/submit/', views.submit_evaluation, name='submit_evaluation'),
     path('evaluations/<int:pk>/', views.evaluation_detail, name='evaluation_detail'),
+    path('evaluations/impression/', views.impression_evaluations, name='impression_evaluations'),
+    path('evaluations/a-planifier/', views.evaluations_a_planifier, name='evaluations_a_planifier'),
+    path('evaluations/a-planifier/api/', views.api_evaluations_a_planifier, name='api_evaluations_a_planifier'),
 
     # Conducteurs - NOUVELLES ROUTES
     path('conducteurs/', views.conducteur_list, name='conducteur_list'),
     path('conducteurs/<int:pk>/', views.conducteur_detail, name='conducteur_detail'),
+    path('conducteurs/autocomplete/', views.conducteur_autocomplete, name='conducteur_autocomplete'),
     
     # Sociétés - NOUVELLES ROUTES
     path('societes/', views.societe_list, name='societe_list'),
@@ -31,7 +36,12 @@ urlpatterns = [
     
     # Statistiques - NOUVELLE ROUTE
     path('statistiques/', views.statistiques_view, name='statistiques'),
+    path('rapports/<str:fichier>', views.rapport_instantane, name='rapport_instantane'),
     
+    # Recherche globale
+    path('recherche/', views.recherche, name='recherche'),
+    path('recherche/api/', views.api_recherche, name='api_recherche'),
+
     # HTMX endpoints
     path('evaluations/load-criteres/', views.load_criteres_htmx, name='load_criteres_htmx'),
     path('evaluations/validate-field/', views.validate_field_htmx, name='validate_field_htmx'),
@@ -2,7 +2,11 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 from django.core.exceptions import ValidationError
@@ -15,19 +19,33 @@ from .models import (
     CritereEvaluation, Evaluation, Note, Societe, Site, Service
 )
 from .forms import EvaluationForm
+from . import echeances, impression, rapports
+from .search import (
+    filtrer_conducteurs, filtrer_societes, limite_resultats, par_pertinence, rechercher_conducteurs,
+    rechercher_societes, recherche_globale,
+)
+from configurations import caching
+from configurations.caching import cache_par_permissions, conditionnel
+
+# Modèles lus par les vues mises en cache ou servies en 304 : toute écriture
+# sur l'un d'eux change la version, donc la clé de cache et l'ETag
+MODELES_EVALUATIONS = (
+    Evaluation, Note, CritereEvaluation, TypologieEvaluation, Evaluateur, Conducteur, Societe, Site
+)
+MODELES_CONDUCTEURS = (Conducteur, Societe, Site, Evaluation, Note, CritereEvaluation)
+MODELES_SOCIETES = (Societe, Conducteur)
+MODELES_SITES = (Site, Conducteur, Societe)
+MODELES_STATISTIQUES = (
+    Conducteur, Evaluation, Note, CritereEvaluation, Societe, Site, TypologieEvaluation
+)
+MODELES_RECHERCHE = (Conducteur, Societe, Site, Evaluateur, Evaluation, TypologieEvaluation)
 
 
 @login_required
 def dashboard(request):
     """Page d'accueil du module de suivi des conducteurs"""
-    from datetime import date, timedelta
-    
-    # Statistiques rapides
-    total_conducteurs = Conducteur.objects.filter(salactif=True).count() if request.user.has_perm('suivi_conducteurs.view_conducteur') else 0
-    total_evaluations = Evaluation.objects.count() if request.user.has_perm('suivi_conducteurs.view_evaluation') else 0
-    evaluations_ce_mois = Evaluation.objects.filter(
-        date_evaluation__gte=date.today().replace(day=1)
-    ).count() if request.user.has_perm('suivi_conducteurs.view_evaluation') else 0
+    # Statistiques rapides (comptages concurrents sur PostgreSQL)
+    compteurs = rapports.compteurs_dashboard(request.user)
     
     # Évaluations récentes (si permission)
     evaluations_recentes = []
@@ -37,15 +55,31 @@ def dashboard(request):
         ).order_by('-date_evaluation')[:5]
     
     context = {
-        'total_conducteurs': total_conducteurs,
-        'total_evaluations': total_evaluations,
-        'evaluations_ce_mois': evaluations_ce_mois,
+        **compteurs,
         'evaluations_recentes': evaluations_recentes,
         'user': request.user,
     }
     return render(request, 'suivi_conducteurs/dashboard.html', context)
 
 
+def _evaluateurs_disponibles():
+    """
+    Évaluateurs des groupes RH et Exploitation, avec leurs groupes préchargés.
+    La liste est mise en cache jusqu'au prochain changement de groupes ou
+    d'évaluateurs.
+    """
+    cle = 'evaluateurs_disponibles:{}:{}:{}'.format(
+        caching.version_droits(), *caching.versions(Evaluateur, Service)
+    )
+
+    def charger():
+        return list(Evaluateur.objects.filter(
+            user__groups__name__in=['RH', 'Exploitation']
+        ).select_related('service', 'user').prefetch_related('user__groups__groupe_etendu').distinct())
+
+    return cache.get_or_set(cle, charger, getattr(settings, 'CACHE_VUES_DUREE', 300))
+
+
 @login_required
 def create_evaluation(request):
     """Vue principale pour créer une évaluation"""
@@ -57,9 +91,7 @@ def create_evaluation(request):
     # ).select_related('service').order_by('service__nom', 'nom', 'prenom')
 
     # Filtrer les évaluateurs pour ne garder que ceux des groupes RH et Exploitation
-    evaluateurs = Evaluateur.objects.filter(
-        user__groups__name__in=['RH', 'Exploitation']
-    ).select_related('service', 'user').prefetch_related('user__groups__groupe_etendu').distinct()
+    evaluateurs = _evaluateurs_disponibles()
 
     evaluateur_connecte = None
     if hasattr(request.user, 'evaluateur'):
@@ -273,8 +305,59 @@ def evaluation_detail(request, pk):
     return render(request, 'suivi_conducteurs/evaluation_detail.html', context)
 
 
+def _criteres_impression(params):
+    """Critères de sélection du dossier d'impression lus dans la requête (ValueError si invalides)"""
+    criteres = {}
+    if params.get('ids'):
+        criteres['ids'] = [int(pk) for pk in params['ids'].split(',') if pk.strip()]
+    for nom in ('site', 'type_evaluation', 'conducteur'):
+        if params.get(nom):
+            criteres[nom] = int(params[nom])
+    for nom in ('du', 'au'):
+        if params.get(nom):
+            criteres[nom] = date.fromisoformat(params[nom])
+    return criteres
+
+
 @login_required
 @permission_required('suivi_conducteurs.view_evaluation', raise_exception=True)
+def impression_evaluations(request):
+    """
+    Fiches imprimables de plusieurs évaluations en un seul document :
+    ?ids=1,2,3 ou ?site=&du=&au= (et type_evaluation, conducteur).
+    """
+    try:
+        criteres = _criteres_impression(request.GET)
+    except ValueError:
+        messages.error(request, "Critères d'impression invalides.")
+        return redirect('suivi_conducteurs:evaluation_list')
+    if not criteres:
+        messages.error(request, "Sélectionnez des évaluations, ou un site ou une période, à imprimer.")
+        return redirect('suivi_conducteurs:evaluation_list')
+
+    ids = impression.selection(**criteres)
+    if not ids:
+        messages.warning(request, "Aucune évaluation ne correspond à ces critères.")
+        return redirect('suivi_conducteurs:evaluation_list')
+    maximum = getattr(settings, 'IMPRESSION_MAX_FICHES', 500)
+    if len(ids) > maximum:
+        messages.error(
+            request,
+            f"{len(ids)} évaluations sélectionnées : au-delà de {maximum}, "
+            f"utilisez la commande imprimer_evaluations.",
+        )
+        return redirect('suivi_conducteurs:evaluation_list')
+
+    # Document transmis lot par lot, à mesure du rendu
+    return StreamingHttpResponse(
+        impression.flux(ids, impression.titre(criteres)),
+        content_type='text/html; charset=utf-8',
+    )
+
+
+@login_required
+@permission_required('suivi_conducteurs.view_evaluation', raise_exception=True)
+@conditionnel(*MODELES_EVALUATIONS)
 def evaluation_list(request):
     """Liste des évaluations avec filtres et scores"""
     # Requête de base avec les relations nécessaires
@@ -320,6 +403,7 @@ def evaluation_list(request):
         'evaluations_with_scores': evaluations_with_scores,
         'conducteurs': Conducteur.objects.filter(salactif=True),
         'types_evaluation': TypologieEvaluation.objects.all(),
+        'sites': Site.objects.all(),
         'selected_conducteur_id': conducteur_filter_id,
         'selected_type_id': type_filter_id,
     }
@@ -331,6 +415,7 @@ def evaluation_list(request):
 
 @login_required
 @permission_required('suivi_conducteurs.view_conducteur', raise_exception=True)
+@conditionnel(*MODELES_CONDUCTEURS)
 def conducteur_list(request):
     """Liste des conducteurs avec filtres"""
     # Récupération des paramètres de filtre
@@ -348,12 +433,17 @@ def conducteur_list(request):
     
     # Application des filtres
     if search:
-        from django.db.models import Q
-        conducteurs = conducteurs.filter(
-            Q(salnom__icontains=search) |
-            Q(salnom2__icontains=search) |
-            Q(salsocid__socnom__icontains=search)
-        )
+        # Index plein texte (insensible aux accents), repli sur icontains sinon
+        # Tous les résultats de l'index, les plus pertinents en tête
+        filtres = filtrer_conducteurs(conducteurs, search)
+        if filtres is not None:
+            conducteurs = par_pertinence(filtres, rechercher_conducteurs(search, limite_resultats()))
+        else:
+            conducteurs = conducteurs.filter(
+                Q(salnom__icontains=search) |
+                Q(salnom2__icontains=search) |
+                Q(salsocid__socnom__icontains=search)
+            )
     
     if societe_filter:
         try:
@@ -416,6 +506,43 @@ def conducteur_list(request):
     return render(request, 'suivi_conducteurs/conducteur_list.html', context)
 
 
+@login_required
+@permission_required('suivi_conducteurs.view_conducteur', raise_exception=True)
+def conducteur_autocomplete(request):
+    """Autocomplétion des conducteurs (JSON), classée par pertinence"""
+    recherche = request.GET.get('q', '').strip()
+    if len(recherche) < 2:
+        return JsonResponse({'resultats': []})
+
+    conducteurs = Conducteur.objects.select_related('salsocid', 'site')
+    if request.GET.get('actifs') == '1':
+        conducteurs = conducteurs.filter(salactif=True)
+
+    ids = rechercher_conducteurs(recherche, limite=20)
+    if ids is not None:
+        par_id = conducteurs.in_bulk(ids)
+        resultats = [par_id[i] for i in ids if i in par_id]
+    else:
+        resultats = list(conducteurs.filter(
+            Q(salnom__icontains=recherche) |
+            Q(salnom2__icontains=recherche) |
+            Q(salsocid__socnom__icontains=recherche)
+        ).order_by('salnom', 'salnom2')[:20])
+
+    return JsonResponse({
+        'resultats': [
+            {
+                'id': conducteur.id,
+                'label': f"{conducteur.nom_complet} - {conducteur.salsocid.socnom}",
+                'societe': conducteur.salsocid.socnom,
+                'site': conducteur.site.nom_commune,
+                'actif': conducteur.salactif,
+            }
+            for conducteur in resultats
+        ]
+    })
+
+
 @login_required
 @permission_required('suivi_conducteurs.view_conducteur', raise_exception=True)
 def conducteur_detail(request, pk):
@@ -470,6 +597,8 @@ def conducteur_detail(request, pk):
 
 @login_required
 @permission_required('suivi_conducteurs.view_societe', raise_exception=True)
+@conditionnel(*MODELES_SOCIETES)
+@cache_par_permissions(*MODELES_SOCIETES)
 def societe_list(request):
     """Liste des sociétés"""
     search = request.GET.get('search', '')
@@ -478,12 +607,15 @@ def societe_list(request):
     societes = Societe.objects.all().order_by('socnom')
     
     if search:
-        from django.db.models import Q
-        societes = societes.filter(
-            Q(socnom__icontains=search) |
-            Q(soccode__icontains=search) |
-            Q(socvillib1__icontains=search)
-        )
+        filtres = filtrer_societes(societes, search)
+        if filtres is not None:
+            societes = par_pertinence(filtres, rechercher_societes(search, limite_resultats()))
+        else:
+            societes = societes.filter(
+                Q(socnom__icontains=search) |
+                Q(soccode__icontains=search) |
+                Q(socvillib1__icontains=search)
+            )
     
     if statut_filter == 'actif':
         societes = societes.filter(socactif=True)
@@ -508,7 +640,7 @@ def societe_list(request):
         'statut_filter': statut_filter,
         'total_count': len(societes_with_stats),
     }
-    return render(request, 'suivi_conducteurs/societe_list.html', context)
+    return TemplateResponse(request, 'suivi_conducteurs/societe_list.html', context)
 
 
 # @login_required
@@ -546,7 +678,9 @@ def societe_list(request):
 #     return render(request, 'suivi_conducteurs/site_list.html', context)
 
 @login_required
-@permission_required('suivi_conducteurs.view_site', raise_exception=True) 
+@permission_required('suivi_conducteurs.view_site', raise_exception=True)
+@conditionnel(*MODELES_SITES)
+@cache_par_permissions(*MODELES_SITES)
 def site_list(request):
     """Version optimisée de la liste des sites avec annotations"""
     
@@ -642,100 +776,51 @@ def site_list(request):
         'code_postal_filter': code_postal_filter,
     }
     
-    return render(request, 'suivi_conducteurs/site_list.html', context)
+    return TemplateResponse(request, 'suivi_conducteurs/site_list.html', context)
+
+
+@conditionnel(*MODELES_STATISTIQUES)
+@cache_par_permissions(*MODELES_STATISTIQUES)
+def _statistiques_direct(request):
+    """Statistiques calculées à la demande"""
+    contexte = rapports.calculer_statistiques()
+    return TemplateResponse(request, 'suivi_conducteurs/statistiques.html', contexte)
+
 
+@login_required
 def statistiques_view(request):
-    """Vue des statistiques globales"""
-    # Statistiques de base
-    stats = {
-        'total_conducteurs': Conducteur.objects.filter(salactif=True).count(),
-        'total_evaluations': Evaluation.objects.count(),
-        'total_societes': Societe.objects.filter(socactif=True).count(),
-        'total_sites': Site.objects.count(),
-    }
-    
-    # Statistiques des conducteurs par catégorie
-    conducteurs_stats = {
-        'total_actifs': Conducteur.objects.filter(salactif=True).count(),
-        'total_inactifs': Conducteur.objects.filter(salactif=False).count(),
-        'interim': Conducteur.objects.filter(salactif=True, interim_p=True).count(),
-        'sous_traitants': Conducteur.objects.filter(salactif=True, sous_traitant_p=True).count(),
-        'permanents': Conducteur.objects.filter(salactif=True, interim_p=False, sous_traitant_p=False).count(),
-    }
-    
-    # Conducteurs par site
-    conducteurs_par_site = []
-    for site in Site.objects.all():
-        count_actifs = Conducteur.objects.filter(site=site, salactif=True).count()
-        count_total = Conducteur.objects.filter(site=site).count()
-        if count_total > 0:
-            conducteurs_par_site.append({
-                'site': site,
-                'actifs': count_actifs,
-                'total': count_total,
-                'inactifs': count_total - count_actifs
-            })
-    
-    # Conducteurs par société
-    conducteurs_par_societe = []
-    for societe in Societe.objects.filter(socactif=True):
-        count_actifs = Conducteur.objects.filter(salsocid=societe, salactif=True).count()
-        count_total = Conducteur.objects.filter(salsocid=societe).count()
-        count_interim = Conducteur.objects.filter(salsocid=societe, salactif=True, interim_p=True).count()
-        count_sous_traitants = Conducteur.objects.filter(salsocid=societe, salactif=True, sous_traitant_p=True).count()
-        if count_total > 0:
-            conducteurs_par_societe.append({
-                'societe': societe,
-                'actifs': count_actifs,
-                'total': count_total,
-                'inactifs': count_total - count_actifs,
-                'interim': count_interim,
-                'sous_traitants': count_sous_traitants,
-                'permanents': count_actifs - count_interim - count_sous_traitants
-            })
-    
-    # Évaluations par mois (derniers 12 mois)
-    from datetime import date, timedelta
-    from django.db.models import Count
-    from django.db.models.functions import TruncMonth
-    
-    fin_periode = date.today()
-    debut_periode = fin_periode - timedelta(days=365)
-    
-    evaluations_par_mois = Evaluation.objects.filter(
-        date_evaluation__gte=debut_periode
-    ).annotate(
-        mois=TruncMonth('date_evaluation')
-    ).values('mois').annotate(
-        count=Count('id')
-    ).order_by('mois')
-    
-    # Scores moyens par type d'évaluation
-    scores_par_type = {}
-    for type_eval in TypologieEvaluation.objects.all():
-        evaluations = Evaluation.objects.filter(type_evaluation=type_eval)
-        scores = []
-        for eval in evaluations:
-            score = eval.calculate_score()
-            if score is not None:
-                scores.append(score)
-        
-        if scores:
-            scores_par_type[type_eval.nom] = {
-                'moyenne': sum(scores) / len(scores),
-                'count': len(scores),
-                'total_evaluations': evaluations.count()
-            }
-    
-    context = {
-        'stats': stats,
-        'conducteurs_stats': conducteurs_stats,
-        'conducteurs_par_site': conducteurs_par_site,
-        'conducteurs_par_societe': conducteurs_par_societe,
-        'evaluations_par_mois': list(evaluations_par_mois),
-        'scores_par_type': scores_par_type,
-    }
-    return render(request, 'suivi_conducteurs/statistiques.html', context)
+    """
+    Vue des statistiques globales : dernier instantané nocturne (commande
+    snapshot_rapports) par défaut, calcul en direct avec ?live=1 pour les
+    utilisateurs ayant la permission voir_statistiques_direct.
+    """
+    direct = (
+        request.GET.get('live') == '1'
+        and request.user.has_perm('suivi_conducteurs.voir_statistiques_direct')
+    )
+    if not direct:
+        contexte = rapports.lire_statistiques()
+        if contexte is not None:
+            return render(request, 'suivi_conducteurs/statistiques.html', {**contexte, 'instantane': True})
+    # Pas encore d'instantané : calcul en direct pour tous
+    return _statistiques_direct(request)
+
+
+@login_required
+def rapport_instantane(request, fichier):
+    """Fichier d'un instantané (?date=AAAA-MM-JJ, le plus récent par défaut), lu sur disque"""
+    if fichier not in rapports.FICHIERS:
+        raise Http404("Rapport inconnu")
+    jour = None
+    if request.GET.get('date'):
+        try:
+            jour = date.fromisoformat(request.GET['date'])
+        except ValueError:
+            raise Http404("Date invalide")
+    chemin = rapports.chemin_instantane(fichier, jour)
+    if chemin is None:
+        raise Http404("Aucun instantané disponible")
+    return FileResponse(open(chemin, 'rb'), content_type=rapports.FICHIERS[fichier])
 
 # Vue pour les statistiques (placeholder)
 # @login_required
@@ -790,3 +875,147 @@ def statistiques_view(request):
 #         'scores_par_type': scores_par_type,
 #     }
 #     return render(request, 'suivi_conducteurs/statistiques.html', context)
+
+
+def _parametres_echeances(request):
+    """Lecture et validation des filtres de la file des conducteurs à évaluer"""
+    types_evaluation = list(TypologieEvaluation.objects.all().order_by('nom'))
+
+    type_evaluation = None
+    type_filter = request.GET.get('type_evaluation')
+    if type_filter:
+        try:
+            type_filter_id = int(type_filter)
+            type_evaluation = next((t for t in types_evaluation if t.id == type_filter_id), None)
+        except (ValueError, TypeError):
+            pass
+    if type_evaluation is None and types_evaluation:
+        type_evaluation = types_evaluation[0]
+
+    mois = getattr(settings, 'ECHEANCES_MOIS_DEFAUT', 12)
+    try:
+        mois = max(1, min(int(request.GET.get('mois', mois)), 120))
+    except (ValueError, TypeError):
+        pass
+
+    site_id = None
+    societe_id = None
+    try:
+        site_id = int(request.GET.get('site', '')) or None
+    except (ValueError, TypeError):
+        pass
+    try:
+        societe_id = int(request.GET.get('societe', '')) or None
+    except (ValueError, TypeError):
+        pass
+
+    return {
+        'types_evaluation': types_evaluation,
+        'type_evaluation': type_evaluation,
+        'mois': mois,
+        'site_id': site_id,
+        'societe_id': societe_id,
+        'live': request.GET.get('live') == '1',
+    }
+
+
+def _file_echeances(request):
+    """Construit la page de la file d'évaluations à planifier (instantané ou requête directe)"""
+    parametres = _parametres_echeances(request)
+    type_evaluation = parametres['type_evaluation']
+
+    date_calcul = None
+    source = 'direct'
+    if type_evaluation is None:
+        conducteurs = Conducteur.objects.none()
+    else:
+        date_calcul = echeances.date_dernier_instantane()
+        if not parametres['live'] and echeances.instantane_valide(date_calcul):
+            source = 'instantane'
+            selection = echeances.conducteurs_a_evaluer_instantane
+        else:
+            selection = echeances.conducteurs_a_evaluer
+        conducteurs = selection(
+            type_evaluation,
+            parametres['mois'],
+            site=parametres['site_id'],
+            societe=parametres['societe_id'],
+        )
+
+    paginator = Paginator(conducteurs, 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    parametres.update({
+        'page_obj': page_obj,
+        'source': source,
+        'date_calcul': date_calcul,
+        'seuil': echeances.date_seuil(parametres['mois']),
+    })
+    return parametres
+
+
+@login_required
+@permission_required('suivi_conducteurs.view_evaluation', raise_exception=True)
+def evaluations_a_planifier(request):
+    """File des conducteurs actifs sans évaluation d'un type donné depuis N mois"""
+    context = _file_echeances(request)
+    context.update({
+        'societes': Societe.objects.filter(socactif=True).order_by('socnom'),
+        'sites': Site.objects.all().order_by('nom_commune'),
+    })
+    return render(request, 'suivi_conducteurs/evaluations_a_planifier.html', context)
+
+
+@login_required
+@permission_required('suivi_conducteurs.view_evaluation', raise_exception=True)
+def api_evaluations_a_planifier(request):
+    """API JSON de la file des conducteurs à évaluer"""
+    context = _file_echeances(request)
+    page_obj = context['page_obj']
+    type_evaluation = context['type_evaluation']
+
+    resultats = [
+        {
+            'id': conducteur.id,
+            'nom': conducteur.salnom,
+            'prenom': conducteur.salnom2,
+            'societe': conducteur.salsocid.socnom,
+            'site': conducteur.site.nom_commune,
+            'derniere_evaluation': conducteur.derniere_evaluation.isoformat() if conducteur.derniere_evaluation else None,
+        }
+        for conducteur in page_obj
+    ]
+
+    return JsonResponse({
+        'type_evaluation': type_evaluation.id if type_evaluation else None,
+        'mois': context['mois'],
+        'seuil': context['seuil'].isoformat(),
+        'source': context['source'],
+        'date_calcul': context['date_calcul'].isoformat() if context['date_calcul'] else None,
+        'count': page_obj.paginator.count,
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+        'resultats': resultats,
+    })
+
+
+@login_required
+def recherche(request):
+    """Recherche globale : conducteurs, sociétés, sites, évaluateurs et évaluations récentes"""
+    q = request.GET.get('q', '').strip()
+    groupes = recherche_globale(q, request.user, limite_par_type=10) if q else []
+    context = {
+        'q': q,
+        'groupes': groupes,
+        'total_count': sum(len(groupe['resultats']) for groupe in groupes),
+    }
+    return render(request, 'suivi_conducteurs/recherche.html', context)
+
+
+@login_required
+@cache_par_permissions(*MODELES_RECHERCHE)
+def api_recherche(request):
+    """API JSON de la recherche globale (suggestions de la barre de navigation)"""
+    q = request.GET.get('q', '').strip()
+    groupes = recherche_globale(q, request.user) if len(q) >= 2 else []
+    return JsonResponse({'q': q, 'groupes': groupes})
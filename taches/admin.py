@@ -0,0 +1,106 @@
+from django.contrib import admin
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from .models import Planification, Tache
+
+
+@admin.register(Tache)
+class TacheAdmin(admin.ModelAdmin):
+    list_display = [
+        'nom', 'etat', 'priorite', 'barre_progression', 'message',
+        'tentatives_affichees', 'executer_apres', 'date_debut', 'duree_affichee',
+    ]
+    list_filter = ['etat', 'nom']
+    search_fields = ['nom', 'message', 'erreur']
+    ordering = ['-date_creation']
+    date_hierarchy = 'date_creation'
+    actions = ['relancer']
+    readonly_fields = [
+        'etat', 'tentatives', 'jeton', 'travailleur', 'reservee_jusqua',
+        'progression', 'message', 'resultat', 'erreur',
+        'date_creation', 'date_debut', 'date_fin',
+    ]
+
+    fieldsets = (
+        ('Tâche', {
+            'fields': ('nom', 'arguments', 'priorite', 'tentatives_max', 'executer_apres')
+        }),
+        ('Exécution', {
+            'fields': ('etat', 'progression', 'message', 'tentatives', 'travailleur',
+                       'reservee_jusqua', 'date_creation', 'date_debut', 'date_fin')
+        }),
+        ('Résultat', {
+            'fields': ('resultat', 'erreur')
+        }),
+    )
+
+    def barre_progression(self, obj):
+        return format_html(
+            '<div style="width:100px;background:#eee;border-radius:3px">'
+            '<div style="width:{}%;background:#417690;color:#fff;font-size:10px;'
+            'text-align:center;border-radius:3px">{}%</div></div>',
+            obj.progression, obj.progression,
+        )
+    barre_progression.short_description = 'Progression'
+
+    def tentatives_affichees(self, obj):
+        return f'{obj.tentatives}/{obj.tentatives_max}'
+    tentatives_affichees.short_description = 'Tentatives'
+
+    def duree_affichee(self, obj):
+        duree = obj.duree
+        if duree is None:
+            return '-'
+        return f'{duree.total_seconds():.1f} s'
+    duree_affichee.short_description = 'Durée'
+
+    def relancer(self, request, queryset):
+        """Remet en file les tâches terminées ou en échec"""
+        nombre = queryset.exclude(etat=Tache.EN_COURS).update(
+            etat=Tache.ATTENTE,
+            tentatives=0,
+            executer_apres=timezone.now(),
+            progression=0,
+            message='',
+            erreur='',
+            jeton='',
+            date_debut=None,
+            date_fin=None,
+        )
+        self.message_user(request, f'{nombre} tâche(s) remise(s) en file.')
+    relancer.short_description = 'Relancer les tâches sélectionnées'
+
+
+@admin.register(Planification)
+class PlanificationAdmin(admin.ModelAdmin):
+    list_display = ['nom', 'tache', 'cron', 'derniere_execution', 'etat_affiche', 'duree_affichee', 'lien_tache']
+    list_select_related = ['derniere_tache']
+    search_fields = ['nom', 'tache']
+    readonly_fields = [
+        'nom', 'tache', 'cron', 'dernier_tick', 'derniere_execution',
+        'derniere_duree', 'dernier_etat', 'derniere_erreur', 'derniere_tache',
+    ]
+
+    def has_add_permission(self, request):
+        # Les tâches périodiques sont déclarées dans TACHES_PERIODIQUES
+        return False
+
+    def etat_affiche(self, obj):
+        return dict(Tache.ETAT_CHOICES).get(obj.etat, '-')
+    etat_affiche.short_description = 'État'
+
+    def duree_affichee(self, obj):
+        duree = obj.duree
+        if duree is None:
+            return '-'
+        return f'{duree.total_seconds():.1f} s'
+    duree_affichee.short_description = 'Durée'
+
+    def lien_tache(self, obj):
+        if not obj.derniere_tache_id:
+            return '-'
+        url = reverse('admin:taches_tache_change', args=[obj.derniere_tache_id])
+        return format_html('<a href="{}">#{}</a>', url, obj.derniere_tache_id)
+    lien_tache.short_description = 'Tâche en file'
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TachesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'taches'
+    verbose_name = 'Tâches de fond'
+
+    def ready(self):
+        """Tâches (tasks.py) et cibles de recalcul (backfills.py) déclarées par les applications"""
+        autodiscover_modules('tasks')
+        autodiscover_modules('backfills')
@@ -0,0 +1,209 @@
+# taches/backfill.py
+"""
+Recalcul en masse de données dérivées (colonnes calculées, index de
+recherche), commande « manage.py backfill <cible> ».
+
+Une cible est déclarée dans le module backfills.py d'une application :
+
+    @cible('scores', Evaluation.objects.all(), champs=['score'])
+    def traiter(evaluations):
+        ...
+        return nombre_lues, objets_modifies
+
+La plage des clés primaires est découpée en tranches de `taille` ; chaque
+tranche est traitée par un processus d'un pool multiprocessing, avec sa
+propre connexion à la base. Les objets renvoyés sont enregistrés par
+bulk_update (sans `champs`, la fonction écrit elle-même et renvoie une liste
+vide). Les tranches terminées sont inscrites dans un point de reprise
+(BACKFILL_DOSSIER/<cible>.json) : après une interruption, --reprendre
+ne traite que les tranches restantes.
+"""
+import json
+import multiprocessing
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+
+import django
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+from django.db.models import Max, Min
+
+from configurations import bases, caching
+
+CIBLES = {}
+
+
+@dataclass
+class Cible:
+    nom: str
+    queryset: object
+    traiter: object
+    champs: list = field(default_factory=list)
+    # Appelée une fois avant le découpage (création d'une table d'index...)
+    preparer: object = None
+
+
+def cible(nom, queryset, champs=None, preparer=None):
+    """Enregistre la fonction décorée comme traitement d'une tranche de `queryset`"""
+    def enregistrer(traiter):
+        CIBLES[nom] = Cible(nom, queryset, traiter, list(champs or []), preparer)
+        return traiter
+    return enregistrer
+
+
+def tranches(cible, taille):
+    """Débuts des tranches [debut, debut + taille) couvrant les clés primaires"""
+    bornes = cible.queryset.order_by().aggregate(minimum=Min('pk'), maximum=Max('pk'))
+    if bornes['minimum'] is None:
+        return []
+    return list(range(bornes['minimum'], bornes['maximum'] + 1, taille))
+
+
+def traiter_tranche(nom, debut, taille):
+    """Traitement d'une tranche (dans un processus du pool) : (debut, lus, modifiés, erreur)"""
+    cible = CIBLES[nom]
+    try:
+        objets = cible.queryset.filter(pk__gte=debut, pk__lt=debut + taille)
+        lus, modifies = cible.traiter(objets)
+        if modifies:
+            _enregistrer(cible, modifies)
+        return debut, lus, len(modifies), None
+    except Exception as exc:
+        return debut, 0, 0, f'{type(exc).__name__}: {exc}'
+    finally:
+        close_old_connections()
+
+
+def _enregistrer(cible, objets, essais=3):
+    # Écriture idempotente : rejouée si la base est momentanément verrouillée
+    # par un autre processus (SQLite n'accepte qu'une écriture à la fois)
+    for essai in range(essais):
+        try:
+            with transaction.atomic():
+                cible.queryset.model.objects.bulk_update(objets, cible.champs, batch_size=500)
+            return
+        except OperationalError:
+            if essai == essais - 1:
+                raise
+            time.sleep(1 + essai)
+
+
+def _initialiser():
+    # Ctrl-C traité par le processus principal, qui arrête le pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Sans effet après un fork ; nécessaire si le processus est démarré par spawn
+    django.setup()
+
+
+def _traiter(arguments):
+    return traiter_tranche(*arguments)
+
+
+class PointDeReprise:
+    """Tranches terminées d'un recalcul, écrites sur disque après chacune"""
+
+    def __init__(self, nom, taille):
+        dossier = str(getattr(settings, 'BACKFILL_DOSSIER', settings.BASE_DIR / 'var' / 'backfill'))
+        os.makedirs(dossier, exist_ok=True)
+        self.chemin = os.path.join(dossier, f'{nom}.json')
+        self.taille = taille
+        self.terminees = set()
+
+    def charger(self):
+        try:
+            with open(self.chemin, encoding='utf-8') as fichier:
+                donnees = json.load(fichier)
+        except FileNotFoundError:
+            return
+        if donnees['taille'] != self.taille:
+            raise ValueError(
+                f"Point de reprise écrit avec des tranches de {donnees['taille']} : "
+                f"relancer avec --taille {donnees['taille']}"
+            )
+        self.terminees = set(donnees['terminees'])
+
+    def ajouter(self, debut):
+        self.terminees.add(debut)
+        temporaire = self.chemin + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as fichier:
+            json.dump({'taille': self.taille, 'terminees': sorted(self.terminees)}, fichier)
+        os.replace(temporaire, self.chemin)
+
+    def supprimer(self):
+        try:
+            os.remove(self.chemin)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class Bilan:
+    tranches: int = 0
+    terminees: int = 0
+    lus: int = 0
+    modifies: int = 0
+    erreurs: dict = field(default_factory=dict)
+    debut: float = field(default_factory=time.monotonic)
+
+    @property
+    def duree(self):
+        return time.monotonic() - self.debut
+
+    @property
+    def debit(self):
+        return self.lus / self.duree if self.duree else 0
+
+
+def executer(nom, taille=1000, processus=1, reprendre=False, rapporter=None, intervalle_rapport=5):
+    """
+    Recalcule la cible `nom` ; `rapporter(bilan)` est appelé au plus toutes
+    les `intervalle_rapport` secondes. Renvoie le Bilan final.
+    """
+    cible = CIBLES[nom]
+    if cible.preparer:
+        cible.preparer()
+
+    point = PointDeReprise(nom, taille)
+    if reprendre:
+        point.charger()
+    else:
+        point.supprimer()
+    restantes = [debut for debut in tranches(cible, taille) if debut not in point.terminees]
+    bilan = Bilan(tranches=len(restantes))
+
+    travail = [(nom, debut, taille) for debut in restantes]
+    if processus > 1:
+        # Connexions non partagées avec les processus du pool
+        bases.fermer_avant_fork()
+        pool = multiprocessing.Pool(processus, initializer=_initialiser)
+        resultats = pool.imap_unordered(_traiter, travail)
+    else:
+        pool = None
+        resultats = map(_traiter, travail)
+
+    dernier_rapport = time.monotonic()
+    try:
+        for debut, lus, modifies, erreur in resultats:
+            if erreur:
+                bilan.erreurs[debut] = erreur
+                continue
+            point.ajouter(debut)
+            bilan.terminees += 1
+            bilan.lus += lus
+            bilan.modifies += modifies
+            if rapporter and time.monotonic() - dernier_rapport >= intervalle_rapport:
+                rapporter(bilan)
+                dernier_rapport = time.monotonic()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    if bilan.modifies:
+        # bulk_update n'émet pas post_save : vues en cache invalidées ici
+        caching.incrementer_versions(cible.queryset.model)
+    if not bilan.erreurs:
+        point.supprimer()
+    return bilan
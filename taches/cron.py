@@ -0,0 +1,66 @@
+# taches/cron.py
+"""
+Expressions cron à cinq champs (minute, heure, jour du mois, mois, jour de la
+semaine), pour les tâches périodiques de run_scheduler.
+
+Chaque champ accepte *, une valeur, un intervalle a-b, un pas (*/n, a-b/n)
+et des listes séparées par des virgules. Jour de la semaine : 0 ou 7 pour
+dimanche. Comme cron, si le jour du mois et le jour de la semaine sont tous
+deux restreints, l'un ou l'autre suffit.
+"""
+
+CHAMPS = (
+    ('minute', 0, 59),
+    ('heure', 0, 23),
+    ('jour', 1, 31),
+    ('mois', 1, 12),
+    ('jour de la semaine', 0, 7),
+)
+
+
+def _champ(texte, nom, minimum, maximum):
+    valeurs = set()
+    for morceau in texte.split(','):
+        plage, _, pas = morceau.partition('/')
+        pas = int(pas) if pas else 1
+        if plage == '*':
+            debut, fin = minimum, maximum
+        elif '-' in plage:
+            debut, fin = (int(v) for v in plage.split('-', 1))
+        else:
+            debut = fin = int(plage)
+            if pas != 1:
+                fin = maximum
+        if not (minimum <= debut <= fin <= maximum) or pas < 1:
+            raise ValueError(f"Champ {nom} invalide : {morceau}")
+        valeurs.update(range(debut, fin + 1, pas))
+    return frozenset(valeurs)
+
+
+class Cron:
+    def __init__(self, expression):
+        champs = expression.split()
+        if len(champs) != 5:
+            raise ValueError(f"Expression cron à cinq champs attendue : {expression!r}")
+        self.expression = expression
+        self.minutes, self.heures, self.jours, self.mois, jours_semaine = (
+            _champ(texte, *definition) for texte, definition in zip(champs, CHAMPS)
+        )
+        # 7 et 0 désignent tous deux le dimanche
+        self.jours_semaine = frozenset(0 if j == 7 else j for j in jours_semaine)
+        self._jour_restreint = champs[2] != '*'
+        self._semaine_restreinte = champs[4] != '*'
+
+    def correspond(self, moment):
+        """Vrai si la minute de `moment` (heure locale) est planifiée"""
+        if moment.minute not in self.minutes or moment.hour not in self.heures or moment.month not in self.mois:
+            return False
+        jour = moment.day in self.jours
+        # isoweekday : lundi 1 ... dimanche 7
+        semaine = moment.isoweekday() % 7 in self.jours_semaine
+        if self._jour_restreint and self._semaine_restreinte:
+            return jour or semaine
+        return jour and semaine
+
+    def __str__(self):
+        return self.expression
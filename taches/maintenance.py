@@ -0,0 +1,99 @@
+# taches/maintenance.py
+"""
+Maintenance périodique de la base (commande maintenance_base, tâche
+taches.tasks.maintenir_base).
+
+SQLite :
+- PRAGMA optimize puis ANALYZE : statistiques du planificateur de requêtes ;
+- PRAGMA incremental_vacuum : rend au système les pages libérées, si la base
+  est en auto_vacuum=INCREMENTAL (réglage du mode production, voir
+  SQLITE_PRODUCTION ; une base existante n'y passe qu'après un VACUUM
+  complet, option `complet`) ;
+- PRAGMA wal_checkpoint(TRUNCATE) : journal WAL reporté dans la base et
+  ramené à zéro.
+
+PostgreSQL : VACUUM (ANALYZE), en complément de l'autovacuum (pages mortes
+réutilisables et statistiques à jour après un backfill ou une purge) ;
+VACUUM FULL avec `complet`, qui réécrit les tables et les verrouille.
+
+Autres moteurs : ANALYZE.
+"""
+import os
+import time
+
+from django.db import connections
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _taille(connection):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_database_size(current_database())')
+            return cursor.fetchone()[0]
+    nom = connection.settings_dict['NAME']
+    try:
+        return os.path.getsize(nom)
+    except (OSError, TypeError):
+        # Base en mémoire (tests)
+        return None
+
+
+def _pragma(cursor, instruction):
+    cursor.execute(f'PRAGMA {instruction}')
+    return cursor.fetchone()
+
+
+def _maintenir_sqlite(connection, pages, complet):
+    bilan = {}
+    with connection.cursor() as cursor:
+        _pragma(cursor, 'optimize')
+        cursor.execute('ANALYZE')
+        if complet:
+            # Réécrit tout le fichier : bloque les écritures pendant l'opération
+            _pragma(cursor, 'auto_vacuum=INCREMENTAL')
+            cursor.execute('VACUUM')
+            bilan['vacuum'] = 'complet'
+        elif _pragma(cursor, 'auto_vacuum')[0] == AUTO_VACUUM_INCREMENTAL:
+            libres = _pragma(cursor, 'freelist_count')[0]
+            cursor.execute(f'PRAGMA incremental_vacuum({int(pages or 0)})')
+            cursor.fetchall()
+            bilan['vacuum'] = 'incrémental'
+            bilan['pages_liberees'] = libres - _pragma(cursor, 'freelist_count')[0]
+        else:
+            bilan['vacuum'] = 'indisponible (auto_vacuum désactivé)'
+        if _pragma(cursor, 'journal_mode')[0] == 'wal':
+            _pragma(cursor, 'wal_checkpoint(TRUNCATE)')
+            bilan['wal'] = 'tronqué'
+    return bilan
+
+
+def maintenir(alias='default', pages=None, complet=False):
+    """
+    Maintenance de la base `alias` ; renvoie un bilan (dict). `pages` limite
+    le vacuum incrémental de SQLite (toutes les pages libres par défaut),
+    `complet` lance un VACUUM complet (SQLite : active auto_vacuum=INCREMENTAL).
+    """
+    connection = connections[alias]
+    debut = time.monotonic()
+    taille_avant = _taille(connection)
+    if connection.vendor == 'sqlite':
+        bilan = _maintenir_sqlite(connection, pages, complet)
+    elif connection.vendor == 'postgresql':
+        # VACUUM hors transaction : connexion en autocommit, hors atomic()
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM (FULL, ANALYZE)' if complet else 'VACUUM (ANALYZE)')
+        bilan = {'vacuum': 'complet' if complet else 'standard'}
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        bilan = {}
+    taille_apres = _taille(connection)
+    return {
+        'base': alias,
+        'moteur': connection.vendor,
+        **bilan,
+        'taille_avant': taille_avant,
+        'taille_apres': taille_apres,
+        'duree': round(time.monotonic() - debut, 2),
+    }
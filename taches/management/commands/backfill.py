@@ -0,0 +1,68 @@
+# taches/management/commands/backfill.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from taches import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule une donnée dérivée par tranches de clés primaires, en parallèle "
+        "(cibles déclarées dans les modules backfills.py des applications)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cible', nargs='?', help="Cible à recalculer (sans argument : liste des cibles)")
+        parser.add_argument(
+            '--processus', type=int, default=None,
+            help="Processus du pool (défaut : BACKFILL_PROCESSUS)",
+        )
+        parser.add_argument(
+            '--taille', type=int, default=None,
+            help="Clés primaires par tranche (défaut : BACKFILL_TAILLE)",
+        )
+        parser.add_argument(
+            '--reprendre', action='store_true',
+            help="Ne traiter que les tranches absentes du point de reprise",
+        )
+
+    def handle(self, *args, **options):
+        nom = options['cible']
+        if nom is None:
+            for cible in backfill.CIBLES.values():
+                description = (cible.traiter.__doc__ or '').strip()
+                self.stdout.write(f'{cible.nom:<25} {description}')
+            return
+        if nom not in backfill.CIBLES:
+            raise CommandError(f"Cible inconnue : {nom} (disponibles : {', '.join(backfill.CIBLES)})")
+
+        processus = options['processus'] or getattr(settings, 'BACKFILL_PROCESSUS', 1)
+        taille = options['taille'] or getattr(settings, 'BACKFILL_TAILLE', 1000)
+
+        def rapporter(bilan):
+            self.stdout.write(
+                f'⏳ {bilan.terminees}/{bilan.tranches} tranche(s), {bilan.lus} ligne(s) lue(s), '
+                f'{bilan.modifies} modifiée(s) — {bilan.debit:.0f} lignes/s'
+            )
+
+        try:
+            bilan = backfill.executer(
+                nom, taille=taille, processus=processus,
+                reprendre=options['reprendre'], rapporter=rapporter,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        except KeyboardInterrupt:
+            raise CommandError("Interrompu : relancer avec --reprendre pour traiter les tranches restantes")
+
+        self.stdout.write(
+            f'{bilan.lus} ligne(s) lue(s), {bilan.modifies} modifiée(s) en {bilan.duree:.2f} s '
+            f'({bilan.debit:.0f} lignes/s, {processus} processus)'
+        )
+        if bilan.erreurs:
+            for debut, erreur in sorted(bilan.erreurs.items()):
+                self.stderr.write(f'❌ Tranche {debut}-{debut + taille - 1} : {erreur}')
+            raise CommandError(
+                f"{len(bilan.erreurs)} tranche(s) en échec : relancer avec --reprendre"
+            )
+        self.stdout.write(self.style.SUCCESS(f'✅ Cible {nom} recalculée'))
@@ -0,0 +1,31 @@
+# taches/management/commands/maintenance_base.py
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from taches import maintenance
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintenance de la base : PRAGMA optimize, ANALYZE, vacuum incrémental "
+        "et troncature du journal WAL (SQLite) ; VACUUM (ANALYZE) sur PostgreSQL"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base', default=DEFAULT_DB_ALIAS, help="Alias de la base (défaut : default)")
+        parser.add_argument(
+            '--pages', type=int,
+            help="Nombre maximal de pages libérées par le vacuum incrémental (défaut : toutes)",
+        )
+        parser.add_argument(
+            '--complet', action='store_true',
+            help="VACUUM complet (SQLite : active auto_vacuum=INCREMENTAL ; PostgreSQL : VACUUM FULL), bloque les écritures",
+        )
+
+    def handle(self, *args, **options):
+        bilan = maintenance.maintenir(options['base'], pages=options['pages'], complet=options['complet'])
+        for cle, valeur in bilan.items():
+            if cle.startswith('taille') and valeur is not None:
+                valeur = f'{valeur / 1024 / 1024:.1f} Mo'
+            self.stdout.write(f'  {cle:<15} {valeur}')
+        self.stdout.write(self.style.SUCCESS(f"✅ Maintenance de la base {bilan['base']} terminée"))
@@ -0,0 +1,46 @@
+# taches/management/commands/run_scheduler.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from taches import planificateur
+from taches.models import Planification
+from taches.travailleur import Arret
+
+
+class Command(BaseCommand):
+    help = (
+        "Déclenche les tâches périodiques de TACHES_PERIODIQUES selon leur "
+        "planification cron. Peut tourner sur plusieurs machines : chaque "
+        "échéance n'est déclenchée qu'une fois."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--une-fois', action='store_true',
+            help="Vérifier la minute en cours puis s'arrêter",
+        )
+        parser.add_argument(
+            '--liste', action='store_true',
+            help="Afficher les tâches périodiques et leur dernière exécution",
+        )
+
+    def handle(self, *args, **options):
+        configurees = planificateur.planifications()
+        if options['liste']:
+            planificateur.synchroniser(configurees)
+            for planification in Planification.objects.filter(nom__in=configurees).select_related('derniere_tache'):
+                derniere = (
+                    timezone.localtime(planification.derniere_execution).strftime('%d/%m/%Y %H:%M')
+                    if planification.derniere_execution else 'jamais'
+                )
+                self.stdout.write(
+                    f'{planification.nom:<25} {planification.cron:<18} {derniere:<17} '
+                    f'{planification.etat or "-":<9} {planification.duree or "-"}'
+                )
+            return
+
+        arret = Arret()
+        arret.installer()
+        self.stdout.write(f'🕐 {len(configurees)} tâche(s) périodique(s) planifiée(s)')
+        planificateur.boucle(arret, une_fois=options['une_fois'])
+        self.stdout.write(self.style.SUCCESS('✅ Planificateur arrêté'))
@@ -0,0 +1,64 @@
+# taches/management/commands/run_worker.py
+import multiprocessing
+import signal
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from configurations import bases
+from taches import travailleur
+
+
+def _processus(une_fois):
+    # Sans effet après un fork ; nécessaire si le processus est démarré par spawn
+    django.setup()
+    travailleur.boucle(une_fois=une_fois)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exécute les tâches de fond en file (table Tache). "
+        "SIGTERM ou Ctrl-C : arrêt après la tâche en cours."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processus', type=int, default=None,
+            help="Nombre de processus travailleurs (défaut : TACHES_PROCESSUS)",
+        )
+        parser.add_argument(
+            '--une-fois', action='store_true',
+            help="S'arrêter dès que la file est vide",
+        )
+
+    def handle(self, *args, **options):
+        nombre = options['processus'] or getattr(settings, 'TACHES_PROCESSUS', 1)
+        une_fois = options['une_fois']
+
+        if nombre <= 1:
+            executees = travailleur.boucle(une_fois=une_fois)
+            self.stdout.write(self.style.SUCCESS(f'✅ {executees} tâche(s) exécutée(s)'))
+            return
+
+        # Connexions non partagées avec les processus enfants
+        bases.fermer_avant_fork()
+        enfants = [
+            multiprocessing.Process(target=_processus, args=(une_fois,), name=f'travailleur-{i + 1}')
+            for i in range(nombre)
+        ]
+        for enfant in enfants:
+            enfant.start()
+        self.stdout.write(f'🚀 {nombre} processus travailleurs démarrés')
+
+        def relayer(signum, frame):
+            # Arrêt propre des enfants : chacun termine sa tâche en cours
+            for enfant in enfants:
+                if enfant.is_alive():
+                    enfant.terminate()
+
+        signal.signal(signal.SIGTERM, relayer)
+        signal.signal(signal.SIGINT, relayer)
+        for enfant in enfants:
+            enfant.join()
+        self.stdout.write(self.style.SUCCESS('✅ Processus travailleurs arrêtés'))
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:19
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(help_text='Nom enregistré de la fonction', max_length=200, verbose_name='Tâche')),
+                ('arguments', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Arguments')),
+                ('etat', models.CharField(choices=[('attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echec', 'Échec')], default='attente', max_length=10, verbose_name='État')),
+                ('priorite', models.IntegerField(default=0, help_text="Les plus élevées d'abord", verbose_name='Priorité')),
+                ('tentatives', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('tentatives_max', models.PositiveIntegerField(default=3, verbose_name='Tentatives maximum')),
+                ('executer_apres', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Exécuter à partir de')),
+                ('jeton', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('travailleur', models.CharField(blank=True, max_length=100, verbose_name='Travailleur')),
+                ('reservee_jusqua', models.DateTimeField(blank=True, null=True, verbose_name="Réservée jusqu'à")),
+                ('progression', models.PositiveSmallIntegerField(default=0, verbose_name='Progression (%)')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Message de progression')),
+                ('resultat', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Résultat')),
+                ('erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name='Début')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+            ],
+            options={
+                'verbose_name': 'Tâche',
+                'verbose_name_plural': 'Tâches',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['etat', '-priorite', 'executer_apres'], name='taches_tach_etat_1b4bd2_idx')],
+            },
+        ),
+    ]
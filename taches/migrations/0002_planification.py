@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Planification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, unique=True, verbose_name='Nom')),
+                ('tache', models.CharField(max_length=200, verbose_name='Tâche')),
+                ('cron', models.CharField(max_length=100, verbose_name='Planification')),
+                ('dernier_tick', models.DateTimeField(blank=True, null=True, verbose_name='Dernière échéance déclenchée')),
+                ('derniere_execution', models.DateTimeField(blank=True, null=True, verbose_name='Dernière exécution')),
+                ('derniere_duree', models.DurationField(blank=True, null=True, verbose_name='Durée')),
+                ('dernier_etat', models.CharField(blank=True, choices=[('attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echec', 'Échec')], max_length=10, verbose_name='État')),
+                ('derniere_erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('derniere_tache', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='taches.tache', verbose_name='Dernière tâche en file')),
+            ],
+            options={
+                'verbose_name': 'Tâche périodique',
+                'verbose_name_plural': 'Tâches périodiques',
+                'ordering': ['nom'],
+            },
+        ),
+    ]
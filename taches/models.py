@@ -0,0 +1,100 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Tache(models.Model):
+    """Tâche de fond en file d'attente, exécutée par la commande run_worker"""
+    ATTENTE = 'attente'
+    EN_COURS = 'en_cours'
+    TERMINEE = 'terminee'
+    ECHEC = 'echec'
+    ETAT_CHOICES = [
+        (ATTENTE, 'En attente'),
+        (EN_COURS, 'En cours'),
+        (TERMINEE, 'Terminée'),
+        (ECHEC, 'Échec'),
+    ]
+
+    nom = models.CharField(max_length=200, verbose_name="Tâche", help_text="Nom enregistré de la fonction")
+    arguments = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Arguments")
+    etat = models.CharField(max_length=10, choices=ETAT_CHOICES, default=ATTENTE, verbose_name="État")
+    priorite = models.IntegerField(default=0, verbose_name="Priorité", help_text="Les plus élevées d'abord")
+    tentatives = models.PositiveIntegerField(default=0, verbose_name="Tentatives")
+    tentatives_max = models.PositiveIntegerField(default=3, verbose_name="Tentatives maximum")
+    executer_apres = models.DateTimeField(default=timezone.now, verbose_name="Exécuter à partir de")
+
+    # Réservation par un travailleur : jeton unique posé par la prise en charge,
+    # réservation expirée = travailleur disparu, la tâche peut être reprise
+    jeton = models.CharField(max_length=64, blank=True, db_index=True)
+    travailleur = models.CharField(max_length=100, blank=True, verbose_name="Travailleur")
+    reservee_jusqua = models.DateTimeField(null=True, blank=True, verbose_name="Réservée jusqu'à")
+
+    progression = models.PositiveSmallIntegerField(default=0, verbose_name="Progression (%)")
+    message = models.CharField(max_length=255, blank=True, verbose_name="Message de progression")
+    resultat = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Résultat")
+    erreur = models.TextField(blank=True, verbose_name="Dernière erreur")
+
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True, verbose_name="Début")
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+
+    class Meta:
+        verbose_name = "Tâche"
+        verbose_name_plural = "Tâches"
+        ordering = ['-date_creation']
+        indexes = [
+            # Couvre la recherche de la prochaine tâche à prendre en charge
+            models.Index(fields=['etat', '-priorite', 'executer_apres']),
+        ]
+
+    def __str__(self):
+        return f"{self.nom} #{self.pk} ({self.get_etat_display()})"
+
+    @property
+    def duree(self):
+        if self.date_debut and self.date_fin:
+            return self.date_fin - self.date_debut
+        return None
+
+
+class Planification(models.Model):
+    """
+    Suivi d'une tâche périodique de TACHES_PERIODIQUES (commande run_scheduler).
+    `dernier_tick` sert de verrou : une seule instance du planificateur
+    parvient à y inscrire une échéance donnée, et la déclenche.
+    """
+    nom = models.CharField(max_length=100, unique=True, verbose_name="Nom")
+    tache = models.CharField(max_length=200, verbose_name="Tâche")
+    cron = models.CharField(max_length=100, verbose_name="Planification")
+    dernier_tick = models.DateTimeField(null=True, blank=True, verbose_name="Dernière échéance déclenchée")
+
+    derniere_execution = models.DateTimeField(null=True, blank=True, verbose_name="Dernière exécution")
+    derniere_duree = models.DurationField(null=True, blank=True, verbose_name="Durée")
+    dernier_etat = models.CharField(max_length=10, choices=Tache.ETAT_CHOICES, blank=True, verbose_name="État")
+    derniere_erreur = models.TextField(blank=True, verbose_name="Dernière erreur")
+    # Exécution passée par la file : durée et état lus sur la tâche
+    derniere_tache = models.ForeignKey(
+        Tache, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', verbose_name="Dernière tâche en file",
+    )
+
+    class Meta:
+        verbose_name = "Tâche périodique"
+        verbose_name_plural = "Tâches périodiques"
+        ordering = ['nom']
+
+    def __str__(self):
+        return f"{self.nom} ({self.cron})"
+
+    @property
+    def etat(self):
+        if self.derniere_tache_id:
+            return self.derniere_tache.etat
+        return self.dernier_etat
+
+    @property
+    def duree(self):
+        if self.derniere_tache_id:
+            return self.derniere_tache.duree
+        return self.derniere_duree
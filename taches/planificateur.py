@@ -0,0 +1,137 @@
+# taches/planificateur.py
+"""
+Déclenchement des tâches périodiques de TACHES_PERIODIQUES (commande
+run_scheduler) :
+
+    TACHES_PERIODIQUES = {
+        'purge_sessions': {
+            'tache': 'suivi_conducteurs.tasks.purger_sessions',
+            'cron': '15 3 * * *',
+            'execution': 'file',  # ou 'local' ; défaut PLANIFICATEUR_EXECUTION
+        },
+    }
+
+Le planificateur peut tourner sur plusieurs machines : chaque échéance
+(minute planifiée, heure locale) est inscrite dans Planification.dernier_tick
+par un UPDATE conditionnel, et seule l'instance dont l'UPDATE modifie la
+ligne déclenche la tâche. Les échéances manquées pendant un arrêt du
+planificateur ne sont pas rattrapées.
+
+Exécution :
+- 'file' : mise en file (table Tache), exécutée par run_worker ;
+- 'local' : dans un fil du planificateur (PLANIFICATEUR_FILS au plus en
+  parallèle), pour les tâches courtes sans travailleur démarré.
+"""
+import logging
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .cron import Cron
+from .models import Planification, Tache
+from .registre import TACHES, mettre_en_file
+
+logger = logging.getLogger(__name__)
+
+
+def planifications():
+    """{nom: (options, Cron)} des tâches périodiques configurées (erreurs levées au démarrage)"""
+    resultat = {}
+    for nom, options in getattr(settings, 'TACHES_PERIODIQUES', {}).items():
+        if options['tache'] not in TACHES:
+            raise ValueError(f"Tâche périodique {nom} : tâche inconnue {options['tache']}")
+        resultat[nom] = (options, Cron(options['cron']))
+    return resultat
+
+
+def synchroniser(configurees):
+    """Lignes Planification des tâches configurées, créées ou mises à jour"""
+    for nom, (options, cron) in configurees.items():
+        Planification.objects.update_or_create(
+            nom=nom, defaults={'tache': options['tache'], 'cron': str(cron)},
+        )
+
+
+def reserver(nom, tick):
+    """Vrai pour la seule instance qui inscrit cette échéance la première"""
+    return bool(
+        Planification.objects.filter(nom=nom)
+        .filter(Q(dernier_tick__isnull=True) | Q(dernier_tick__lt=tick))
+        .update(dernier_tick=tick)
+    )
+
+
+def _executer_local(nom, nom_tache):
+    debut = time.monotonic()
+    etat, erreur = Tache.TERMINEE, ''
+    try:
+        TACHES[nom_tache]['fonction']()
+    except Exception:
+        logger.exception("Échec de la tâche périodique %s", nom)
+        etat, erreur = Tache.ECHEC, traceback.format_exc()
+    finally:
+        Planification.objects.filter(nom=nom).update(
+            derniere_duree=timedelta(seconds=time.monotonic() - debut),
+            dernier_etat=etat,
+            derniere_erreur=erreur,
+        )
+        # Fil du planificateur : connexion fermée comme en fin de requête
+        close_old_connections()
+
+
+def declencher(nom, options, pool):
+    execution = options.get('execution', getattr(settings, 'PLANIFICATEUR_EXECUTION', 'file'))
+    maintenant = timezone.now()
+    if execution == 'local':
+        Planification.objects.filter(nom=nom).update(
+            derniere_execution=maintenant, dernier_etat=Tache.EN_COURS,
+            derniere_duree=None, derniere_erreur='', derniere_tache=None,
+        )
+        pool.submit(_executer_local, nom, options['tache'])
+    else:
+        tache = mettre_en_file(options['tache'], priorite=options.get('priorite'))
+        Planification.objects.filter(nom=nom).update(
+            derniere_execution=maintenant, dernier_etat='',
+            derniere_duree=None, derniere_erreur='', derniere_tache=tache,
+        )
+    logger.info("Tâche périodique %s déclenchée (%s)", nom, execution)
+
+
+def tick_courant():
+    """Minute en cours, heure locale (les expressions cron sont en heure locale)"""
+    return timezone.localtime().replace(second=0, microsecond=0)
+
+
+def verifier(configurees, tick, pool):
+    """Déclenche les tâches planifiées à cette échéance ; renvoie leurs noms"""
+    declenchees = []
+    for nom, (options, cron) in configurees.items():
+        if cron.correspond(tick) and reserver(nom, tick):
+            declencher(nom, options, pool)
+            declenchees.append(nom)
+    return declenchees
+
+
+def boucle(arret, une_fois=False):
+    configurees = planifications()
+    synchroniser(configurees)
+    intervalle = getattr(settings, 'PLANIFICATEUR_INTERVALLE', 10)
+    dernier = None
+    with ThreadPoolExecutor(
+        max_workers=getattr(settings, 'PLANIFICATEUR_FILS', 2), thread_name_prefix='planificateur',
+    ) as pool:
+        while not arret.demande:
+            tick = tick_courant()
+            if tick != dernier:
+                close_old_connections()
+                verifier(configurees, tick, pool)
+                dernier = tick
+            if une_fois:
+                break
+            time.sleep(intervalle)
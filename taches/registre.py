@@ -0,0 +1,113 @@
+# taches/registre.py
+"""
+Déclaration et mise en file des tâches de fond.
+
+Une tâche est une fonction décorée par @tache, déclarée dans le module
+tasks.py d'une application (chargé au démarrage, voir TachesConfig.ready).
+Ses arguments doivent être sérialisables en JSON : ils sont enregistrés dans
+la table Tache, puis la fonction est appelée par un processus de la commande
+run_worker.
+
+    @tache(priorite=5)
+    def recalculer(site_id):
+        ...
+        progression(50, 'Conducteurs recalculés')
+
+    mettre_en_file(recalculer, site_id=3)
+"""
+import contextvars
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+# nom -> options de la tâche ({'fonction', 'priorite', 'tentatives_max'})
+TACHES = {}
+
+# Tâche en cours d'exécution dans ce processus (renseignée par le travailleur)
+tache_courante = contextvars.ContextVar('tache_courante', default=None)
+
+
+def nom_tache(fonction):
+    return f'{fonction.__module__}.{fonction.__qualname__}'
+
+
+def tache(fonction=None, *, nom=None, priorite=0, tentatives_max=None):
+    """Enregistre une fonction comme tâche de fond (@tache ou @tache(priorite=...))"""
+    def enregistrer(fonction):
+        fonction.nom_tache = nom or nom_tache(fonction)
+        TACHES[fonction.nom_tache] = {
+            'fonction': fonction,
+            'priorite': priorite,
+            'tentatives_max': tentatives_max,
+        }
+        return fonction
+
+    if fonction is not None:
+        return enregistrer(fonction)
+    return enregistrer
+
+
+def mettre_en_file(tache, *args, priorite=None, dans=None, tentatives_max=None, **kwargs):
+    """
+    Ajoute une exécution de `tache` (fonction décorée ou nom enregistré) à la
+    file. `dans` : délai (secondes ou timedelta) avant la première exécution.
+    Dans une transaction, la tâche n'est visible des travailleurs qu'après sa
+    validation, et disparaît avec elle en cas d'annulation. Renvoie la ligne
+    Tache créée.
+    """
+    from .models import Tache
+
+    nom = getattr(tache, 'nom_tache', tache)
+    if nom not in TACHES:
+        raise ValueError(f"Tâche inconnue : {nom}")
+    options = TACHES[nom]
+
+    executer_apres = timezone.now()
+    if dans is not None:
+        executer_apres += dans if isinstance(dans, timedelta) else timedelta(seconds=dans)
+
+    return Tache.objects.create(
+        nom=nom,
+        arguments={'args': list(args), 'kwargs': kwargs},
+        priorite=options['priorite'] if priorite is None else priorite,
+        tentatives_max=(
+            tentatives_max
+            or options['tentatives_max']
+            or getattr(settings, 'TACHES_TENTATIVES_MAX', 3)
+        ),
+        executer_apres=executer_apres,
+    )
+
+
+def file_en_souffrance(delai=None):
+    """
+    Vrai si une tâche attend depuis plus de `delai` secondes
+    (TACHES_DELAI_ALERTE, 10 minutes par défaut) après son heure
+    d'exécution : aucun travailleur run_worker ne semble actif.
+    """
+    from .models import Tache
+
+    if delai is None:
+        delai = getattr(settings, 'TACHES_DELAI_ALERTE', 600)
+    return Tache.objects.filter(
+        etat=Tache.ATTENTE, executer_apres__lt=timezone.now() - timedelta(seconds=delai),
+    ).exists()
+
+
+def progression(pourcentage, message=''):
+    """
+    Avancement de la tâche en cours, affiché dans l'administration. Prolonge
+    aussi sa réservation : une tâche longue qui rend compte de sa progression
+    n'est pas reprise par un autre travailleur. Sans effet hors d'une tâche.
+    """
+    from .models import Tache
+
+    courante = tache_courante.get()
+    if courante is None:
+        return
+    Tache.objects.filter(pk=courante.pk, jeton=courante.jeton).update(
+        progression=max(0, min(100, int(pourcentage))),
+        message=message[:255],
+        reservee_jusqua=timezone.now() + timedelta(seconds=getattr(settings, 'TACHES_DUREE_RESERVATION', 300)),
+    )
@@ -0,0 +1,20 @@
+# taches/tasks.py
+"""Tâches de maintenance de la base, indépendantes des applications"""
+from django.db import connections
+
+from . import maintenance
+from .registre import tache
+
+
+@tache(priorite=-10)
+def analyser_base(alias='default'):
+    """ANALYZE : statistiques du planificateur de requêtes mises à jour"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return {'base': alias}
+
+
+@tache(priorite=-10)
+def maintenir_base(alias='default', pages=None):
+    """Statistiques, vacuum incrémental et journal WAL (voir maintenance.py)"""
+    return maintenance.maintenir(alias, pages=pages)
@@ -0,0 +1,279 @@
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import backfill, maintenance, planificateur, travailleur
+from .cron import Cron
+from .models import Planification, Tache
+from .registre import file_en_souffrance, mettre_en_file, tache
+
+CACHE_TESTS = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-taches'}}
+
+
+@tache
+def additionner(a, b):
+    return a + b
+
+
+@tache(tentatives_max=2)
+def echouer():
+    raise RuntimeError('échec voulu')
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class PriseEnChargeTests(TestCase):
+    """File des tâches : chaque tâche n'est prise que par un seul travailleur"""
+
+    def test_file_vide(self):
+        self.assertIsNone(travailleur.prendre('t1'))
+
+    def test_une_tache_un_seul_travailleur(self):
+        mettre_en_file(additionner, 1, 2)
+        prise = travailleur.prendre('t1')
+        self.assertEqual(prise.etat, Tache.EN_COURS)
+        self.assertEqual(prise.travailleur, 't1')
+        self.assertEqual(prise.tentatives, 1)
+        self.assertIsNone(travailleur.prendre('t2'))
+
+    def test_deux_taches_deux_travailleurs(self):
+        mettre_en_file(additionner, 1, 2)
+        mettre_en_file(additionner, 3, 4)
+        premiere, seconde = travailleur.prendre('t1'), travailleur.prendre('t2')
+        self.assertNotEqual(premiere.pk, seconde.pk)
+
+    def test_priorite_puis_anciennete(self):
+        basse = mettre_en_file(additionner, 1, 1)
+        haute = mettre_en_file(additionner, 2, 2, priorite=10)
+        self.assertEqual(travailleur.prendre('t1').pk, haute.pk)
+        self.assertEqual(travailleur.prendre('t1').pk, basse.pk)
+
+    def test_tache_differee(self):
+        mettre_en_file(additionner, 1, 2, dans=60)
+        self.assertIsNone(travailleur.prendre('t1'))
+
+    def test_reservation_expiree_reprise(self):
+        mettre_en_file(additionner, 1, 2)
+        perdue = travailleur.prendre('t1')
+        Tache.objects.filter(pk=perdue.pk).update(reservee_jusqua=timezone.now() - timedelta(seconds=1))
+
+        reprise = travailleur.prendre('t2')
+        self.assertEqual(reprise.pk, perdue.pk)
+        self.assertEqual(reprise.tentatives, 2)
+        # Le premier travailleur, revenu trop tard, n'écrase pas la reprise
+        travailleur._terminer(perdue, etat=Tache.TERMINEE)
+        self.assertEqual(Tache.objects.get(pk=perdue.pk).etat, Tache.EN_COURS)
+
+    def test_file_en_souffrance(self):
+        self.assertFalse(file_en_souffrance())
+        mettre_en_file(additionner, 1, 2)
+        Tache.objects.update(executer_apres=timezone.now() - timedelta(hours=1))
+        self.assertTrue(file_en_souffrance())
+
+    def test_tache_inconnue(self):
+        with self.assertRaises(ValueError):
+            mettre_en_file('taches.tests.inexistante')
+
+
+@override_settings(CACHES=CACHE_TESTS, TACHES_DELAI_REESSAI=30)
+class ExecutionTests(TestCase):
+
+    def test_succes(self):
+        mettre_en_file(additionner, 2, b=3)
+        travailleur.executer(travailleur.prendre('t1'))
+        terminee = Tache.objects.get()
+        self.assertEqual(terminee.etat, Tache.TERMINEE)
+        self.assertEqual(terminee.resultat, 5)
+        self.assertEqual(terminee.progression, 100)
+        self.assertIsNone(terminee.reservee_jusqua)
+
+    def test_nouvel_essai_differe_puis_echec(self):
+        mettre_en_file(echouer)
+
+        avant = timezone.now()
+        with self.assertLogs('taches.travailleur', 'ERROR'):
+            travailleur.executer(travailleur.prendre('t1'))
+        en_attente = Tache.objects.get()
+        self.assertEqual(en_attente.etat, Tache.ATTENTE)
+        self.assertIn('échec voulu', en_attente.erreur)
+        # Premier nouvel essai après TACHES_DELAI_REESSAI secondes
+        self.assertGreaterEqual(en_attente.executer_apres, avant + timedelta(seconds=30))
+        self.assertIsNone(travailleur.prendre('t1'))
+
+        Tache.objects.update(executer_apres=timezone.now())
+        with self.assertLogs('taches.travailleur', 'ERROR'):
+            travailleur.executer(travailleur.prendre('t1'))
+        self.assertEqual(Tache.objects.get().etat, Tache.ECHEC)
+
+    def test_delai_double_a_chaque_echec(self):
+        mettre_en_file(echouer, tentatives_max=5)
+        prise = travailleur.prendre('t1')
+        Tache.objects.filter(pk=prise.pk).update(tentatives=3)
+        prise.tentatives = 3
+        avant = timezone.now()
+        with self.assertLogs('taches.travailleur', 'ERROR'):
+            travailleur.executer(prise)
+        self.assertGreaterEqual(Tache.objects.get().executer_apres, avant + timedelta(seconds=120))
+
+
+# Tranche en échec lors du premier passage (reprise)
+ECHECS = set()
+TRAITEES = []
+
+
+@backfill.cible('tests_messages', Tache.objects.all(), champs=['message'])
+def marquer(taches):
+    taches = list(taches)
+    debut = min(t.pk for t in taches) if taches else None
+    TRAITEES.append(debut)
+    if debut in ECHECS:
+        raise RuntimeError('tranche en échec')
+    for t in taches:
+        t.message = 'traitée'
+    return len(taches), taches
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class BackfillTests(TransactionTestCase):
+    """Recalcul par tranches avec point de reprise (un seul processus)"""
+
+    def setUp(self):
+        cache.clear()
+        self.dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dossier)
+        self.enterContext(self.settings(BACKFILL_DOSSIER=self.dossier))
+        ECHECS.clear()
+        TRAITEES.clear()
+        self.taches = [mettre_en_file(additionner, i, i) for i in range(6)]
+
+    def debut_tranche(self, rang):
+        return self.taches[0].pk + 2 * rang
+
+    def test_toutes_les_tranches(self):
+        bilan = backfill.executer('tests_messages', taille=2)
+        self.assertEqual((bilan.tranches, bilan.terminees, bilan.lus, bilan.modifies), (3, 3, 6, 6))
+        self.assertEqual(set(Tache.objects.values_list('message', flat=True)), {'traitée'})
+
+    def test_reprise_apres_echec(self):
+        ECHECS.add(self.debut_tranche(1))
+        bilan = backfill.executer('tests_messages', taille=2)
+        self.assertEqual(list(bilan.erreurs), [self.debut_tranche(1)])
+        self.assertEqual(bilan.terminees, 2)
+
+        ECHECS.clear()
+        TRAITEES.clear()
+        bilan = backfill.executer('tests_messages', taille=2, reprendre=True)
+        # Seule la tranche en échec est retraitée
+        self.assertEqual(TRAITEES, [self.debut_tranche(1)])
+        self.assertEqual((bilan.tranches, bilan.terminees, bilan.erreurs), (1, 1, {}))
+        self.assertEqual(set(Tache.objects.values_list('message', flat=True)), {'traitée'})
+
+        # Point de reprise supprimé après un passage complet
+        TRAITEES.clear()
+        backfill.executer('tests_messages', taille=2, reprendre=True)
+        self.assertEqual(len(TRAITEES), 3)
+
+    def test_reprise_avec_une_autre_taille(self):
+        ECHECS.add(self.debut_tranche(0))
+        backfill.executer('tests_messages', taille=2)
+        with self.assertRaises(ValueError):
+            backfill.executer('tests_messages', taille=3, reprendre=True)
+
+    def test_sans_reprise_tout_est_retraite(self):
+        ECHECS.add(self.debut_tranche(2))
+        backfill.executer('tests_messages', taille=2)
+        ECHECS.clear()
+        TRAITEES.clear()
+        backfill.executer('tests_messages', taille=2)
+        self.assertEqual(len(TRAITEES), 3)
+
+
+class CronTests(SimpleTestCase):
+
+    def test_pas_intervalles_et_listes(self):
+        cron = Cron('*/15 8-18 * * 1-5')
+        self.assertTrue(cron.correspond(datetime(2026, 10, 19, 8, 30)))
+        self.assertFalse(cron.correspond(datetime(2026, 10, 19, 8, 31)))
+        self.assertFalse(cron.correspond(datetime(2026, 10, 19, 19, 0)))
+        # Samedi
+        self.assertFalse(cron.correspond(datetime(2026, 10, 24, 8, 30)))
+        self.assertTrue(Cron('0,30 3 * * *').correspond(datetime(2026, 10, 24, 3, 30)))
+
+    def test_jour_du_mois_ou_de_la_semaine(self):
+        # Comme cron : le 1er du mois ou le dimanche
+        cron = Cron('0 9 1 * 0')
+        self.assertTrue(cron.correspond(datetime(2026, 10, 1, 9, 0)))
+        self.assertTrue(cron.correspond(datetime(2026, 10, 18, 9, 0)))
+        self.assertFalse(cron.correspond(datetime(2026, 10, 19, 9, 0)))
+        # Jour de la semaine seul restreint
+        self.assertFalse(Cron('0 9 * * 0').correspond(datetime(2026, 10, 1, 9, 0)))
+
+    def test_dimanche_7(self):
+        self.assertTrue(Cron('0 0 * * 7').correspond(datetime(2026, 10, 18, 0, 0)))
+
+    def test_expressions_invalides(self):
+        for expression in ('* * * *', '60 * * * *', '*/0 * * * *', '5-1 * * * *', 'a * * * *'):
+            with self.subTest(expression=expression), self.assertRaises(ValueError):
+                Cron(expression)
+
+
+@override_settings(
+    CACHES=CACHE_TESTS,
+    TACHES_PERIODIQUES={'addition': {'tache': 'taches.tests.additionner', 'cron': '*/5 * * * *'}},
+    PLANIFICATEUR_EXECUTION='file',
+)
+class PlanificateurTests(TestCase):
+    """Une échéance n'est déclenchée que par une seule instance du planificateur"""
+
+    def setUp(self):
+        self.configurees = planificateur.planifications()
+        planificateur.synchroniser(self.configurees)
+
+    def verifier(self, heure, minute):
+        tick = timezone.make_aware(datetime(2026, 10, 19, heure, minute))
+        return planificateur.verifier(self.configurees, tick, pool=None)
+
+    def test_une_seule_instance_par_echeance(self):
+        self.assertEqual(self.verifier(10, 5), ['addition'])
+        # Seconde instance, même échéance
+        self.assertEqual(self.verifier(10, 5), [])
+        self.assertEqual(self.verifier(10, 6), [])
+        self.assertEqual(self.verifier(10, 10), ['addition'])
+
+        taches = Tache.objects.filter(nom='taches.tests.additionner')
+        self.assertEqual(taches.count(), 2)
+        planification = Planification.objects.get(nom='addition')
+        self.assertEqual(planification.derniere_tache, taches.latest('pk'))
+        self.assertEqual(planification.cron, '*/5 * * * *')
+
+    def test_echeance_passee_ignoree(self):
+        self.verifier(10, 10)
+        self.assertFalse(planificateur.reserver('addition', timezone.make_aware(datetime(2026, 10, 19, 10, 5))))
+
+    @override_settings(TACHES_PERIODIQUES={'inconnue': {'tache': 'taches.tests.absente', 'cron': '* * * * *'}})
+    def test_tache_inconnue(self):
+        with self.assertRaisesMessage(ValueError, 'tâche inconnue taches.tests.absente'):
+            planificateur.planifications()
+
+
+class MaintenanceTests(TransactionTestCase):
+    """Maintenance de la base (hors transaction : VACUUM)"""
+
+    def test_commande(self):
+        sortie = StringIO()
+        call_command('maintenance_base', stdout=sortie)
+        self.assertIn('✅ Maintenance de la base default terminée', sortie.getvalue())
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite uniquement')
+    def test_vacuum_incremental_apres_vacuum_complet(self):
+        self.assertEqual(maintenance.maintenir(complet=True)['vacuum'], 'complet')
+        bilan = maintenance.maintenir(pages=10)
+        self.assertEqual(bilan['vacuum'], 'incrémental')
+        self.assertGreaterEqual(bilan['pages_liberees'], 0)
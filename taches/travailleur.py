@@ -0,0 +1,170 @@
+# taches/travailleur.py
+"""
+Prise en charge et exécution des tâches de la file (commande run_worker).
+
+Plusieurs processus, éventuellement sur plusieurs machines, lisent la même
+table sans jamais prendre deux fois la même tâche :
+- PostgreSQL : SELECT ... FOR UPDATE SKIP LOCKED, chaque processus passe les
+  lignes déjà verrouillées par un autre ;
+- SQLite (une seule écriture à la fois) : un UPDATE unique qui choisit la
+  tâche et la réserve ; le processus relit ensuite la ligne par son jeton.
+
+Une tâche prise reste réservée TACHES_DUREE_RESERVATION secondes (prolongées
+par chaque appel à progression) ; passé ce délai, un travailleur arrêté
+brutalement est considéré comme disparu et la tâche est reprise.
+"""
+import logging
+import os
+import signal
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q, Subquery
+from django.utils import timezone
+
+from .models import Tache
+from .registre import TACHES, tache_courante
+
+logger = logging.getLogger(__name__)
+
+
+def _duree_reservation():
+    return timedelta(seconds=getattr(settings, 'TACHES_DUREE_RESERVATION', 300))
+
+
+def nom_travailleur():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _disponibles(maintenant):
+    return Tache.objects.filter(
+        Q(etat=Tache.ATTENTE, executer_apres__lte=maintenant)
+        # Réservation expirée : travailleur arrêté en cours d'exécution
+        | Q(etat=Tache.EN_COURS, reservee_jusqua__lt=maintenant)
+    ).order_by('-priorite', 'executer_apres', 'pk')
+
+
+def prendre(travailleur):
+    """Réserve la prochaine tâche disponible pour ce travailleur ; None si la file est vide"""
+    maintenant = timezone.now()
+    jeton = uuid.uuid4().hex
+    reservation = {
+        'etat': Tache.EN_COURS,
+        'jeton': jeton,
+        'travailleur': travailleur,
+        'reservee_jusqua': maintenant + _duree_reservation(),
+        'tentatives': F('tentatives') + 1,
+        'date_debut': maintenant,
+        'date_fin': None,
+        'progression': 0,
+        'message': '',
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pk = _disponibles(maintenant).select_for_update(skip_locked=True).values_list('pk', flat=True).first()
+            if pk is None:
+                return None
+            Tache.objects.filter(pk=pk).update(**reservation)
+    else:
+        # Sélection et réservation dans la même instruction
+        prises = Tache.objects.filter(
+            pk=Subquery(_disponibles(maintenant).values('pk')[:1])
+        ).update(**reservation)
+        if not prises:
+            return None
+
+    return Tache.objects.get(jeton=jeton)
+
+
+def _terminer(tache, **champs):
+    # Filtré sur le jeton : sans effet si la tâche a été reprise entre-temps
+    champs.setdefault('date_fin', timezone.now())
+    Tache.objects.filter(pk=tache.pk, jeton=tache.jeton).update(reservee_jusqua=None, **champs)
+
+
+def _echouer(tache, erreur):
+    if tache.tentatives < tache.tentatives_max:
+        # Nouvel essai après un délai croissant : 1, 2, 4... fois TACHES_DELAI_REESSAI
+        delai = getattr(settings, 'TACHES_DELAI_REESSAI', 30) * 2 ** (tache.tentatives - 1)
+        _terminer(
+            tache,
+            etat=Tache.ATTENTE,
+            executer_apres=timezone.now() + timedelta(seconds=delai),
+            erreur=erreur,
+        )
+    else:
+        _terminer(tache, etat=Tache.ECHEC, erreur=erreur)
+
+
+def executer(tache):
+    """Exécute une tâche réservée et enregistre son résultat"""
+    if tache.tentatives > tache.tentatives_max:
+        # Reprise après l'arrêt d'un travailleur, sans essai restant
+        _terminer(tache, etat=Tache.ECHEC, erreur=tache.erreur or "Réservation expirée sans essai restant")
+        return
+
+    options = TACHES.get(tache.nom)
+    if options is None:
+        _terminer(tache, etat=Tache.ECHEC, erreur=f"Tâche inconnue : {tache.nom}")
+        return
+
+    jeton = tache_courante.set(tache)
+    debut = time.monotonic()
+    try:
+        resultat = options['fonction'](*tache.arguments.get('args', []), **tache.arguments.get('kwargs', {}))
+    except Exception:
+        logger.exception("Échec de la tâche %s (essai %s/%s)", tache, tache.tentatives, tache.tentatives_max)
+        _echouer(tache, traceback.format_exc())
+    else:
+        _terminer(tache, etat=Tache.TERMINEE, progression=100, resultat=resultat, erreur='')
+        logger.info("Tâche %s terminée en %.2f s", tache, time.monotonic() - debut)
+    finally:
+        tache_courante.reset(jeton)
+
+
+class Arret:
+    """Arrêt demandé par SIGTERM ou SIGINT : la tâche en cours se termine d'abord"""
+
+    def __init__(self):
+        self.demande = False
+
+    def installer(self):
+        signal.signal(signal.SIGTERM, self._demander)
+        signal.signal(signal.SIGINT, self._demander)
+
+    def _demander(self, signum, frame):
+        self.demande = True
+
+
+def boucle(une_fois=False, arret=None):
+    """
+    Prend et exécute les tâches jusqu'à l'arrêt demandé ; avec une_fois,
+    s'arrête dès que la file est vide. Renvoie le nombre de tâches exécutées.
+    """
+    if arret is None:
+        arret = Arret()
+        arret.installer()
+    travailleur = nom_travailleur()
+    attente = getattr(settings, 'TACHES_ATTENTE', 1)
+    executees = 0
+
+    while not arret.demande:
+        # Connexion périmée ou coupée fermée entre deux tâches, comme entre deux requêtes
+        close_old_connections()
+        tache = prendre(travailleur)
+        if tache is None:
+            if une_fois:
+                break
+            time.sleep(attente)
+            continue
+        executer(tache)
+        executees += 1
+
+    close_old_connections()
+    return executees
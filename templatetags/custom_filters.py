@@ -1,5 +1,10 @@
 from django import template
+from django.conf import settings
+from django.templatetags.static import static
 from django.utils import timezone, translation
+from django.utils.html import format_html_join
+
+from gestion_groupes import backends
 
 register = template.Library()
 
@@ -25,3 +30,26 @@ def date_actuelle_formatee():
     date_formatee = envoi.strftime("%A %d %B %Y")
     date_formatee = date_formatee[0].upper() + date_formatee[1:]
     return date_formatee
+
+
+@register.simple_tag
+def empreinte_droits(user):
+    """Empreinte des droits de l'utilisateur, pour les clés des fragments {% cache %}"""
+    return backends.empreinte_droits(user)
+
+
+@register.simple_tag
+def bundle(nom, type_fichier):
+    """
+    Balises <link> / <script> d'un bundle de BUNDLES_STATIQUES : le fichier
+    groupé (nom haché) si STATIC_BUNDLES, sinon chaque source séparément.
+    """
+    if getattr(settings, 'STATIC_BUNDLES', False):
+        chemins = [f'bundles/{nom}.{type_fichier}']
+    else:
+        chemins = settings.BUNDLES_STATIQUES[nom].get(type_fichier, [])
+    if type_fichier == 'js':
+        gabarit = '<script src="{}"></script>'
+    else:
+        gabarit = '<link href="{}" rel="stylesheet">'
+    return format_html_join('\n', gabarit, ((static(chemin),) for chemin in chemins))